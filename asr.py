@@ -0,0 +1,275 @@
+import math
+import os
+import threading
+import warnings
+
+import torch
+from transformers import AutoProcessor, AutoModelForSpeechSeq2Seq
+from transformers.modeling_outputs import BaseModelOutput
+
+import metrics
+from audio_io import SAMPLE_RATE
+
+MODEL_NAMES = {
+    "tiny": "openai/whisper-tiny",
+    "base": "openai/whisper-base",
+    "small": "openai/whisper-small",
+}
+PRECISIONS = ("fp32", "int8", "bf16")
+
+
+def parse_cores(value):
+    """Ubah "0-3" atau "0,2,4" menjadi daftar nomor core"""
+    cores = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-")
+            cores.extend(range(int(start), int(end) + 1))
+        else:
+            cores.append(int(part))
+    return cores
+
+
+# === Konfigurasi backend inferensi Whisper untuk CPU ===
+class WhisperBackendConfig:
+    def __init__(self, model_size="small", precision="fp32", num_threads=None, cpu_cores=None):
+        if model_size not in MODEL_NAMES:
+            raise ValueError(f"Ukuran model tidak dikenal: {model_size} (pilih {', '.join(MODEL_NAMES)})")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Presisi tidak dikenal: {precision} (pilih {', '.join(PRECISIONS)})")
+        self.model_size = model_size
+        self.precision = precision
+        self.num_threads = num_threads
+        self.cpu_cores = list(cpu_cores) if cpu_cores else None
+
+    @classmethod
+    def from_env(cls):
+        threads = os.environ.get("WHISPER_NUM_THREADS")
+        cores = os.environ.get("WHISPER_CPU_CORES")
+        return cls(
+            model_size=os.environ.get("WHISPER_MODEL_SIZE", "small"),
+            precision=os.environ.get("WHISPER_PRECISION", "fp32"),
+            num_threads=int(threads) if threads else None,
+            cpu_cores=parse_cores(cores) if cores else None,
+        )
+
+    @property
+    def model_name(self):
+        return MODEL_NAMES[self.model_size]
+
+    def to_dict(self):
+        return {
+            "model_size": self.model_size,
+            "precision": self.precision,
+            "num_threads": self.num_threads,
+            "cpu_cores": self.cpu_cores,
+        }
+
+
+def cpu_supports_bf16():
+    """True jika CPU punya instruksi bf16 native (AVX512-BF16 atau AMX)"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def apply_thread_settings(config):
+    """Pasang afinitas core dan jumlah thread intra-op sesuai konfigurasi"""
+    if config.cpu_cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, config.cpu_cores)
+    num_threads = config.num_threads or (len(config.cpu_cores) if config.cpu_cores else None)
+    if num_threads:
+        torch.set_num_threads(num_threads)
+
+
+# === Memuat model dan processor Whisper dari Hugging Face ===
+def load_whisper_model(config=None):
+    config = config or WhisperBackendConfig.from_env()
+    apply_thread_settings(config)
+
+    processor = AutoProcessor.from_pretrained(config.model_name)
+    model = AutoModelForSpeechSeq2Seq.from_pretrained(config.model_name)
+    model.eval()
+
+    if config.precision == "int8":
+        # Kuantisasi dinamis: bobot Linear disimpan INT8, aktivasi dikuantisasi saat inferensi
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif config.precision == "bf16":
+        if cpu_supports_bf16():
+            model = model.to(torch.bfloat16)
+        else:
+            warnings.warn("CPU tidak mendukung bf16 secara native, model tetap fp32")
+
+    return processor, model
+
+
+def model_memory_bytes(model):
+    """Ukuran bobot dan buffer model di memori (termasuk bobot INT8 hasil kuantisasi)"""
+    total = 0
+    for tensor in model.state_dict().values():
+        if isinstance(tensor, torch.Tensor):
+            total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def _input_features(inputs):
+    """Ambil tensor input yang dipakai model dari hasil processor"""
+    # Use the correct key - typically 'input_features' for Whisper
+    if "input_features" in inputs:
+        return inputs["input_features"]
+    if "input_values" in inputs:
+        return inputs["input_values"]
+    # Fallback: use the first available tensor
+    first_key = list(inputs.keys())[0]
+    return inputs[first_key]
+
+
+def extract_features(processor, audio_inputs):
+    """Ekstraksi fitur mel untuk satu atau beberapa audio 16kHz"""
+    # Processor Whisper mem-padding setiap audio ke jendela mel yang sama,
+    # sehingga seluruh batch bisa ditumpuk menjadi satu tensor
+    inputs = processor(audio_inputs, sampling_rate=SAMPLE_RATE, return_tensors="pt")
+    return _input_features(inputs)
+
+
+def generate_ids(model, features, **generate_kwargs):
+    """`features` boleh None jika `encoder_outputs` sudah diberikan (mode ucapan pendek)"""
+    if features is not None and features.dtype != model.dtype:
+        features = features.to(model.dtype)
+    with torch.no_grad():
+        return model.generate(features, **generate_kwargs)
+
+
+def decode_ids(processor, generated_ids):
+    return processor.batch_decode(generated_ids, skip_special_tokens=True)
+
+
+# === Mode ucapan pendek: encoder hanya menjalankan jendela mel sepanjang audio ===
+class ShortUtteranceEncoder:
+    """Jalankan encoder Whisper pada jendela mel yang dipotong sesuai panjang audio.
+
+    Processor biasa mem-padding setiap audio ke 30 detik sehingga klip 5 detik
+    meng-encode 6x frame lebih banyak dari isinya. Di sini fitur mel dibuat
+    untuk jendela `ceil(durasi + margin)` detik, embedding posisi encoder
+    diganti sementara dengan irisan yang sesuai (di bawah lock karena model
+    dipakai bersama), lalu hasil encoder diberikan ke `generate` sebagai
+    `encoder_outputs`. Audio lebih panjang dari `max_seconds` tetap memakai
+    padding 30 detik penuh.
+    """
+
+    def __init__(self, model, max_seconds=10.0, margin_seconds=0.5):
+        self.model = model
+        self.encoder = model.get_encoder()
+        self.max_seconds = max_seconds
+        self.margin_seconds = margin_seconds
+        self.full_positions = self.encoder.embed_positions.weight.shape[0]
+        self._embeddings = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, model):
+        """Instance sesuai `WHISPER_SHORT_WINDOW`; None jika mode ini tidak aktif"""
+        if os.environ.get("WHISPER_SHORT_WINDOW", "0") != "1":
+            return None
+        return cls(model, max_seconds=float(os.environ.get("WHISPER_SHORT_WINDOW_MAX_SECONDS", 10)))
+
+    def window_seconds(self, num_samples):
+        """Panjang jendela (detik, dibulatkan ke atas) untuk audio terpanjang di batch; None = padding penuh"""
+        seconds = num_samples / SAMPLE_RATE
+        if seconds > self.max_seconds:
+            return None
+        window = math.ceil(seconds + self.margin_seconds)
+        # Dua frame mel per posisi encoder (conv stride 2), 100 frame mel per detik
+        return window if window * 50 < self.full_positions else None
+
+    def extract_features(self, processor, audio_inputs, window_seconds):
+        inputs = processor.feature_extractor(audio_inputs, sampling_rate=SAMPLE_RATE, return_tensors="pt",
+                                             max_length=window_seconds * SAMPLE_RATE)
+        return _input_features(inputs)
+
+    def _positions(self, count):
+        embedding = self._embeddings.get(count)
+        if embedding is None:
+            # Irisan berbagi storage dengan bobot asli; tidak ada salinan per panjang jendela
+            weight = self.encoder.embed_positions.weight[:count]
+            embedding = self._embeddings[count] = torch.nn.Embedding.from_pretrained(weight, freeze=True)
+        return embedding
+
+    def encode(self, features):
+        """Hasil encoder untuk fitur mel jendela pendek maupun penuh (30 detik)"""
+        if features.dtype != self.model.dtype:
+            features = features.to(self.model.dtype)
+        count = features.shape[-1] // 2
+        # Semua pemanggilan encoder model ini lewat lock yang sama, sehingga tidak ada
+        # encoder jendela penuh yang berjalan saat embedding posisi sedang diganti
+        with self._lock, torch.no_grad():
+            if count >= self.full_positions:
+                return self.encoder(features, return_dict=True)
+            original = self.encoder.embed_positions
+            original_max = self.encoder.config.max_source_positions
+            # Encoder memeriksa panjang input terhadap max_source_positions dan menambahkan seluruh embedding posisi
+            self.encoder.embed_positions = self._positions(count)
+            self.encoder.config.max_source_positions = count
+            try:
+                hidden = self.encoder(features, return_dict=True).last_hidden_state
+            finally:
+                self.encoder.embed_positions = original
+                self.encoder.config.max_source_positions = original_max
+        return BaseModelOutput(last_hidden_state=hidden)
+
+
+def _generate(processor, model, audio_inputs, decoding_profile=None, short_encoder=None, **extra_kwargs):
+    longest = max(len(audio) for audio in audio_inputs)
+    window = short_encoder.window_seconds(longest) if short_encoder is not None else None
+    with metrics.stage("features"):
+        if window:
+            features = short_encoder.extract_features(processor, audio_inputs, window)
+        else:
+            features = extract_features(processor, audio_inputs)
+    generate_kwargs = dict(extra_kwargs)
+    if decoding_profile is not None:
+        # Anggaran token mengikuti audio terpanjang di dalam batch
+        generate_kwargs.update(decoding_profile.generate_kwargs(longest, model))
+    with metrics.stage("generate"), metrics.profile():
+        if short_encoder is None:
+            return generate_ids(model, features, **generate_kwargs)
+        metrics.increment("short_window_batches" if window else "full_window_batches")
+        with metrics.stage("encode"):
+            generate_kwargs["encoder_outputs"] = short_encoder.encode(features)
+        return generate_ids(model, None, **generate_kwargs)
+
+
+# === Transkripsi satu batch audio dengan satu kali generate ===
+def transcribe_batch(processor, model, audio_inputs, decoding_profile=None, short_encoder=None):
+    """Transkripsi beberapa audio 16kHz sekaligus, hasil berurutan sesuai input"""
+    generated_ids = _generate(processor, model, audio_inputs, decoding_profile, short_encoder)
+    with metrics.stage("decode"):
+        return decode_ids(processor, generated_ids)
+
+
+def mean_token_logprobs(model, generated):
+    """Rata-rata log-probabilitas token hasil generate per audio (token setelah EOS diabaikan)"""
+    # Skor sudah melewati logits processor (mis. bias menu), sama seperti yang dipakai saat decoding
+    logprobs = model.compute_transition_scores(generated.sequences, generated.scores, normalize_logits=True)
+    tokens = generated.sequences[:, -logprobs.shape[1]:]
+    is_eos = tokens == model.generation_config.eos_token_id
+    # Token EOS pertama ikut dihitung, padding sesudahnya tidak
+    valid = (torch.cumsum(is_eos, dim=1) - is_eos.long()) == 0
+    logprobs = logprobs.float().masked_fill(~valid, 0.0)
+    return (logprobs.sum(dim=1) / valid.sum(dim=1).clamp(min=1)).tolist()
+
+
+# === Transkripsi beserta keyakinan decoder (untuk cascade model kecil -> besar) ===
+def transcribe_batch_scored(processor, model, audio_inputs, decoding_profile=None, short_encoder=None):
+    """Seperti `transcribe_batch`, tetapi mengembalikan daftar (teks, rata-rata logprob token)"""
+    generated = _generate(processor, model, audio_inputs, decoding_profile, short_encoder,
+                          return_dict_in_generate=True, output_scores=True)
+    with metrics.stage("decode"):
+        texts = decode_ids(processor, generated.sequences)
+        return list(zip(texts, mean_token_logprobs(model, generated)))
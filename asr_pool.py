@@ -0,0 +1,363 @@
+import collections
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import wait as wait_connections
+
+import numpy as np
+
+import metrics
+from audio_io import SAMPLE_RATE
+from batch_scheduler import BatchStats
+
+
+class ASRQueueFull(RuntimeError):
+    """Antrean pool penuh; pemanggil sebaiknya menolak atau menunda ucapan baru"""
+
+
+def split_cores(num_workers, cores=None):
+    """Bagi core yang tersedia menjadi irisan yang tidak tumpang tindih per worker"""
+    if cores is None:
+        cores = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else range(os.cpu_count() or 1)
+    cores = sorted(cores)
+    if len(cores) < num_workers:
+        return [None] * num_workers
+    size = len(cores) // num_workers
+    return [cores[i * size:(i + 1) * size] for i in range(num_workers)]
+
+
+# === Proses worker: berjalan di child hasil fork, bobot model dibaca dari memori bersama ===
+def _worker_main(connection, processor, model, transcribe_fn, cores, num_threads, warmup):
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    try:
+        import torch
+    except ImportError:
+        pass  # transcribe_fn tanpa PyTorch (mis. pengujian)
+    else:
+        torch.set_num_threads(num_threads)
+    # Durasi tahap di worker diteruskan ke registry metrik parent bersama hasilnya
+    metrics.REGISTRY.forward_buffer = []
+    if warmup:
+        # Warm-up dilakukan di worker, bukan di parent, agar thread pool OpenMP tidak ikut ter-fork
+        transcribe_fn(processor, model, [np.zeros(SAMPLE_RATE, dtype=np.float32)])
+        metrics.REGISTRY.take_forwarded()
+    connection.send(("ready",))
+
+    while True:
+        batch = connection.recv()
+        if batch is None:
+            break
+        started = time.perf_counter()
+        try:
+            transcriptions = transcribe_fn(processor, model, batch)
+        except Exception as e:
+            connection.send(("error", f"{type(e).__name__}: {e}", metrics.REGISTRY.take_forwarded(),
+                             time.perf_counter() - started))
+        else:
+            connection.send(("done", list(transcriptions), metrics.REGISTRY.take_forwarded(),
+                             time.perf_counter() - started))
+
+
+def _stop_process(process, timeout):
+    """Tunggu proses berhenti; jika tidak, terminate lalu kill, masing-masing dengan batas waktu"""
+    process.join(timeout)
+    for stop in (process.terminate, process.kill):
+        if not process.is_alive():
+            return
+        stop()
+        process.join(timeout)
+
+
+def _resolve(request, result=None, error=None):
+    # Future yang dibatalkan pemanggil (mis. asyncio.wrap_future) dilewati agar supervisor tidak mati
+    if request.future.set_running_or_notify_cancel():
+        if error is not None:
+            request.future.set_exception(error)
+        else:
+            request.future.set_result(result)
+
+
+class _Pending:
+    __slots__ = ("audio", "future", "enqueued_at")
+
+    def __init__(self, audio):
+        self.audio = audio
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class _Worker:
+    __slots__ = ("worker_id", "process", "connection", "ready", "in_flight", "tasks_done", "started_at")
+
+    def __init__(self, worker_id, process, connection):
+        self.worker_id = worker_id
+        self.process = process
+        self.connection = connection
+        self.ready = False
+        self.in_flight = []
+        self.tasks_done = 0
+        self.started_at = time.monotonic()
+
+
+# === Pool proses ASR yang berbagi bobot model (copy-on-write) ===
+class ASRProcessPool:
+    """Jalankan Whisper di beberapa proses worker yang berbagi satu salinan bobot.
+
+    Model dimuat sekali di parent dan tensornya dipindah ke shared memory,
+    lalu worker dibuat dengan `fork` sehingga semua worker membaca bobot yang
+    sama tanpa menyalin RAM. Tiap worker memakai irisan core dan jumlah
+    thread intra-op sendiri. Antarmukanya sama dengan `WhisperBatchScheduler`
+    (`submit`, `transcribe`, `close`, `stats`).
+
+    Ucapan dikirim ke worker yang sedang menganggur lewat pipe per worker;
+    jika semua sibuk, ucapan yang menumpuk dikirim sekaligus sebagai satu
+    batch (maksimal `max_batch_size`). Antrean dibatasi `max_queue`:
+    `submit()` menunggu slot kosong (backpressure) dan melempar `ASRQueueFull`
+    jika `timeout` habis. Worker yang mati di-fork ulang otomatis dan ucapan
+    yang sedang diprosesnya gagal dengan error, bukan hilang diam-diam.
+
+    Worker pengganti (restart dan daur ulang) sengaja tetap di-fork dari
+    parent yang sudah multithread: forkserver/spawn harus mem-pickle model
+    dan `transcribe_fn`, sehingga bobot hasil kuantisasi tersalin per worker.
+    Child hanya menyentuh pipe-nya, model, dan registry metrik (lock-nya
+    dibuat ulang setelah fork). Sebagai pengaman, worker yang tidak
+    mengirim "ready" dalam `start_timeout` detik dianggap macet, dihentikan,
+    lalu di-fork ulang; proses yang tidak berhenti saat ditutup di-terminate
+    lalu di-kill setelah `stop_timeout` detik.
+    """
+
+    def __init__(self, processor, model, num_workers=2, threads_per_worker=None, max_queue=None,
+                 max_batch_size=4, max_tasks_per_worker=None, transcribe_fn=None,
+                 warmup=True, start_timeout=600, stop_timeout=5):
+        if transcribe_fn is None:
+            from asr import transcribe_batch as transcribe_fn
+        self.processor = processor
+        self.model = model
+        self.transcribe_fn = transcribe_fn
+        self.num_workers = max(1, int(num_workers))
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_queue = max_queue or self.num_workers * self.max_batch_size * 4
+        self.warmup = warmup
+        self.start_timeout = start_timeout
+        self.stop_timeout = stop_timeout
+        self.stats = BatchStats()
+        self.restarts = 0
+        self.crashed_requests = 0
+
+        self.core_slices = split_cores(self.num_workers)
+        self.threads_per_worker = [
+            threads_per_worker or (len(cores) if cores else max(1, (os.cpu_count() or 1) // self.num_workers))
+            for cores in self.core_slices
+        ]
+
+        # Tensor di shared memory tidak pernah disalin oleh fork maupun saat worker di-restart
+        try:
+            model.share_memory()
+        except (RuntimeError, AttributeError):
+            pass  # mis. parameter hasil kuantisasi; tetap dibagi lewat copy-on-write
+
+        self._context = multiprocessing.get_context("fork")
+        self._slots = threading.BoundedSemaphore(self.max_queue)
+        self._backlog = collections.deque()
+        self._lock = threading.Condition()
+        self._wake_reader, self._wake_writer = multiprocessing.Pipe(duplex=False)
+        self._workers = {}
+        self._closed = False
+
+        for worker_id in range(self.num_workers):
+            self._spawn(worker_id)
+        self._supervisor = threading.Thread(target=self._supervise, name="asr-pool-supervisor", daemon=True)
+        self._supervisor.start()
+
+        with self._lock:
+            if not self._lock.wait_for(lambda: all(w.ready for w in self._workers.values()), start_timeout):
+                self.close()
+                raise RuntimeError("Worker ASR tidak siap dalam batas waktu")
+
+    def _spawn(self, worker_id):
+        parent_end, child_end = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_end, self.processor, self.model, self.transcribe_fn,
+                  self.core_slices[worker_id], self.threads_per_worker[worker_id], self.warmup),
+            name=f"asr-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        child_end.close()
+        self._workers[worker_id] = _Worker(worker_id, process, parent_end)
+
+    def submit(self, audio_input, timeout=None):
+        """Masukkan audio 16kHz ke antrean, hasilnya berupa Future berisi transkripsi"""
+        if self._closed:
+            raise RuntimeError("Pool ASR sudah ditutup")
+        if not self._slots.acquire(timeout=timeout):
+            raise ASRQueueFull(f"Antrean ASR penuh ({self.max_queue} ucapan)")
+        request = _Pending(audio_input)
+        with self._lock:
+            self._backlog.append(request)
+            self._wake_writer.send_bytes(b"")
+        return request.future
+
+    def transcribe(self, audio_input, timeout=None):
+        return self.submit(audio_input, timeout=timeout).result(timeout=timeout)
+
+    @property
+    def queue_depth(self):
+        """Jumlah ucapan yang sedang mengantre atau diproses"""
+        with self._lock:
+            return len(self._backlog) + sum(len(w.in_flight) for w in self._workers.values())
+
+    def summary(self):
+        return {
+            "workers": self.num_workers,
+            "alive": sum(w.process.is_alive() for w in self._workers.values()),
+            "threads_per_worker": self.threads_per_worker,
+            "core_slices": self.core_slices,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "restarts": self.restarts,
+            "crashed_requests": self.crashed_requests,
+        }
+
+    def close(self, timeout=None):
+        timeout = self.stop_timeout if timeout is None else timeout
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wake_writer.send_bytes(b"")
+        # Supervisor dihentikan dulu agar tidak ada restart atau daur ulang yang mem-fork worker baru
+        # setelah daftar worker diambil; daur ulang yang sedang berjalan bisa menunggu satu `timeout`
+        self._supervisor.join(2 * timeout + 1)
+        with self._lock:
+            workers = list(self._workers.values())
+        for worker in workers:
+            try:
+                worker.connection.send(None)
+            except OSError:
+                pass
+        for worker in workers:
+            _stop_process(worker.process, timeout)
+        with self._lock:
+            leftover = list(self._backlog) + [r for w in workers for r in w.in_flight]
+            self._backlog.clear()
+        self._fail(leftover, "Pool ASR ditutup sebelum ucapan selesai")
+
+    # === Thread supervisor: bagikan batch, terima hasil, dan restart worker yang berhenti ===
+    def _fail(self, requests, message):
+        for request in requests:
+            if not request.future.done():
+                _resolve(request, error=RuntimeError(message))
+                self._slots.release()
+
+    def _dispatch(self):
+        """Kirim ucapan yang mengantre ke worker yang menganggur"""
+        for worker in self._workers.values():
+            if not self._backlog:
+                return
+            if not worker.ready or worker.in_flight:
+                continue
+            batch = [self._backlog.popleft() for _ in range(min(self.max_batch_size, len(self._backlog)))]
+            worker.in_flight = batch
+            try:
+                worker.connection.send([request.audio for request in batch])
+            except OSError:
+                # Worker sudah mati; ucapan dikembalikan dan ditangani saat restart
+                worker.in_flight = []
+                self._backlog.extendleft(reversed(batch))
+
+    def _receive(self, worker):
+        try:
+            message = worker.connection.recv()
+        except (EOFError, OSError):
+            return False
+        kind = message[0]
+        if kind == "ready":
+            with self._lock:
+                worker.ready = True
+                self._lock.notify_all()
+            return True
+
+        with self._lock:
+            batch, worker.in_flight = worker.in_flight, []
+            worker.tasks_done += len(batch)
+        for name, seconds in message[-2]:
+            metrics.observe(name, seconds)
+        started = time.perf_counter() - message[-1]
+        waits = [max(0.0, started - request.enqueued_at) for request in batch]
+        error = None
+        if kind == "error":
+            error = RuntimeError(message[1])
+        elif len(message[1]) != len(batch):
+            error = RuntimeError(f"Worker ASR mengembalikan {len(message[1])} hasil untuk {len(batch)} audio")
+        self.stats.record(len(batch), waits, message[-1], failed=error is not None)
+        for index, request in enumerate(batch):
+            if error is not None:
+                _resolve(request, error=error)
+            else:
+                _resolve(request, message[1][index])
+            self._slots.release()
+        return True
+
+    def _restart(self, worker):
+        """Gagalkan ucapan milik worker yang berhenti lalu fork worker baru"""
+        worker.connection.close()
+        _stop_process(worker.process, self.stop_timeout)
+        with self._lock:
+            lost, worker.in_flight = worker.in_flight, []
+            if self._closed:
+                return
+        if lost:
+            self.crashed_requests += len(lost)
+            self._fail(lost, f"Worker ASR {worker.worker_id} berhenti (exit code {worker.process.exitcode})")
+        self.restarts += 1
+        self._spawn(worker.worker_id)
+
+    def _recycle_if_needed(self, worker):
+        # Worker didaur ulang secara bersih setelah sejumlah ucapan (mis. untuk membatasi fragmentasi memori)
+        if (self.max_tasks_per_worker and worker.tasks_done >= self.max_tasks_per_worker and not worker.in_flight
+                and not self._closed):
+            try:
+                worker.connection.send(None)
+            except OSError:
+                pass
+            _stop_process(worker.process, self.stop_timeout)
+            worker.connection.close()
+            self.restarts += 1
+            self._spawn(worker.worker_id)
+
+    def _stop_stuck_workers(self, workers):
+        # Worker yang macet sebelum siap (mis. deadlock setelah fork) dihentikan; sentinel-nya memicu restart
+        now = time.monotonic()
+        for worker in workers:
+            if not worker.ready and now - worker.started_at > self.start_timeout and worker.process.is_alive():
+                worker.process.kill()
+
+    def _supervise(self):
+        while not self._closed:
+            with self._lock:
+                self._dispatch()
+                workers = list(self._workers.values())
+            self._stop_stuck_workers(workers)
+            by_handle = {self._wake_reader: None}
+            for worker in workers:
+                by_handle[worker.connection] = worker
+                by_handle[worker.process.sentinel] = worker
+            for handle in wait_connections(list(by_handle), timeout=1.0):
+                worker = by_handle[handle]
+                if worker is None:
+                    while self._wake_reader.poll():
+                        self._wake_reader.recv_bytes()
+                elif handle is worker.connection:
+                    if self._receive(worker):
+                        self._recycle_if_needed(worker)
+                elif not self._closed and self._workers.get(worker.worker_id) is worker:
+                    # Hasil yang sudah dikirim sebelum worker berhenti diproses dulu
+                    while worker.connection.poll() and self._receive(worker):
+                        pass
+                    self._restart(worker)
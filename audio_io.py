@@ -0,0 +1,58 @@
+import functools
+import io
+import os
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def pcm16_to_float(raw_data):
+    """Konversi PCM 16-bit mentah menjadi array float32 dalam rentang [-1, 1]"""
+    # np.frombuffer hanya membuat view atas bytes; satu-satunya salinan adalah konversi ke float32
+    return np.frombuffer(raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+@functools.lru_cache(maxsize=8)
+def _get_resampler(orig_rate, target_rate):
+    import torchaudio
+
+    # Kernel resampling dihitung sekali per pasangan sampling rate lalu dipakai ulang
+    return torchaudio.transforms.Resample(orig_freq=orig_rate, new_freq=target_rate)
+
+
+def resample(samples, orig_rate, target_rate=SAMPLE_RATE):
+    """Resample array float32; tidak melakukan apa pun jika sampling rate sudah sama"""
+    if orig_rate == target_rate:
+        return samples
+
+    import torch
+
+    with torch.no_grad():
+        return _get_resampler(orig_rate, target_rate)(torch.from_numpy(samples)).numpy()
+
+
+def load_wav(path, target_rate=SAMPLE_RATE):
+    """Baca file WAV PCM 16-bit (path atau file-like) menjadi array float32 mono pada `target_rate`"""
+    with wave.open(str(path) if isinstance(path, (str, os.PathLike)) else path, "rb") as wav_file:
+        if wav_file.getsampwidth() != 2:
+            raise ValueError(f"{path}: hanya WAV PCM 16-bit yang didukung")
+        channels = wav_file.getnchannels()
+        sample_rate = wav_file.getframerate()
+        samples = pcm16_to_float(wav_file.readframes(wav_file.getnframes()))
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    return resample(samples, sample_rate, target_rate)
+
+
+def array_to_wav_bytes(samples, sample_rate=SAMPLE_RATE):
+    """Bungkus array float32 mono menjadi bytes WAV PCM 16-bit (mis. untuk dikirim ke service)"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return buffer.getvalue()
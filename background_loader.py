@@ -0,0 +1,71 @@
+import contextlib
+import threading
+import time
+
+
+# === Memuat resource berat di thread latar belakang ===
+class BackgroundLoader:
+    """Jalankan `build_fn(phase)` di thread terpisah dan catat durasi setiap fase.
+
+    `build_fn` membungkus setiap langkah dengan `with phase("nama"):` sehingga
+    UI bisa menampilkan fase yang sedang berjalan dan laporan waktu startup.
+    """
+
+    def __init__(self, build_fn, name="background-loader"):
+        self.build_fn = build_fn
+        self.timings = {}
+        self.current_phase = "menunggu"
+        self.result = None
+        self.error = None
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def ready(self):
+        return self._ready.is_set() and self.error is None
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def wait(self, timeout=None):
+        """Tunggu sampai selesai dimuat; kembalikan hasil build_fn.
+
+        Melempar `TimeoutError` jika belum selesai dalam `timeout` detik,
+        atau error dari `build_fn` jika pemuatan gagal.
+        """
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"Pemuatan belum selesai setelah {timeout} detik (fase: {self.current_phase})")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self.current_phase = name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - started
+
+    def report(self):
+        """Laporan waktu startup per fase dalam detik"""
+        end = self.finished_at or time.perf_counter()
+        return {
+            "phases": {name: round(seconds, 3) for name, seconds in self.timings.items()},
+            "total": round(end - self.started_at, 3),
+            "status": "gagal" if self.failed else ("siap" if self._ready.is_set() else self.current_phase),
+        }
+
+    def _run(self):
+        try:
+            self.result = self.build_fn(self.phase)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished_at = time.perf_counter()
+            self._ready.set()
@@ -0,0 +1,170 @@
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class _Request:
+    __slots__ = ("audio", "future", "enqueued_at")
+
+    def __init__(self, audio):
+        self.audio = audio
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+def _resolve(future, result=None, error=None):
+    # Future yang sudah dibatalkan pemanggil dilewati agar thread worker tidak mati karena InvalidStateError
+    if not future.set_running_or_notify_cancel():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# === Statistik batch untuk tuning throughput vs latensi ===
+class BatchStats:
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._waits = collections.deque(maxlen=window)
+        self._infer_times = collections.deque(maxlen=window)
+        self.batch_size_counts = collections.Counter()
+        self.total_requests = 0
+        self.total_batches = 0
+        self.failed_batches = 0
+
+    def record(self, batch_size, waits, infer_seconds, failed=False):
+        with self._lock:
+            self.batch_size_counts[batch_size] += 1
+            self.total_batches += 1
+            self.total_requests += batch_size
+            if failed:
+                self.failed_batches += 1
+            self._waits.extend(waits)
+            self._infer_times.append(infer_seconds)
+
+    def summary(self):
+        """Ringkasan statistik dalam milidetik"""
+        with self._lock:
+            waits = sorted(self._waits)
+            infer_times = sorted(self._infer_times)
+            return {
+                "total_requests": self.total_requests,
+                "total_batches": self.total_batches,
+                "failed_batches": self.failed_batches,
+                "avg_batch_size": self.total_requests / self.total_batches if self.total_batches else 0.0,
+                "batch_size_histogram": dict(sorted(self.batch_size_counts.items())),
+                "queue_wait_ms": {
+                    "p50": _percentile(waits, 50) * 1000,
+                    "p95": _percentile(waits, 95) * 1000,
+                    "max": (waits[-1] if waits else 0.0) * 1000,
+                },
+                "batch_inference_ms": {
+                    "p50": _percentile(infer_times, 50) * 1000,
+                    "p95": _percentile(infer_times, 95) * 1000,
+                },
+            }
+
+
+# === Penjadwal inferensi Whisper yang dipakai bersama oleh semua lane ===
+class WhisperBatchScheduler:
+    """Antrikan ucapan dari banyak lane dan jalankan satu generate per batch"""
+
+    def __init__(self, processor, model, max_batch_size=8, max_wait_ms=25, transcribe_fn=None):
+        if transcribe_fn is None:
+            from asr import transcribe_batch as transcribe_fn
+        self.processor = processor
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000)
+        self.transcribe_fn = transcribe_fn
+        self.stats = BatchStats()
+        self._queue = queue.Queue()
+        # Melindungi `_closed` dan sentinel: tidak ada request yang bisa masuk antrean setelah None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="whisper-batch-scheduler", daemon=True)
+        self._worker.start()
+
+    def submit(self, audio_input, timeout=None):
+        """Masukkan audio 16kHz ke antrean, hasilnya berupa Future berisi transkripsi.
+
+        Antrean tidak dibatasi sehingga `timeout` tidak dipakai; parameter ini
+        ada agar antarmukanya sama dengan `ASRProcessPool.submit`.
+        """
+        request = _Request(audio_input)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Scheduler sudah ditutup")
+            self._queue.put(request)
+        return request.future
+
+    def transcribe(self, audio_input, timeout=None):
+        return self.submit(audio_input, timeout=timeout).result(timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            already_closed = self._closed
+            self._closed = True
+            if not already_closed:
+                self._queue.put(None)
+        self._worker.join()
+        # Pengaman: request yang tersisa (mis. worker berhenti karena error) digagalkan, bukan dibiarkan menunggu
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                _resolve(request.future, error=RuntimeError("Scheduler ditutup sebelum ucapan diproses"))
+
+    def _collect_batch(self, first):
+        """Kembalikan (batch, True jika sentinel penutupan ikut terambil)"""
+        batch = [first]
+        # Jendela tunggu dihitung dari request pertama; jika worker tadi sibuk,
+        # request yang sudah lama mengantre langsung diproses tanpa menunggu lagi
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, closing = self._collect_batch(first)
+
+            started = time.perf_counter()
+            waits = [started - request.enqueued_at for request in batch]
+            try:
+                transcriptions = list(self.transcribe_fn(self.processor, self.model, [r.audio for r in batch]))
+                if len(transcriptions) != len(batch):
+                    raise RuntimeError(f"transcribe_fn mengembalikan {len(transcriptions)} hasil untuk {len(batch)} audio")
+            except Exception as e:
+                self.stats.record(len(batch), waits, time.perf_counter() - started, failed=True)
+                for request in batch:
+                    _resolve(request.future, error=e)
+            else:
+                self.stats.record(len(batch), waits, time.perf_counter() - started)
+                for request, transcription in zip(batch, transcriptions):
+                    _resolve(request.future, transcription)
+
+            if closing:
+                break
@@ -0,0 +1,432 @@
+"""Transkripsi ulang arsip rekaman lane secara offline, lalu parsing ulang pesanannya.
+
+Input berupa folder WAV (dibaca rekursif) atau manifest (`.json` seperti
+`benchmarks/fixtures/manifest.json`, `.jsonl`, atau `.txt` satu path per baris).
+Hasil ditulis bertahap sebagai JSONL; menjalankan ulang perintah yang sama
+melanjutkan dari klip yang belum selesai.
+
+Contoh:
+    python batch_transcribe.py rekaman/ --output hasil.jsonl
+    ASR_WORKERS=4 python batch_transcribe.py manifest.jsonl --output hasil.jsonl --window 512
+    python batch_transcribe.py --reparse hasil.jsonl --output hasil_parser_baru.jsonl
+"""
+import argparse
+import collections
+import json
+import os
+import resource
+import sqlite3
+import sys
+import time
+import wave
+from pathlib import Path
+
+from audio_io import load_wav
+from catalog import process_order_text
+
+
+# === Sumber klip: folder atau manifest, dibaca secara streaming ===
+def _walk_wav(directory):
+    entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+    for entry in entries:
+        if entry.is_dir():
+            yield from _walk_wav(entry.path)
+        elif entry.name.lower().endswith(".wav"):
+            yield {"file": entry.path}
+
+
+def _manifest_entry(entry, base_dir):
+    if isinstance(entry, str):
+        entry = {"file": entry}
+    clip = {"file": str(base_dir / entry["file"])}
+    if "expected" in entry:
+        clip["expected"] = entry["expected"]
+    return clip
+
+
+def iter_json_array(f, chunk_size=1 << 16):
+    """Elemen array JSON satu per satu tanpa memuat seluruh file.
+
+    Elemen manifest berupa objek atau string, yang tidak pernah terbaca
+    lengkap sebelum penutupnya ikut terbaca; angka di batas chunk bisa
+    terpotong, tetapi memang bukan entri manifest yang valid.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    expect = "["
+    while True:
+        buffer = buffer.lstrip()
+        if not buffer:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise ValueError("manifest JSON terpotong sebelum penutup array")
+            buffer = chunk
+            continue
+        if expect == "[":
+            if buffer[0] != "[":
+                raise ValueError("manifest .json harus berupa array")
+            buffer, expect = buffer[1:], "value"
+            continue
+        if buffer[0] == "]" and expect in ("value", "separator"):
+            return
+        if expect == "separator":
+            if buffer[0] != ",":
+                raise ValueError(f"manifest JSON tidak valid di dekat: {buffer[:40]!r}")
+            buffer, expect = buffer[1:], "next"
+            continue
+        try:
+            value, end = decoder.raw_decode(buffer)
+        except ValueError:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise
+            buffer += chunk
+            continue
+        yield value
+        buffer, expect = buffer[end:], "separator"
+
+
+def iter_clips(source):
+    """Klip dari folder atau manifest sebagai dict {"file", "expected"?}, dibaca secara streaming"""
+    source = Path(source)
+    if source.is_dir():
+        yield from _walk_wav(source)
+        return
+    base_dir = source.parent
+    if source.suffix == ".json":
+        with open(source, encoding="utf-8") as f:
+            for entry in iter_json_array(f):
+                yield _manifest_entry(entry, base_dir)
+        return
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield _manifest_entry(json.loads(line) if source.suffix == ".jsonl" else line, base_dir)
+
+
+def wav_duration(path):
+    """Durasi WAV dari header saja, tanpa membaca sampel"""
+    with wave.open(str(path), "rb") as wav_file:
+        return wav_file.getnframes() / wav_file.getframerate()
+
+
+def bucketed(clips, window=256):
+    """Urutkan klip per jendela `window` berdasarkan durasi.
+
+    Hanya `window` header yang ditahan di memori, sehingga arsip sebesar apa
+    pun tetap diproses dengan memori konstan; klip yang header-nya rusak
+    dikembalikan dengan kolom "error".
+    """
+    pending = []
+    for clip in clips:
+        try:
+            clip["duration_s"] = round(wav_duration(clip["file"]), 3)
+        except (OSError, EOFError, wave.Error) as e:
+            clip["error"] = f"{type(e).__name__}: {e}"
+            clip["duration_s"] = 0.0
+        pending.append(clip)
+        if len(pending) >= window:
+            yield sorted(pending, key=lambda c: c["duration_s"])
+            pending = []
+    if pending:
+        yield sorted(pending, key=lambda c: c["duration_s"])
+
+
+def padding_waste(durations, batch_size):
+    """Perkiraan porsi audio padding jika klip berurutan di-batch per `batch_size`"""
+    padded = actual = 0.0
+    for start in range(0, len(durations), batch_size):
+        batch = durations[start:start + batch_size]
+        padded += max(batch) * len(batch)
+        actual += sum(batch)
+    return padded, actual
+
+
+# === Output JSONL bertahap yang bisa dilanjutkan ===
+class ResultWriter:
+    """Tambahkan satu record JSON per klip dan ingat klip yang sudah berhasil.
+
+    Klip yang sudah berhasil dicatat di database SQLite sementara di disk,
+    bukan di set Python, sehingga memori tetap konstan berapa pun ukuran
+    arsip. Indeks ini dibangun ulang dari file output setiap kali dibuka,
+    jadi tidak pernah tertinggal dari output setelah proses terhenti.
+    Saat melanjutkan, record error dan baris terakhir yang terpotong dibuang
+    dari file, sehingga klip yang gagal dicoba ulang tanpa meninggalkan record
+    lama; setiap `file` muncul paling banyak sekali.
+    """
+
+    def __init__(self, path, resume=True):
+        self.path = Path(path)
+        # Nama file kosong: database sementara yang halamannya dipindah ke disk jika melebihi cache
+        self._index = sqlite3.connect("")
+        self._index.execute("CREATE TABLE done (file TEXT PRIMARY KEY)")
+        self._index.execute("CREATE TABLE held (file TEXT PRIMARY KEY, record TEXT NOT NULL)")
+        if resume and self.path.exists():
+            self._load_done()
+        elif self.path.exists():
+            self.path.unlink()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def is_done(self, file):
+        return self._index.execute("SELECT 1 FROM done WHERE file = ?", (file,)).fetchone() is not None
+
+    def _mark_done(self, file):
+        self._index.execute("INSERT OR IGNORE INTO done VALUES (?)", (file,))
+
+    def _load_done(self):
+        stale = False
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    stale = True
+                    break
+                if not line.endswith(b"\n") or "error" in record:
+                    stale = True
+                    continue
+                self._mark_done(record["file"])
+        if stale:
+            self._rewrite_without_stale()
+
+    def _rewrite_without_stale(self):
+        # Disalin baris per baris ke file sementara agar memori tetap konstan
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(self.path, "rb") as source, open(temp_path, "wb") as target:
+            for line in source:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if "error" not in record:
+                    target.write(line)
+        os.replace(temp_path, self.path)
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if "error" not in record:
+            self._mark_done(record["file"])
+
+    def hold_error(self, record):
+        """Tahan record error sampai `write_held()`; dibuang jika klipnya kemudian berhasil"""
+        self._index.execute("INSERT OR REPLACE INTO held VALUES (?, ?)",
+                            (record["file"], json.dumps(record, ensure_ascii=False)))
+
+    def write_held(self):
+        """Tulis record error yang ditahan untuk klip yang tidak pernah berhasil; kembalikan record-nya"""
+        rows = self._index.execute(
+            "SELECT record FROM held WHERE file NOT IN (SELECT file FROM done) ORDER BY rowid")
+        for (text,) in rows:
+            record = json.loads(text)
+            self.write(record)
+            yield record
+        self._index.execute("DELETE FROM held")
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+        self._index.close()
+
+
+def parse_record(record):
+    """Isi ulang item pesanan (dan kecocokannya jika ada "expected") dari transkripsi"""
+    record["items"] = process_order_text(record.get("transcription", ""))
+    if "expected" in record:
+        record["order_exact"] = record["items"] == record["expected"]
+    return record
+
+
+# === Laporan throughput ===
+class Progress:
+    def __init__(self, interval=10.0):
+        self.interval = interval
+        self.started_at = time.perf_counter()
+        self.last_report = self.started_at
+        self.counts = collections.Counter()
+        self.audio_seconds = 0.0
+        self.padded_seconds = 0.0
+        self.bucket_audio_seconds = 0.0
+
+    def record(self, record):
+        self.counts["clips"] += 1
+        if "error" in record:
+            self.counts["errors"] += 1
+        else:
+            self.audio_seconds += record.get("duration_s", 0.0)
+        if "order_exact" in record:
+            self.counts["scored"] += 1
+            self.counts["order_exact"] += record["order_exact"]
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            summary = self.summary()
+            print(f"{summary['clips']} klip · {summary['clips_per_sec']:.2f} klip/dtk · "
+                  f"{summary['audio_seconds_per_sec']:.1f} dtk audio/dtk · RSS maks {summary['max_rss_mb']:.0f} MB",
+                  file=sys.stderr)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started_at
+        summary = {
+            "clips": self.counts["clips"],
+            "skipped": self.counts["skipped"],
+            "errors": self.counts["errors"],
+            "elapsed_seconds": round(elapsed, 3),
+            "clips_per_sec": self.counts["clips"] / elapsed if elapsed else 0.0,
+            "audio_seconds_per_sec": self.audio_seconds / elapsed if elapsed else 0.0,
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }
+        if self.padded_seconds:
+            summary["padding_waste"] = 1 - self.bucket_audio_seconds / self.padded_seconds
+        if self.counts["scored"]:
+            summary["order_accuracy"] = self.counts["order_exact"] / self.counts["scored"]
+        return summary
+
+
+# === Transkripsi arsip lewat penjadwal batch atau pool proses ASR ===
+def _finish(clip, future):
+    record = dict(clip)
+    try:
+        record["transcription"] = future.result()
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        return record
+    return parse_record(record)
+
+
+def transcribe_archive(clips, scheduler, writer, progress, window=256, batch_size=8, max_in_flight=None):
+    """Kirim klip terurut per durasi ke `scheduler` dan tulis hasilnya sesuai urutan kirim.
+
+    Klip dalam satu jendela dikirim dari yang terpendek sehingga penjadwal
+    (yang mengambil antrean secara FIFO) membentuk batch berisi klip dengan
+    durasi serupa. Paling banyak `max_in_flight` audio ditahan di memori.
+    """
+    max_in_flight = max_in_flight or window
+    in_flight = collections.deque()
+
+    def drain(limit):
+        if len(in_flight) <= limit:
+            return
+        while len(in_flight) > limit:
+            clip, future = in_flight.popleft()
+            record = _finish(clip, future)
+            writer.write(record)
+            progress.record(record)
+        writer.flush()
+
+    def remaining():
+        for clip in clips:
+            if writer.is_done(clip["file"]):
+                progress.counts["skipped"] += 1
+            else:
+                yield clip
+
+    for bucket in bucketed(remaining(), window):
+        padded, actual = padding_waste([clip["duration_s"] for clip in bucket], batch_size)
+        progress.padded_seconds += padded
+        progress.bucket_audio_seconds += actual
+        for clip in bucket:
+            if "error" in clip:
+                writer.write(clip)
+                progress.record(clip)
+                continue
+            try:
+                audio = load_wav(clip["file"])
+            except (OSError, EOFError, ValueError, wave.Error) as e:
+                record = dict(clip, error=f"{type(e).__name__}: {e}")
+                writer.write(record)
+                progress.record(record)
+                continue
+            drain(max_in_flight - 1)
+            in_flight.append((clip, scheduler.submit(audio)))
+    drain(0)
+
+
+def reparse_archive(records_path, writer, progress):
+    """Parsing ulang transkripsi yang sudah ada (mis. setelah katalog atau parser berubah) tanpa Whisper.
+
+    Record error ditahan (di indeks sementara writer, bukan di memori) sampai
+    akhir dan hanya ditulis jika klipnya tidak punya record sukses, sehingga
+    arsip lama yang berisi percobaan ulang tidak menghasilkan baris ganda.
+    """
+    with open(records_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if writer.is_done(record["file"]):
+                progress.counts["skipped"] += 1
+                continue
+            if "error" in record:
+                writer.hold_error(record)
+                continue
+            writer.write(parse_record(record))
+            progress.record(record)
+    for record in writer.write_held():
+        progress.record(record)
+    writer.flush()
+
+
+def _build_scheduler(args):
+    from background_loader import BackgroundLoader
+    from lane import build_asr_stack
+
+    if args.workers:
+        os.environ["ASR_WORKERS"] = str(args.workers)
+    os.environ["ASR_MAX_BATCH_SIZE"] = str(args.batch_size)
+    loader = BackgroundLoader(build_asr_stack, name="asr-loader")
+    scheduler = loader.wait()
+    print(f"Model siap: {json.dumps(loader.report()['phases'])}", file=sys.stderr)
+    return scheduler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transkripsi dan parsing ulang arsip rekaman pesanan secara batch")
+    parser.add_argument("source", nargs="?", help="Folder WAV atau file manifest (.json, .jsonl, .txt)")
+    parser.add_argument("--reparse", type=Path, help="JSONL hasil sebelumnya; hanya parsing ulang transkripsinya")
+    parser.add_argument("--output", type=Path, required=True, help="File JSONL hasil")
+    parser.add_argument("--window", type=int, default=256, help="Jumlah klip yang diurutkan per jendela bucketing")
+    parser.add_argument("--batch-size", type=int, default=8, help="Ukuran batch Whisper (ASR_MAX_BATCH_SIZE)")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses worker ASR (ASR_WORKERS)")
+    parser.add_argument("--no-resume", action="store_true", help="Timpa output alih-alih melanjutkan")
+    parser.add_argument("--progress-interval", type=float, default=10.0, help="Interval laporan progres (detik)")
+    args = parser.parse_args(argv)
+    if bool(args.source) == bool(args.reparse):
+        parser.error("berikan tepat satu dari: source atau --reparse")
+    if args.reparse and args.output.resolve() == args.reparse.resolve():
+        # Output dibuka (dan bisa dipotong) sebelum input dibaca
+        parser.error("--output harus berbeda dari file --reparse")
+
+    writer = ResultWriter(args.output, resume=not args.no_resume)
+    progress = Progress(args.progress_interval)
+    scheduler = None
+    try:
+        if args.reparse:
+            reparse_archive(args.reparse, writer, progress)
+        else:
+            scheduler = _build_scheduler(args)
+            # Throughput dihitung setelah model siap agar waktu muat tidak ikut terhitung
+            progress = Progress(args.progress_interval)
+            transcribe_archive(iter_clips(args.source), scheduler, writer, progress,
+                               window=args.window, batch_size=args.batch_size)
+    except KeyboardInterrupt:
+        print("Dihentikan; jalankan ulang perintah yang sama untuk melanjutkan", file=sys.stderr)
+    finally:
+        writer.close()
+        if scheduler is not None:
+            scheduler.close()
+
+    summary = progress.summary()
+    if scheduler is not None:
+        summary["scheduler"] = scheduler.stats.summary()
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
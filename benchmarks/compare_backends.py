@@ -0,0 +1,136 @@
+"""Bandingkan varian backend Whisper: ukuran model x presisi.
+
+Setiap varian dijalankan di proses terpisah agar RSS dan waktu muat tidak
+saling memengaruhi. Contoh:
+    python -m benchmarks.compare_backends
+    python -m benchmarks.compare_backends --sizes tiny base --precisions fp32 int8 --threads 4
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.run_benchmarks import FIXTURES_DIR, bench_pipeline, load_json, percentiles
+
+SYNTHETIC_SECONDS = 5
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_synthetic(processor, model, repeat=3):
+    """Latensi generate untuk klip noise 5 detik jika fixture WAV belum tersedia"""
+    import asr
+
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(SYNTHETIC_SECONDS * asr.SAMPLE_RATE) * 0.01).astype(np.float32)
+    totals = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        asr.transcribe_batch(processor, model, [audio])
+        totals.append(time.perf_counter() - t0)
+    return {"clips": 0, "latency_ms": {"total": percentiles(totals)}, "accuracy": None}
+
+
+# === Dijalankan di proses anak untuk satu varian ===
+def run_variant(config_dict, fixtures_dir, repeat):
+    import asr
+
+    config = asr.WhisperBackendConfig(**config_dict)
+    rss_before = current_rss_mb()
+    t0 = time.perf_counter()
+    processor, model = asr.load_whisper_model(config)
+    load_seconds = time.perf_counter() - t0
+    rss_loaded = current_rss_mb()
+
+    manifest = load_json(fixtures_dir / "manifest.json")
+    result = bench_pipeline(manifest, fixtures_dir, repeat=repeat, processor=processor, model=model)
+    if "skipped" in result:
+        result = bench_synthetic(processor, model, repeat=repeat)
+
+    result.update({
+        "config": config.to_dict(),
+        "load_seconds": load_seconds,
+        "rss_model_mb": rss_loaded - rss_before,
+        "rss_peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+    return result
+
+
+def _variant_label(config):
+    return f"{config['model_size']}/{config['precision']}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bandingkan latensi, RSS, dan akurasi backend Whisper")
+    parser.add_argument("--sizes", nargs="+", default=["tiny", "base", "small"])
+    parser.add_argument("--precisions", nargs="+", default=["fp32", "int8", "bf16"])
+    parser.add_argument("--threads", type=int, help="Jumlah thread intra-op per varian")
+    parser.add_argument("--cores", help='Core yang dipakai, mis. "0-3"')
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="Simpan hasil sebagai JSON")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_variant(json.loads(args.worker), args.fixtures, args.repeat)))
+        return 0
+
+    import asr
+
+    results = []
+    for size in args.sizes:
+        for precision in args.precisions:
+            if precision == "bf16" and not asr.cpu_supports_bf16():
+                print(f"Lewati {size}/bf16: CPU tidak mendukung bf16", file=sys.stderr)
+                continue
+            config = asr.WhisperBackendConfig(
+                model_size=size,
+                precision=precision,
+                num_threads=args.threads,
+                cpu_cores=asr.parse_cores(args.cores) if args.cores else None,
+            ).to_dict()
+            print(f"Menjalankan {_variant_label(config)} ...", file=sys.stderr)
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.compare_backends", "--worker", json.dumps(config),
+                 "--fixtures", str(args.fixtures), "--repeat", str(args.repeat)],
+                capture_output=True, text=True,
+            )
+            if completed.returncode != 0:
+                results.append({"config": config, "error": completed.stderr.strip().splitlines()[-1:]})
+                continue
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    print(f"{'varian':14s} {'muat(s)':>8s} {'RSS(MB)':>8s} {'p50(ms)':>9s} {'p95(ms)':>9s} {'akurasi':>8s}")
+    for result in results:
+        label = _variant_label(result["config"])
+        if "error" in result:
+            print(f"{label:14s} gagal: {result['error']}")
+            continue
+        total = result["latency_ms"]["total"]
+        accuracy = result["accuracy"]["quantity_accuracy"] if result["accuracy"] else float("nan")
+        print(f"{label:14s} {result['load_seconds']:8.1f} {result['rss_model_mb']:8.0f} "
+              f"{total['p50']:9.1f} {total['p95']:9.1f} {accuracy:8.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""Buat rekaman WAV sintetis (TTS) untuk setiap entri `benchmarks/fixtures/manifest.json`.
+
+Fixture hasil skrip ini sudah ikut di repository; skrip hanya perlu
+dijalankan ulang setelah manifest berubah. Teks di kolom `text` diucapkan
+dengan espeak-ng (suara Indonesia untuk file berawalan `id_`, Inggris untuk
+`en_`) lewat executable `espeak-ng` atau, jika tidak ada, library dari paket
+pip `espeakng-loader`. Hasilnya diubah ke WAV PCM 16-bit mono 16kHz,
+dan secara opsional diberi noise latar pada SNR tertentu agar mendekati
+kondisi lane. Rekaman sintetis cukup untuk membandingkan latensi dan regresi
+antar-backend; untuk akurasi, ganti dengan rekaman lane sungguhan bernama
+sama.
+
+Contoh:
+    python -m benchmarks.generate_fixtures
+    python -m benchmarks.generate_fixtures --snr-db 15 --force
+"""
+import argparse
+import ctypes
+import shutil
+import subprocess
+import sys
+import tempfile
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from audio_io import SAMPLE_RATE, array_to_wav_bytes, pcm16_to_float
+from benchmarks.run_benchmarks import FIXTURES_DIR, load_json
+
+VOICES = {"id": "id", "en": "en-us"}
+TTS_ENGINES = ("espeak-ng", "espeak")
+
+
+def find_engine(preferred=None):
+    """Path executable TTS yang tersedia, atau None"""
+    for name in (preferred,) if preferred else TTS_ENGINES:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+# === espeak-ng sebagai library (paket pip `espeakng-loader`, tanpa paket sistem) ===
+_AUDIO_OUTPUT_SYNCHRONOUS = 2
+_POS_CHARACTER = 1
+_CHARS_UTF8 = 1
+_RATE_PARAMETER = 1
+_SYNTH_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int, ctypes.c_void_p)
+
+
+class LibrarySynthesizer:
+    """Panggil libespeak-ng langsung lewat ctypes; satu instance per proses"""
+
+    def __init__(self):
+        import espeakng_loader
+
+        self._lib = ctypes.CDLL(espeakng_loader.get_library_path())
+        data_parent = str(Path(espeakng_loader.get_data_path()).parent).encode()
+        self.sample_rate = self._lib.espeak_Initialize(_AUDIO_OUTPUT_SYNCHRONOUS, 0, data_parent, 0)
+        if self.sample_rate <= 0:
+            raise RuntimeError("libespeak-ng gagal diinisialisasi")
+        self._chunks = []
+
+        def collect(wav, num_samples, events):
+            if num_samples > 0:
+                self._chunks.append(np.ctypeslib.as_array(wav, shape=(num_samples,)).copy())
+            return 0
+
+        # Referensi callback disimpan agar tidak dibersihkan garbage collector
+        self._callback = _SYNTH_CALLBACK(collect)
+        self._lib.espeak_SetSynthCallback(self._callback)
+
+    def __call__(self, text, voice, words_per_minute=150):
+        if self._lib.espeak_SetVoiceByName(voice.encode()) != 0:
+            raise ValueError(f"Suara espeak-ng tidak tersedia: {voice}")
+        self._lib.espeak_SetParameter(_RATE_PARAMETER, words_per_minute, 0)
+        self._chunks = []
+        encoded = text.encode("utf-8") + b"\0"
+        self._lib.espeak_Synth(encoded, ctypes.c_size_t(len(encoded)), 0, _POS_CHARACTER, 0, _CHARS_UTF8, None, None)
+        self._lib.espeak_Synchronize()
+        pcm = np.concatenate(self._chunks) if self._chunks else np.zeros(0, dtype=np.int16)
+        return pcm.astype(np.float32) / 32768.0, self.sample_rate
+
+
+def make_synthesizer(preferred=None, words_per_minute=150):
+    """Fungsi (teks, suara) -> (sampel, sampling rate), atau None jika espeak-ng tidak tersedia"""
+    engine = find_engine(preferred)
+    if engine is not None:
+        return lambda text, voice: synthesize(engine, text, voice, words_per_minute)
+    if preferred is None:
+        try:
+            library = LibrarySynthesizer()
+        except (ImportError, OSError, RuntimeError):
+            return None
+        return lambda text, voice: library(text, voice, words_per_minute)
+    return None
+
+
+def voice_for(filename):
+    """Pilih suara dari awalan nama file (`id_...` / `en_...`)"""
+    return VOICES.get(filename.split("_", 1)[0], VOICES["id"])
+
+
+def synthesize(engine, text, voice, words_per_minute=150):
+    """Ucapkan `text` dengan espeak; hasilnya (array float32 mono, sampling rate)"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        wav_path = Path(temp_dir) / "tts.wav"
+        subprocess.run([engine, "-v", voice, "-s", str(words_per_minute), "-w", str(wav_path), text],
+                       check=True, capture_output=True)
+        with wave.open(str(wav_path), "rb") as wav_file:
+            sample_rate = wav_file.getframerate()
+            samples = pcm16_to_float(wav_file.readframes(wav_file.getnframes()))
+    return samples, sample_rate
+
+
+def to_sample_rate(samples, orig_rate, target_rate=SAMPLE_RATE):
+    """Resample linear dengan NumPy; cukup untuk TTS dan tidak butuh torchaudio"""
+    if orig_rate == target_rate or not len(samples):
+        return samples.astype(np.float32)
+    duration = len(samples) / orig_rate
+    target_times = np.arange(int(round(duration * target_rate))) / target_rate
+    return np.interp(target_times, np.arange(len(samples)) / orig_rate, samples).astype(np.float32)
+
+
+def add_noise(samples, snr_db, rng):
+    """Tambahkan noise putih pada SNR `snr_db` relatif terhadap daya ucapan"""
+    signal_power = float(np.mean(samples ** 2)) or 1e-8
+    noise = rng.normal(0.0, np.sqrt(signal_power / 10 ** (snr_db / 10)), len(samples))
+    return (samples + noise).astype(np.float32)
+
+
+def pad_silence(samples, lead_ms=300, tail_ms=500, sample_rate=SAMPLE_RATE):
+    """Sisipkan hening di awal dan akhir seperti rekaman yang dipotong VAD dengan pre-roll"""
+    lead = np.zeros(sample_rate * lead_ms // 1000, dtype=np.float32)
+    tail = np.zeros(sample_rate * tail_ms // 1000, dtype=np.float32)
+    return np.concatenate([lead, samples, tail])
+
+
+def generate(manifest, fixtures_dir, synthesize_fn, snr_db=None, force=False, seed=0):
+    """Tulis satu WAV per entri manifest; file yang sudah ada dilewati kecuali `force`"""
+    rng = np.random.default_rng(seed)
+    written, skipped = [], []
+    for entry in manifest:
+        target = fixtures_dir / entry["file"]
+        if target.exists() and not force:
+            skipped.append(entry["file"])
+            continue
+        samples, sample_rate = synthesize_fn(entry["text"], voice_for(entry["file"]))
+        audio = pad_silence(to_sample_rate(samples, sample_rate))
+        if snr_db is not None:
+            audio = add_noise(audio, snr_db, rng)
+        peak = float(np.max(np.abs(audio))) if len(audio) else 0.0
+        if peak > 0.95:
+            audio = audio * (0.95 / peak)
+        target.write_bytes(array_to_wav_bytes(audio, SAMPLE_RATE))
+        written.append(entry["file"])
+    return written, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Buat fixture WAV sintetis dari manifest benchmark")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, type=Path)
+    parser.add_argument("--engine", help=f"Executable TTS (default: {' atau '.join(TTS_ENGINES)})")
+    parser.add_argument("--wpm", type=int, default=150, help="Kecepatan bicara (kata per menit)")
+    parser.add_argument("--snr-db", type=float, help="Tambahkan noise putih pada SNR ini (mis. 15)")
+    parser.add_argument("--force", action="store_true", help="Timpa WAV yang sudah ada")
+    args = parser.parse_args(argv)
+
+    synthesize_fn = make_synthesizer(args.engine, args.wpm)
+    if synthesize_fn is None:
+        print("espeak-ng tidak ditemukan; pasang `apt install espeak-ng` atau `pip install espeakng-loader`",
+              file=sys.stderr)
+        return 1
+
+    written, skipped = generate(
+        load_json(args.fixtures / "manifest.json"), args.fixtures, synthesize_fn,
+        snr_db=args.snr_db, force=args.force,
+    )
+    for name in written:
+        print(f"ditulis  {args.fixtures / name}")
+    for name in skipped:
+        print(f"dilewati {args.fixtures / name} (sudah ada; pakai --force untuk menimpa)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""Benchmark offline untuk parser pesanan dan pipeline pengenalan suara.
+
+Contoh:
+    python -m benchmarks.run_benchmarks --parser-only
+    python -m benchmarks.run_benchmarks --output hasil.json --compare baseline.json
+"""
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from catalog import process_order_text
+
+BENCH_DIR = Path(__file__).resolve().parent
+CORPUS_PATH = BENCH_DIR / "corpus.json"
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+
+
+def percentiles(samples):
+    """p50/p95/p99 dalam milidetik dari daftar durasi dalam detik"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+
+    def pick(pct):
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] * 1000
+
+    return {"p50": pick(50), "p95": pick(95), "p99": pick(99)}
+
+
+def score_items(expected, actual):
+    """Hitung kecocokan item dan jumlah untuk satu ucapan"""
+    expected_items = set(expected)
+    actual_items = set(actual)
+    return {
+        "true_positive": len(expected_items & actual_items),
+        "false_positive": len(actual_items - expected_items),
+        "false_negative": len(expected_items - actual_items),
+        "items_exact": expected_items == actual_items,
+        "order_exact": expected == actual,
+    }
+
+
+def summarize_accuracy(scores):
+    tp = sum(s["true_positive"] for s in scores)
+    fp = sum(s["false_positive"] for s in scores)
+    fn = sum(s["false_negative"] for s in scores)
+    count = len(scores) or 1
+    return {
+        "utterances": len(scores),
+        "item_precision": tp / (tp + fp) if tp + fp else 1.0,
+        "item_recall": tp / (tp + fn) if tp + fn else 1.0,
+        "item_accuracy": sum(s["items_exact"] for s in scores) / count,
+        "quantity_accuracy": sum(s["order_exact"] for s in scores) / count,
+    }
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# === Benchmark parser teks ===
+def bench_parser(corpus, repeat=200):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for entry in corpus:
+            t0 = time.perf_counter()
+            process_order_text(entry["text"])
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    scores = []
+    failures = []
+    for entry in corpus:
+        actual = process_order_text(entry["text"])
+        score = score_items(entry["expected"], actual)
+        scores.append(score)
+        if not score["order_exact"]:
+            failures.append({"id": entry["id"], "text": entry["text"], "expected": entry["expected"], "actual": actual})
+
+    return {
+        "parses_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": percentiles(latencies),
+        "accuracy": summarize_accuracy(scores),
+        "failures": failures,
+    }
+
+
+# === Benchmark pipeline audio end-to-end per tahap ===
+def bench_pipeline(manifest, fixtures_dir, repeat=3, processor=None, model=None, decoding=None):
+    available = [entry for entry in manifest if (fixtures_dir / entry["file"]).exists()]
+    missing = [entry["file"] for entry in manifest if entry not in available]
+    if not available:
+        return {"skipped": "tidak ada file WAV di fixtures", "missing": missing}
+
+    import asr
+    from audio_io import load_wav
+
+    if processor is None or model is None:
+        processor, model = asr.load_whisper_model()
+    decoding_profile = None
+    if decoding == "drive-thru":
+        from decoding import DriveThruDecodingProfile
+        decoding_profile = DriveThruDecodingProfile.from_env(processor)
+    generated_tokens = []
+    stages = {name: [] for name in ("load_audio", "features", "generate", "decode", "parse", "total")}
+    scores = []
+    failures = []
+
+    for run in range(repeat):
+        for entry in available:
+            t0 = time.perf_counter()
+            audio = load_wav(fixtures_dir / entry["file"])
+            t1 = time.perf_counter()
+            features = asr.extract_features(processor, audio)
+            t2 = time.perf_counter()
+            generate_kwargs = decoding_profile.generate_kwargs(len(audio), model) if decoding_profile else {}
+            generated_ids = asr.generate_ids(model, features, **generate_kwargs)
+            t3 = time.perf_counter()
+            transcription = asr.decode_ids(processor, generated_ids)[0]
+            t4 = time.perf_counter()
+            actual = process_order_text(transcription)
+            t5 = time.perf_counter()
+
+            for name, duration in zip(stages, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4, t5 - t0)):
+                stages[name].append(duration)
+
+            # Akurasi cukup dihitung pada putaran pertama; putaran lain hanya untuk latensi
+            if run == 0:
+                generated_tokens.append(generated_ids.shape[-1])
+                score = score_items(entry["expected"], actual)
+                scores.append(score)
+                if not score["order_exact"]:
+                    failures.append({"file": entry["file"], "transcription": transcription, "expected": entry["expected"], "actual": actual})
+
+    return {
+        "clips": len(available),
+        "missing": missing,
+        "decoding": decoding or "default",
+        "latency_ms": {name: percentiles(samples) for name, samples in stages.items()},
+        "avg_generated_tokens": sum(generated_tokens) / len(generated_tokens),
+        "accuracy": summarize_accuracy(scores),
+        "failures": failures,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _flatten(data, prefix=""):
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+# === Bandingkan hasil dengan baseline dari commit lain ===
+def compare_results(current, baseline):
+    """Kembalikan daftar (metrik, baseline, sekarang, perubahan %) untuk metrik numerik"""
+    rows = []
+    now = _flatten(current)
+    before = _flatten(baseline)
+    for name in sorted(now.keys() & before.keys()):
+        if name.startswith("meta."):
+            continue
+        old, new = before[name], now[name]
+        change = (new - old) / old * 100 if old else 0.0
+        rows.append((name, old, new, change))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark parser dan pipeline suara Mc Ronald Drive-Thru")
+    parser.add_argument("--corpus", default=CORPUS_PATH, type=Path)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, type=Path)
+    parser.add_argument("--parser-only", action="store_true", help="Lewati benchmark audio/Whisper")
+    parser.add_argument("--repeat", type=int, default=200, help="Pengulangan corpus untuk benchmark parser")
+    parser.add_argument("--pipeline-repeat", type=int, default=3)
+    parser.add_argument("--decoding", choices=["default", "drive-thru"], default="drive-thru",
+                        help="Profil decoding Whisper yang diukur")
+    parser.add_argument("--output", type=Path, help="Simpan hasil sebagai JSON")
+    parser.add_argument("--compare", type=Path, help="File JSON hasil sebelumnya untuk dibandingkan")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "parser": bench_parser(load_json(args.corpus), repeat=args.repeat),
+    }
+    if not args.parser_only:
+        manifest = load_json(args.fixtures / "manifest.json")
+        results["pipeline"] = bench_pipeline(manifest, args.fixtures, repeat=args.pipeline_repeat, decoding=args.decoding)
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        print(f"\n=== Perbandingan dengan {args.compare} ===")
+        for name, old, new, change in compare_results(results, load_json(args.compare)):
+            print(f"{name:55s} {old:14.4f} -> {new:14.4f} ({change:+.1f}%)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
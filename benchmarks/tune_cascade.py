@@ -0,0 +1,148 @@
+"""Tuning ambang cascade (model kecil -> besar) terhadap akurasi pada fixture lokal.
+
+Setiap klip di `benchmarks/fixtures` ditranskripsi sekali oleh tier cepat dan
+sekali oleh tier akurat. Setelah itu semua kombinasi ambang disimulasikan
+tanpa inferensi ulang: porsi ucapan yang selesai di tier cepat, akurasi
+pesanan, dan latensi rata-rata dibandingkan dengan selalu memakai tier akurat.
+
+Contoh:
+    python -m benchmarks.tune_cascade --fast tiny --accurate small
+    python -m benchmarks.tune_cascade --cache hasil_tier.json --max-accuracy-drop 0.02
+"""
+import argparse
+import functools
+import json
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.run_benchmarks import FIXTURES_DIR, load_json
+from cascade import escalation_reason
+from catalog import process_order_text
+
+DEFAULT_LOGPROB_GRID = (-1.5, -1.0, -0.8, -0.6, -0.5, -0.4, -0.3, -0.2)
+DEFAULT_CONFIDENCE_GRID = (0.0, 0.5, 0.6, 0.75, 0.9, 1.0)
+
+
+# === Jalankan kedua tier sekali per klip ===
+def run_tiers(manifest, fixtures_dir, fast_size, accurate_size, decoding="drive-thru"):
+    import asr
+    from audio_io import load_wav
+
+    available = [entry for entry in manifest if (fixtures_dir / entry["file"]).exists()]
+    tiers = {}
+    for tier, size, base_fn in (("fast", fast_size, asr.transcribe_batch_scored),
+                                ("accurate", accurate_size, asr.transcribe_batch)):
+        config = asr.WhisperBackendConfig.from_env()
+        config.model_size = size
+        processor, model = asr.load_whisper_model(config)
+        transcribe_fn = base_fn
+        if decoding == "drive-thru":
+            from decoding import DriveThruDecodingProfile
+            transcribe_fn = functools.partial(base_fn, decoding_profile=DriveThruDecodingProfile.from_env(processor))
+        tiers[tier] = (processor, model, transcribe_fn)
+
+    clips = []
+    for entry in available:
+        audio = load_wav(fixtures_dir / entry["file"])
+        clip = {"file": entry["file"], "expected": entry["expected"]}
+        for tier, (processor, model, transcribe_fn) in tiers.items():
+            started = time.perf_counter()
+            output = transcribe_fn(processor, model, [audio])[0]
+            clip[f"{tier}_seconds"] = time.perf_counter() - started
+            if tier == "fast":
+                clip["fast_text"], clip["fast_logprob"] = output
+            else:
+                clip["accurate_text"] = output
+        clips.append(clip)
+    return clips
+
+
+# === Simulasi ambang tanpa inferensi ulang ===
+def simulate(clips, min_logprob, min_parse_confidence):
+    correct = fast_resolved = 0
+    total_seconds = 0.0
+    for clip in clips:
+        reason = escalation_reason(clip["fast_text"], clip["fast_logprob"], min_logprob, min_parse_confidence)
+        total_seconds += clip["fast_seconds"]
+        if reason is None:
+            fast_resolved += 1
+            text = clip["fast_text"]
+        else:
+            total_seconds += clip["accurate_seconds"]
+            text = clip["accurate_text"]
+        correct += process_order_text(text) == clip["expected"]
+    count = len(clips) or 1
+    return {
+        "min_logprob": min_logprob,
+        "min_parse_confidence": min_parse_confidence,
+        "fast_rate": fast_resolved / count,
+        "order_accuracy": correct / count,
+        "avg_latency_ms": total_seconds / count * 1000,
+    }
+
+
+def baseline(clips, tier):
+    count = len(clips) or 1
+    return {
+        "order_accuracy": sum(process_order_text(c[f"{tier}_text"]) == c["expected"] for c in clips) / count,
+        "avg_latency_ms": sum(c[f"{tier}_seconds"] for c in clips) / count * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tuning ambang cascade Whisper kecil -> besar")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, type=Path)
+    parser.add_argument("--fast", default="tiny", help="Ukuran model tier cepat")
+    parser.add_argument("--accurate", default="small", help="Ukuran model tier akurat")
+    parser.add_argument("--decoding", choices=["default", "drive-thru"], default="drive-thru")
+    parser.add_argument("--cache", type=Path, help="Simpan/baca hasil per klip agar tuning ulang tidak memuat model")
+    parser.add_argument("--logprob-grid", type=float, nargs="+", default=DEFAULT_LOGPROB_GRID)
+    parser.add_argument("--confidence-grid", type=float, nargs="+", default=DEFAULT_CONFIDENCE_GRID)
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.0,
+                        help="Penurunan akurasi maksimum terhadap tier akurat saja untuk rekomendasi")
+    parser.add_argument("--output", type=Path, help="Simpan hasil sebagai JSON")
+    args = parser.parse_args(argv)
+
+    if args.cache and args.cache.exists():
+        clips = load_json(args.cache)
+    else:
+        clips = run_tiers(load_json(args.fixtures / "manifest.json"), args.fixtures, args.fast, args.accurate,
+                          args.decoding)
+        if args.cache:
+            with open(args.cache, "w", encoding="utf-8") as f:
+                json.dump(clips, f, indent=2, ensure_ascii=False)
+    if not clips:
+        print("Tidak ada rekaman WAV di fixtures; lihat benchmarks/fixtures/README.md", file=sys.stderr)
+        return 1
+
+    accurate_only = baseline(clips, "accurate")
+    grid = [simulate(clips, lp, conf) for lp in args.logprob_grid for conf in args.confidence_grid]
+    eligible = [row for row in grid if row["order_accuracy"] >= accurate_only["order_accuracy"] - args.max_accuracy_drop]
+    recommended = max(eligible, key=lambda row: (row["fast_rate"], -row["avg_latency_ms"]), default=None)
+
+    print(f"{'logprob':>8} {'parse':>6} {'tier cepat':>10} {'akurasi':>8} {'latensi ms':>11}")
+    for row in grid:
+        print(f"{row['min_logprob']:8.2f} {row['min_parse_confidence']:6.2f} {row['fast_rate']:10.1%} "
+              f"{row['order_accuracy']:8.1%} {row['avg_latency_ms']:11.1f}")
+    results = {
+        "clips": len(clips),
+        "fast_only": baseline(clips, "fast"),
+        "accurate_only": accurate_only,
+        "recommended": recommended,
+        "grid": grid,
+    }
+    print(json.dumps({key: results[key] for key in ("clips", "fast_only", "accurate_only", "recommended")},
+                     indent=2, ensure_ascii=False))
+    if recommended:
+        print(f"\nASR_CASCADE_MIN_LOGPROB={recommended['min_logprob']} "
+              f"ASR_CASCADE_MIN_PARSE_CONFIDENCE={recommended['min_parse_confidence']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
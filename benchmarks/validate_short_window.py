@@ -0,0 +1,165 @@
+"""Validasi mode ucapan pendek (jendela encoder dipotong) terhadap baseline padding 30 detik.
+
+Setiap klip ditranskripsi dua kali dengan model yang sama: sekali dengan
+padding penuh dan sekali dengan `ShortUtteranceEncoder`. Hasilnya dibandingkan
+per klip (transkrip identik, WER terhadap baseline, hasil parsing sama) dan
+secara agregat (akurasi pesanan jika ada label, latensi, speedup). Exit code 1
+jika mode pendek menurunkan kualitas melebihi batas, sehingga bisa dipakai
+sebelum menyalakan `WHISPER_SHORT_WINDOW=1`.
+
+Contoh:
+    python -m benchmarks.validate_short_window
+    python -m benchmarks.validate_short_window --source rekaman/ --max-seconds 8 --output validasi.json
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from batch_transcribe import iter_clips
+from benchmarks.run_benchmarks import FIXTURES_DIR, percentiles
+from catalog import process_order_text
+
+
+def word_error_rate(reference, hypothesis):
+    """WER hipotesis terhadap referensi (jarak edit tingkat kata / jumlah kata referensi)"""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(ref) if ref else float(bool(hyp))
+
+
+def _timed(transcribe_fn, audio, repeat):
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = transcribe_fn(audio)
+        durations.append(time.perf_counter() - started)
+    return text, sorted(durations)[len(durations) // 2]
+
+
+def validate(clips, processor, model, short_encoder, decoding_profile=None, repeat=3):
+    import asr
+    from audio_io import load_wav
+
+    def padded(audio):
+        return asr.transcribe_batch(processor, model, [audio], decoding_profile=decoding_profile)[0]
+
+    def short(audio):
+        return asr.transcribe_batch(processor, model, [audio], decoding_profile=decoding_profile,
+                                    short_encoder=short_encoder)[0]
+
+    # Satu generate per mode sebelum diukur agar inisialisasi kernel tidak masuk latensi
+    warmup = load_wav(clips[0]["file"])
+    padded(warmup)
+    short(warmup)
+
+    rows = []
+    for clip in clips:
+        audio = load_wav(clip["file"])
+        baseline_text, baseline_seconds = _timed(padded, audio, repeat)
+        short_text, short_seconds = _timed(short, audio, repeat)
+        baseline_items = process_order_text(baseline_text)
+        short_items = process_order_text(short_text)
+        row = {
+            "file": clip["file"],
+            "duration_s": round(len(audio) / asr.SAMPLE_RATE, 3),
+            "window_s": short_encoder.window_seconds(len(audio)),
+            "baseline_text": baseline_text,
+            "short_text": short_text,
+            "transcript_match": baseline_text.strip().lower() == short_text.strip().lower(),
+            "wer_vs_baseline": word_error_rate(baseline_text, short_text),
+            "parse_match": baseline_items == short_items,
+            "baseline_seconds": baseline_seconds,
+            "short_seconds": short_seconds,
+        }
+        if "expected" in clip:
+            row["baseline_exact"] = baseline_items == clip["expected"]
+            row["short_exact"] = short_items == clip["expected"]
+        rows.append(row)
+    return rows
+
+
+def summarize(rows):
+    count = len(rows) or 1
+    baseline_seconds = [row["baseline_seconds"] for row in rows]
+    short_seconds = [row["short_seconds"] for row in rows]
+    summary = {
+        "clips": len(rows),
+        "short_window_clips": sum(row["window_s"] is not None for row in rows),
+        "fallback_clips": sum(row["window_s"] is None for row in rows),
+        "transcript_match_rate": sum(row["transcript_match"] for row in rows) / count,
+        "avg_wer_vs_baseline": sum(row["wer_vs_baseline"] for row in rows) / count,
+        "parse_agreement": sum(row["parse_match"] for row in rows) / count,
+        "baseline_latency_ms": percentiles(baseline_seconds),
+        "short_latency_ms": percentiles(short_seconds),
+        "speedup": sum(baseline_seconds) / sum(short_seconds) if sum(short_seconds) else 0.0,
+    }
+    labeled = [row for row in rows if "short_exact" in row]
+    if labeled:
+        summary["baseline_order_accuracy"] = sum(row["baseline_exact"] for row in labeled) / len(labeled)
+        summary["short_order_accuracy"] = sum(row["short_exact"] for row in labeled) / len(labeled)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bandingkan mode ucapan pendek Whisper dengan baseline padding penuh")
+    parser.add_argument("--source", type=Path, default=FIXTURES_DIR / "manifest.json",
+                        help="Folder WAV atau manifest (default: fixture benchmark)")
+    parser.add_argument("--max-seconds", type=float, default=10.0,
+                        help="Klip lebih panjang dari ini memakai padding penuh (WHISPER_SHORT_WINDOW_MAX_SECONDS)")
+    parser.add_argument("--decoding", choices=["default", "drive-thru"], default="drive-thru")
+    parser.add_argument("--repeat", type=int, default=3, help="Pengulangan per klip; latensi diambil median")
+    parser.add_argument("--min-parse-agreement", type=float, default=1.0,
+                        help="Porsi klip minimum yang hasil parsingnya sama dengan baseline")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.0,
+                        help="Penurunan akurasi pesanan maksimum terhadap baseline (butuh label expected)")
+    parser.add_argument("--output", type=Path, help="Simpan ringkasan dan hasil per klip sebagai JSON")
+    args = parser.parse_args(argv)
+
+    clips = [clip for clip in iter_clips(args.source) if Path(clip["file"]).exists()]
+    if not clips:
+        print(f"Tidak ada rekaman WAV di {args.source}; lihat benchmarks/fixtures/README.md", file=sys.stderr)
+        return 1
+
+    import asr
+
+    processor, model = asr.load_whisper_model()
+    decoding_profile = None
+    if args.decoding == "drive-thru":
+        from decoding import DriveThruDecodingProfile
+        decoding_profile = DriveThruDecodingProfile.from_env(processor)
+    short_encoder = asr.ShortUtteranceEncoder(model, max_seconds=args.max_seconds)
+
+    rows = validate(clips, processor, model, short_encoder, decoding_profile, repeat=args.repeat)
+    summary = summarize(rows)
+    failures = []
+    if summary["parse_agreement"] < args.min_parse_agreement:
+        failures.append(f"parse_agreement {summary['parse_agreement']:.2%} < {args.min_parse_agreement:.2%}")
+    if "short_order_accuracy" in summary:
+        drop = summary["baseline_order_accuracy"] - summary["short_order_accuracy"]
+        if drop > args.max_accuracy_drop:
+            failures.append(f"akurasi pesanan turun {drop:.2%} (batas {args.max_accuracy_drop:.2%})")
+    summary["passed"] = not failures
+
+    for row in rows:
+        if not row["parse_match"]:
+            print(f"BEDA {row['file']}: '{row['baseline_text']}' -> '{row['short_text']}'", file=sys.stderr)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if failures:
+        print("Mode ucapan pendek TIDAK lolos: " + "; ".join(failures), file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "clips": rows}, f, indent=2, ensure_ascii=False)
+    return 0 if summary["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,403 @@
+"""Capture audio yang selalu aktif per lane: ring buffer, VAD, dan kalibrasi noise berkelanjutan.
+
+Contoh:
+    python capture.py --file rekaman.wav
+    python capture.py --mic --lane-url http://127.0.0.1:8765/lanes/lane1
+"""
+import argparse
+import math
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+import metrics
+from audio_io import SAMPLE_RATE, array_to_wav_bytes, load_wav, pcm16_to_float
+
+
+class NoSpeechTimeout(TimeoutError):
+    """Tidak ada ucapan yang dimulai dalam batas waktu"""
+
+
+# === Sumber audio: mikrofon sungguhan atau file untuk pengujian ===
+class MicrophoneSource:
+    """Frame float32 dari mikrofon yang dibuka sekali dan tetap terbuka"""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=30, device_index=None):
+        import speech_recognition as sr
+
+        self.sample_rate = sample_rate
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self._microphone = sr.Microphone(device_index=device_index, sample_rate=sample_rate, chunk_size=self.frame_samples)
+        self._source = None
+
+    def read(self):
+        if self._source is None:
+            self._source = self._microphone.__enter__()
+        return pcm16_to_float(self._source.stream.read(self.frame_samples))
+
+    def close(self):
+        if self._source is not None:
+            self._microphone.__exit__(None, None, None)
+            self._source = None
+
+
+class FileSource:
+    """Frame float32 dari file WAV atau array; `None` setelah audio habis.
+
+    `realtime=True` menunggu sepanjang durasi frame agar perilakunya sama
+    dengan mikrofon; `trailing_silence_ms` menambahkan hening di akhir agar
+    ucapan terakhir ditutup oleh VAD.
+    """
+
+    def __init__(self, audio, sample_rate=SAMPLE_RATE, frame_ms=30, realtime=False, trailing_silence_ms=1000):
+        if not isinstance(audio, np.ndarray):
+            audio = load_wav(audio, sample_rate)
+        self.sample_rate = sample_rate
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        silence = np.zeros(int(sample_rate * trailing_silence_ms / 1000), dtype=np.float32)
+        self._audio = np.concatenate([audio.astype(np.float32, copy=False), silence])
+        self._position = 0
+        self.realtime = realtime
+
+    def read(self):
+        if self._position >= len(self._audio):
+            return None
+        frame = self._audio[self._position:self._position + self.frame_samples]
+        self._position += len(frame)
+        if self.realtime:
+            time.sleep(len(frame) / self.sample_rate)
+        return frame
+
+    def close(self):
+        pass
+
+
+# === Ring buffer sampel dengan indeks absolut ===
+class RingBuffer:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self.total_written = 0
+
+    def write(self, samples):
+        samples = samples[-self.capacity:]
+        start = self.total_written % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:len(samples) - first] = samples[first:]
+        self.total_written += len(samples)
+
+    def read(self, start, end):
+        """Sampel berindeks absolut [start, end); bagian yang sudah tertimpa dibuang"""
+        start = max(start, self.total_written - self.capacity, 0)
+        end = min(end, self.total_written)
+        if end <= start:
+            return np.zeros(0, dtype=np.float32)
+        first, last = start % self.capacity, end % self.capacity
+        if first < last:
+            return self._data[first:last].copy()
+        return np.concatenate([self._data[first:], self._data[:last]])
+
+
+def frame_energy_db(frame):
+    rms = math.sqrt(float(np.dot(frame, frame)) / len(frame)) if len(frame) else 0.0
+    return 20 * math.log10(rms + 1e-10)
+
+
+# === VAD energi dengan noise floor yang terus diperbarui ===
+class NoiseFloorVAD:
+    """Deteksi awal/akhir ucapan relatif terhadap noise floor.
+
+    Noise floor hanya diperbarui pada frame non-ucapan: turun cepat saat
+    suasana menjadi lebih tenang dan naik perlahan saat bising, sehingga
+    kalibrasi berjalan terus tanpa jeda `adjust_for_ambient_noise`.
+    """
+
+    def __init__(self, frame_ms=30, start_db=10.0, end_db=6.0, start_ms=90, hangover_ms=600,
+                 min_speech_ms=200, max_utterance_ms=10000, floor_rise=0.02, floor_fall=0.2, min_floor_db=-90.0):
+        self.start_db = start_db
+        self.end_db = end_db
+        self.start_frames = max(1, round(start_ms / frame_ms))
+        self.hangover_frames = max(1, round(hangover_ms / frame_ms))
+        self.min_speech_frames = max(1, round(min_speech_ms / frame_ms))
+        self.max_frames = max(1, round(max_utterance_ms / frame_ms))
+        self.floor_rise = floor_rise
+        self.floor_fall = floor_fall
+        self.min_floor_db = min_floor_db
+        self.noise_floor_db = None
+        self.in_speech = False
+        self.confirmed = False
+        self.frames_in_utterance = 0
+        self._loud_run = 0
+        self._silent_run = 0
+        self._voiced_frames = 0
+        self._min_energy_db = min_floor_db
+
+    @classmethod
+    def from_env(cls, frame_ms=30):
+        return cls(
+            frame_ms=frame_ms,
+            start_db=float(os.environ.get("CAPTURE_VAD_START_DB", 10)),
+            hangover_ms=float(os.environ.get("CAPTURE_VAD_HANGOVER_MS", 600)),
+            max_utterance_ms=float(os.environ.get("CAPTURE_MAX_UTTERANCE_MS", 10000)),
+        )
+
+    def update(self, energy_db):
+        """Proses energi satu frame; kembalikan "start", "end", "discard", atau None.
+
+        "start" baru dikembalikan setelah ucapan mencapai `min_speech_ms`
+        sehingga bunyi pendek (klakson, ketukan) tidak pernah sampai ke
+        pendengar dan hanya dilaporkan sebagai "discard".
+        """
+        energy_db = max(energy_db, self.min_floor_db)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = energy_db
+
+        if not self.in_speech:
+            if energy_db <= self.noise_floor_db + self.start_db:
+                self._loud_run = 0
+                rate = self.floor_fall if energy_db < self.noise_floor_db else self.floor_rise
+                self.noise_floor_db += rate * (energy_db - self.noise_floor_db)
+                return None
+            self._loud_run += 1
+            if self._loud_run < self.start_frames:
+                return None
+            self.in_speech = True
+            self.confirmed = False
+            self.frames_in_utterance = self._voiced_frames = self._loud_run
+            self._min_energy_db = energy_db
+            self._silent_run = 0
+            self._loud_run = 0
+        else:
+            self.frames_in_utterance += 1
+            self._min_energy_db = min(self._min_energy_db, energy_db)
+            if energy_db > self.noise_floor_db + self.end_db:
+                self._voiced_frames += 1
+                self._silent_run = 0
+            else:
+                self._silent_run += 1
+
+        if not self.confirmed and self._voiced_frames >= self.min_speech_frames:
+            self.confirmed = True
+            return "start"
+        if self._silent_run >= self.hangover_frames or self.frames_in_utterance >= self.max_frames:
+            self.in_speech = False
+            if self._silent_run < self.hangover_frames:
+                # Terpotong panjang maksimum tanpa jeda: kemungkinan bising latar naik permanen,
+                # jadi noise floor dinaikkan ke frame tersenyap agar VAD tidak terus terpicu
+                self.noise_floor_db = max(self.noise_floor_db, self._min_energy_db)
+            return "end" if self.confirmed else "discard"
+        return None
+
+
+# === Layanan capture per lane ===
+class CaptureService:
+    """Baca sumber audio terus-menerus di thread latar belakang.
+
+    Setiap frame masuk ke ring buffer dan VAD. Saat ucapan dimulai, pendengar
+    (`utterance_chunks()`) menerima pre-roll `pre_roll_ms` sebelum awal ucapan
+    lalu frame live sampai VAD menutup ucapan; segmen utuh juga dikirim ke
+    `on_segment`. Tombol bicara tidak perlu lagi membuka mikrofon atau
+    mengkalibrasi noise.
+    """
+
+    def __init__(self, source, pre_roll_ms=None, vad=None, on_segment=None, name="audio-capture"):
+        self.source = source
+        self.sample_rate = source.sample_rate
+        self.frame_samples = source.frame_samples
+        frame_ms = 1000 * self.frame_samples / self.sample_rate
+        self.vad = vad or NoiseFloorVAD.from_env(frame_ms)
+        if pre_roll_ms is None:
+            pre_roll_ms = float(os.environ.get("CAPTURE_PRE_ROLL_MS", 300))
+        self.pre_roll_samples = int(self.sample_rate * pre_roll_ms / 1000)
+        capacity = self.pre_roll_samples + (self.vad.max_frames + 1) * self.frame_samples
+        self.buffer = RingBuffer(capacity)
+        self.on_segment = on_segment
+        self.segments_emitted = 0
+        self.segments_discarded = 0
+        self.last_error = None
+        self._speech_start = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2):
+        self._stop.set()
+        self._thread.join(timeout)
+        self.source.close()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    @property
+    def noise_floor_db(self):
+        return self.vad.noise_floor_db
+
+    def summary(self):
+        return {
+            "running": self.running,
+            "noise_floor_db": None if self.noise_floor_db is None else round(self.noise_floor_db, 1),
+            "in_speech": self.vad.in_speech,
+            "segments_emitted": self.segments_emitted,
+            "segments_discarded": self.segments_discarded,
+            "last_error": None if self.last_error is None else str(self.last_error),
+        }
+
+    def _publish(self, item):
+        # Dipanggil sambil memegang self._lock
+        for listener in self._listeners:
+            listener.put(item)
+
+    def process_frame(self, frame):
+        """Masukkan satu frame ke buffer dan VAD; dipanggil thread capture atau langsung dari pengujian"""
+        with self._lock:
+            self.buffer.write(frame)
+            event = self.vad.update(frame_energy_db(frame))
+            if event == "start":
+                # Awal ucapan dihitung dari frame pertama yang keras, lalu ditambah pre-roll
+                voiced_start = self.buffer.total_written - self.vad.frames_in_utterance * self.frame_samples
+                self._speech_start = max(0, voiced_start - self.pre_roll_samples)
+                self._publish(self.buffer.read(self._speech_start, self.buffer.total_written))
+                return None
+            if event == "discard":
+                self.segments_discarded += 1
+                return None
+            if self._speech_start is None:
+                return None
+            self._publish(frame)
+            if event is None:
+                return None
+            segment = self._close_utterance()
+        if segment is not None and self.on_segment is not None:
+            self.on_segment(segment)
+        return segment
+
+    def _close_utterance(self):
+        segment = self.buffer.read(self._speech_start, self.buffer.total_written)
+        self._speech_start = None
+        self._publish(None)
+        self.segments_emitted += 1
+        metrics.increment("capture_segments")
+        metrics.set_gauge("capture_noise_floor_db", round(self.vad.noise_floor_db, 1))
+        return segment
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                frame = self.source.read()
+                if frame is None:
+                    break
+                self.process_frame(frame)
+            with self._lock:
+                segment = self._close_utterance() if self._speech_start is not None else None
+            if segment is not None and self.on_segment is not None:
+                self.on_segment(segment)
+        except Exception as e:
+            self.last_error = e
+        finally:
+            with self._lock:
+                self._finished.set()
+                self._publish(StopIteration)
+
+    def utterance_chunks(self, timeout=10):
+        """Generator potongan audio ucapan berikutnya (pre-roll dulu, lalu live).
+
+        Melempar `NoSpeechTimeout` jika tidak ada ucapan dalam `timeout` detik
+        dan `RuntimeError` jika sumber audio berhenti karena error.
+        """
+        listener = queue.Queue()
+        with self._lock:
+            if self._finished.is_set():
+                if self.last_error is not None:
+                    raise RuntimeError(f"Capture audio berhenti: {self.last_error}")
+                raise NoSpeechTimeout("Sumber audio sudah berhenti")
+            if self._speech_start is not None:
+                # Ucapan sudah berjalan saat tombol ditekan: mulai dari pre-roll-nya
+                listener.put(self.buffer.read(self._speech_start, self.buffer.total_written))
+            self._listeners.append(listener)
+        try:
+            try:
+                item = listener.get(timeout=timeout)
+            except queue.Empty:
+                raise NoSpeechTimeout("Tidak ada ucapan dalam batas waktu")
+            if item is StopIteration:
+                raise NoSpeechTimeout("Sumber audio sudah berhenti")
+            while item is not None and item is not StopIteration:
+                yield item
+                item = listener.get()
+        finally:
+            with self._lock:
+                self._listeners.remove(listener)
+
+    def next_segment(self, timeout=10):
+        """Audio utuh ucapan berikutnya sebagai satu array float32"""
+        chunks = list(self.utterance_chunks(timeout))
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+
+def _post_segment(lane_url, segment, sample_rate):
+    request = urllib.request.Request(
+        lane_url.rstrip("/") + "/audio",
+        data=array_to_wav_bytes(segment, sample_rate),
+        headers={"Content-Type": "audio/wav"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request) as response:
+        return response.read().decode("utf-8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Capture audio selalu aktif dengan VAD untuk satu lane")
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument("--file", help="File WAV sebagai pengganti mikrofon")
+    source_group.add_argument("--mic", action="store_true", help="Pakai mikrofon")
+    parser.add_argument("--device-index", type=int, default=None)
+    parser.add_argument("--realtime", action="store_true", help="Putar file dengan kecepatan waktu nyata")
+    parser.add_argument("--pre-roll-ms", type=int, default=None, help="Default: CAPTURE_PRE_ROLL_MS atau 300")
+    parser.add_argument("--lane-url", help="Kirim setiap segmen ke service, mis. http://127.0.0.1:8765/lanes/lane1")
+    args = parser.parse_args(argv)
+
+    if args.file:
+        source = FileSource(args.file, realtime=args.realtime)
+    else:
+        source = MicrophoneSource(device_index=args.device_index)
+
+    def on_segment(segment):
+        seconds = len(segment) / source.sample_rate
+        print(f"[{time.strftime('%H:%M:%S')}] segmen {seconds:.2f} dtk, noise floor {capture.noise_floor_db:.1f} dBFS")
+        if args.lane_url:
+            try:
+                print(_post_segment(args.lane_url, segment, source.sample_rate))
+            except OSError as e:
+                # Service sibuk atau mati: segmen ini dilewati, capture tetap berjalan
+                print(f"Gagal mengirim segmen: {e}", file=sys.stderr)
+
+    capture = CaptureService(source, pre_roll_ms=args.pre_roll_ms, on_segment=on_segment).start()
+    try:
+        while capture.running:
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        capture.stop()
+    if capture.last_error:
+        print(f"Capture berhenti karena error: {capture.last_error}", file=sys.stderr)
+        return 1
+    print(f"Selesai: {capture.segments_emitted} segmen, {capture.segments_discarded} dibuang")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
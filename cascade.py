@@ -0,0 +1,158 @@
+"""Cascade pengenalan suara: model Whisper kecil dulu, eskalasi ke model besar jika ragu.
+
+Ucapan drive-thru umumnya pendek dan berpola ("dua burger satu cola"),
+sehingga model tiny/base sering sudah cukup. Hasil tier cepat diterima jika
+rata-rata log-probabilitas token decoder dan keyakinan parser sama-sama
+melewati ambang; selain itu audio yang sama dikirim ke tier akurat.
+"""
+import collections
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import metrics
+from catalog import get_catalog
+
+DEFAULT_MIN_LOGPROB = -0.5
+DEFAULT_MIN_PARSE_CONFIDENCE = 0.75
+
+
+def escalation_reason(text, logprob, min_logprob=DEFAULT_MIN_LOGPROB,
+                      min_parse_confidence=DEFAULT_MIN_PARSE_CONFIDENCE, catalog=None):
+    """Alasan hasil tier cepat perlu dieskalasi, atau None jika diterima"""
+    items, confidence = (catalog or get_catalog()).parse_with_confidence(text)
+    if not items:
+        return "no_items"
+    if logprob < min_logprob:
+        return "low_logprob"
+    if confidence < min_parse_confidence:
+        return "low_parse_confidence"
+    return None
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+
+# === Statistik per tier untuk tuning ambang ===
+class CascadeStats:
+    def __init__(self, fast_stats=None, accurate_stats=None, window=1000):
+        self.fast_stats = fast_stats
+        self.accurate_stats = accurate_stats
+        self.resolved = collections.Counter()
+        self.escalation_reasons = collections.Counter()
+        self._fast_seconds = collections.deque(maxlen=window)
+        self._accurate_seconds = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, fast_seconds, accurate_seconds=None, reason=None):
+        with self._lock:
+            self._fast_seconds.append(fast_seconds)
+            if accurate_seconds is None:
+                self.resolved["fast"] += 1
+            else:
+                self.resolved["accurate"] += 1
+                self.escalation_reasons[reason] += 1
+                self._accurate_seconds.append(accurate_seconds)
+
+    def summary(self):
+        """Ringkasan dalam milidetik; penghematan diperkirakan dari rata-rata latensi tier akurat"""
+        with self._lock:
+            fast_ms = _mean(self._fast_seconds) * 1000
+            accurate_ms = _mean(self._accurate_seconds) * 1000
+            total = sum(self.resolved.values())
+            summary = {
+                "total_requests": total,
+                "resolved_by": dict(self.resolved),
+                "fast_rate": self.resolved["fast"] / total if total else 0.0,
+                "escalation_reasons": dict(self.escalation_reasons),
+                "avg_fast_tier_ms": fast_ms,
+                "avg_accurate_tier_ms": accurate_ms,
+                # Diterima di tier cepat menghemat satu inferensi tier akurat; eskalasi membayar tier cepat percuma
+                "estimated_saved_ms": (self.resolved["fast"] * max(0.0, accurate_ms - fast_ms)
+                                       - self.resolved["accurate"] * fast_ms) if accurate_ms else None,
+            }
+        if self.fast_stats is not None:
+            summary["fast_scheduler"] = self.fast_stats.summary()
+        if self.accurate_stats is not None:
+            summary["accurate_scheduler"] = self.accurate_stats.summary()
+        return summary
+
+
+# === Penjadwal dua tier dengan antarmuka yang sama seperti WhisperBatchScheduler ===
+class CascadeRecognizer:
+    """Gabungkan penjadwal tier cepat dan tier akurat di balik satu `submit()`.
+
+    `fast` harus mengembalikan (teks, rata-rata logprob) per audio, misalnya
+    `WhisperBatchScheduler` dengan `asr.transcribe_batch_scored`. `accurate`
+    boleh berupa `WhisperBatchScheduler` atau `ASRProcessPool` biasa.
+    """
+
+    def __init__(self, fast, accurate, min_logprob=DEFAULT_MIN_LOGPROB,
+                 min_parse_confidence=DEFAULT_MIN_PARSE_CONFIDENCE, catalog=get_catalog, escalation_workers=2):
+        self.fast = fast
+        self.accurate = accurate
+        self.min_logprob = min_logprob
+        self.min_parse_confidence = min_parse_confidence
+        self._catalog = catalog
+        self.stats = CascadeStats(getattr(fast, "stats", None), getattr(accurate, "stats", None))
+        # Callback tier cepat berjalan di thread penjadwal; parsing dan `accurate.submit()` (yang bisa
+        # memblokir sampai `timeout` saat antrean penuh) dipindah ke sini agar batch berikutnya tidak tertahan
+        self._escalations = ThreadPoolExecutor(max_workers=escalation_workers, thread_name_prefix="cascade")
+
+    def submit(self, audio_input, timeout=None):
+        """Masukkan audio 16kHz; hasilnya Future berisi transkripsi dari tier yang memutuskan"""
+        result = Future()
+        started = time.perf_counter()
+
+        def on_accurate(accurate_future, fast_seconds, reason, escalated_at):
+            try:
+                self.stats.record(fast_seconds, time.perf_counter() - escalated_at, reason)
+                metrics.increment("cascade_escalated")
+                result.set_result(accurate_future.result())
+            except Exception as e:
+                result.set_exception(e)
+
+        def decide(fast_future, fast_seconds):
+            try:
+                text, logprob = fast_future.result()
+            except Exception:
+                reason = "fast_error"
+            else:
+                reason = escalation_reason(text, logprob, self.min_logprob, self.min_parse_confidence,
+                                           self._catalog())
+                if reason is None:
+                    self.stats.record(fast_seconds)
+                    metrics.increment("cascade_fast_accepted")
+                    result.set_result(text)
+                    return
+            escalated_at = time.perf_counter()
+            accurate_future = self.accurate.submit(audio_input, timeout=timeout)
+            accurate_future.add_done_callback(
+                lambda future: on_accurate(future, fast_seconds, reason, escalated_at))
+
+        def guarded_decide(fast_future, fast_seconds):
+            try:
+                decide(fast_future, fast_seconds)
+            except Exception as e:
+                if not result.done():
+                    result.set_exception(e)
+
+        def on_fast(fast_future):
+            try:
+                fast_seconds = time.perf_counter() - started
+                metrics.observe("cascade_fast_tier", fast_seconds)
+                self._escalations.submit(guarded_decide, fast_future, fast_seconds)
+            except Exception as e:
+                result.set_exception(e)
+
+        self.fast.submit(audio_input, timeout=timeout).add_done_callback(on_fast)
+        return result
+
+    def transcribe(self, audio_input, timeout=None):
+        return self.submit(audio_input, timeout=timeout).result(timeout=timeout)
+
+    def close(self):
+        self.fast.close()
+        self._escalations.shutdown(wait=True)
+        self.accurate.close()
@@ -0,0 +1,146 @@
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import metrics
+from order import MenuItem
+from order_parser import OrderParser
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parent / "menu.json"
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_key(text):
+    """Kunci pencarian: huruf kecil tanpa spasi, tanda baca, atau emoji"""
+    return _NON_WORD.sub("", text.lower())
+
+
+# === Katalog menu: item, harga, alias, dan deskripsi dari satu file ===
+class MenuCatalog:
+    """Katalog menu dengan indeks hash alias -> MenuItem.
+
+    Kunci item, nama tampilan, dan setiap alias dinormalisasi sekali saat
+    katalog dimuat, sehingga pencarian dari hasil parser selalu O(1)
+    berapa pun jumlah SKU di katalog. Alias yang sama (setelah normalisasi)
+    untuk dua item berbeda ditolak dengan `ValueError`, karena indeks dan
+    parser tidak bisa memutuskan item mana yang dimaksud.
+    """
+
+    def __init__(self, entries):
+        self.items = []
+        self.categories = []
+        self.descriptions = {}
+        self.items_config = {}
+        self._index = {}
+        owners = {}
+
+        for entry in entries:
+            menu_item = MenuItem(entry["name"], entry["price"])
+            key = entry.get("key") or entry["name"]
+            aliases = entry.get("aliases") or [key]
+            if key in self.items_config:
+                raise ValueError(f"Item '{key}' muncul lebih dari sekali di katalog")
+            self.items.append(menu_item)
+            self.items_config[key] = aliases
+
+            category = entry.get("category", key)
+            if category not in self.descriptions:
+                self.categories.append(category)
+            self.descriptions[category] = entry.get("description", "")
+
+            for name in (key, entry["name"], *aliases):
+                normalized = normalize_key(name)
+                owner = owners.setdefault(normalized, key)
+                if owner != key:
+                    raise ValueError(f"Alias '{name}' dipakai oleh item '{owner}' dan '{key}'")
+                self._index[normalized] = menu_item
+
+        self.parser = OrderParser(self.items_config)
+        # Baris tabel menu untuk UI dibangun sekali per katalog, bukan di setiap rerun
+        self.menu_rows = [{"Menu": item.name, "Harga": f"Rp{item.price:,.0f}"} for item in self.items]
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["items"])
+
+    def lookup(self, key):
+        """Cari MenuItem dari key item atau alias; None jika tidak ada"""
+        return self._index.get(normalize_key(key))
+
+    def parse(self, text):
+        """Parse teks pesanan menjadi dict {key item: jumlah}"""
+        with metrics.stage("parse"):
+            return self.parser.parse(text)
+
+    def parse_with_confidence(self, text):
+        """Parse teks pesanan menjadi ({key item: jumlah}, keyakinan 0..1)"""
+        with metrics.stage("parse"):
+            return self.parser.parse_with_confidence(text)
+
+
+# === Pemuat katalog dengan hot-reload saat file berubah ===
+class CatalogStore:
+    """Simpan katalog aktif dan muat ulang otomatis jika file katalog berubah.
+
+    Pengecekan mtime dibatasi paling sering sekali per `check_interval` detik.
+    Jika file baru gagal dimuat, katalog lama tetap dipakai dan error dicatat
+    di `last_error`.
+    """
+
+    def __init__(self, path=None, check_interval=1.0):
+        self.path = Path(path or os.environ.get("MENU_CATALOG_PATH", DEFAULT_CATALOG_PATH))
+        self.check_interval = check_interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._mtime = os.stat(self.path).st_mtime_ns
+        self._catalog = MenuCatalog.load(self.path)
+        self._checked_at = time.monotonic()
+
+    def get(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            with self._lock:
+                self._checked_at = now
+                self._reload_if_changed()
+        return self._catalog
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return
+            self._catalog = MenuCatalog.load(self.path)
+            self._mtime = mtime
+            self.last_error = None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.last_error = e
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_store():
+    """`CatalogStore` bersama untuk file default (`MENU_CATALOG_PATH` atau menu.json)"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = CatalogStore()
+    return _default_store
+
+
+def get_catalog():
+    """Katalog aktif dari store bersama"""
+    return get_store().get()
+
+
+# === Fungsi untuk memproses teks pesanan dan menambahkannya ke pesanan ===
+def process_order_text(text):
+    return get_catalog().parse(text)
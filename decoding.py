@@ -0,0 +1,163 @@
+import copy
+import math
+import os
+import threading
+
+import torch
+from transformers import LogitsProcessor, LogitsProcessorList
+
+from audio_io import SAMPLE_RATE
+from catalog import get_catalog
+from order_parser import NUMBER_WORDS
+
+
+def menu_vocabulary(catalog=None, number_words=NUMBER_WORDS):
+    """Semua alias menu dan kata bilangan yang valid dalam pesanan"""
+    catalog = catalog or get_catalog()
+    vocabulary = []
+    for keywords in catalog.items_config.values():
+        vocabulary.extend(keywords)
+    vocabulary.extend(number_words)
+    return list(dict.fromkeys(vocabulary))
+
+
+# === Logits processor yang mendorong token alias menu dan angka ===
+class MenuBiasLogitsProcessor(LogitsProcessor):
+    def __init__(self, token_ids, bias):
+        self.token_ids = torch.tensor(sorted(token_ids), dtype=torch.long)
+        self.bias = bias
+
+    def __call__(self, input_ids, scores):
+        scores[:, self.token_ids] += self.bias
+        return scores
+
+
+def language_code(language):
+    """Kode bahasa Whisper ("id") dari nama ("indonesian") atau kode"""
+    from transformers.models.whisper.tokenization_whisper import LANGUAGES, TO_LANGUAGE_CODE
+
+    language = language.strip().lower()
+    if language in LANGUAGES:
+        return language
+    if language in TO_LANGUAGE_CODE:
+        return TO_LANGUAGE_CODE[language]
+    raise ValueError(f"Bahasa Whisper tidak dikenal: {language}")
+
+
+def bias_token_ids(tokenizer, vocabulary, min_token_chars=3):
+    """Token pertama setiap alias (per varian spasi/kapital) yang cukup panjang untuk di-bias.
+
+    Hanya token pertama yang di-bias: sub-token lanjutan seperti "ur" atau
+    "ng" juga muncul di kata lain sehingga bias ke sana mengubah kata yang
+    tidak berhubungan dengan menu. Token yang lebih pendek dari
+    `min_token_chars` huruf diabaikan karena alasan yang sama.
+    """
+    token_ids = set()
+    for phrase in vocabulary:
+        # Whisper membedakan token dengan/tanpa spasi di depan dan huruf kapital di awal kalimat
+        for variant in (phrase, " " + phrase, phrase.capitalize(), " " + phrase.capitalize()):
+            encoded = tokenizer.encode(variant, add_special_tokens=False)
+            if encoded and len(tokenizer.decode(encoded[:1]).strip()) >= min_token_chars:
+                token_ids.add(encoded[0])
+    return token_ids
+
+
+# === Profil decoding drive-thru untuk model.generate ===
+class DriveThruDecodingProfile:
+    """Argumen generate yang dipersempit untuk pesanan drive-thru.
+
+    Dengan satu bahasa, bahasa dan task dipaksa sehingga deteksi bahasa
+    dilewati; dengan beberapa bahasa (default Indonesia dan Inggris) deteksi
+    tetap berjalan tetapi hanya memilih di antara bahasa tersebut. Decoding
+    greedy, `max_new_tokens` dibatasi sesuai durasi audio, dan token awal
+    alias menu serta kata bilangan diberi bias agar ejaan mendekati yang
+    dikenali parser. Jika `vocabulary` tidak diberikan, token bias dibangun
+    ulang setiap kali katalog menu dimuat ulang.
+    """
+
+    def __init__(self, processor, vocabulary=None, languages=("indonesian", "english"), bias=1.5,
+                 tokens_per_second=8, token_margin=6, max_new_tokens=64, use_prompt=False,
+                 min_token_chars=3, catalog=get_catalog):
+        if isinstance(languages, str):
+            languages = [languages]
+        self.languages = [language_code(language) for language in languages]
+        self.tokens_per_second = tokens_per_second
+        self.token_margin = token_margin
+        self.max_new_tokens = max_new_tokens
+        self.bias = bias
+        self.min_token_chars = min_token_chars
+        self.use_prompt = use_prompt
+        self._processor = processor
+        self._static_vocabulary = vocabulary
+        self._catalog = catalog
+        self._built_for = None
+        self._generation_configs = {}
+        self._lock = threading.Lock()
+        self.logits_processor = None
+        self.prompt_ids = None
+        self._refresh_vocabulary()
+
+    @classmethod
+    def from_env(cls, processor):
+        languages = os.environ.get("WHISPER_LANGUAGES") or os.environ.get("WHISPER_LANGUAGE") or "indonesian,english"
+        return cls(
+            processor,
+            languages=[language for language in languages.split(",") if language.strip()],
+            bias=float(os.environ.get("WHISPER_MENU_BIAS", 1.5)),
+            use_prompt=os.environ.get("WHISPER_MENU_PROMPT", "0") == "1",
+        )
+
+    def _refresh_vocabulary(self):
+        """Bangun ulang token bias dan prompt jika objek katalog aktif berganti (hot-reload)"""
+        if self._static_vocabulary is not None:
+            if self._built_for is not None:
+                return
+            source, vocabulary = self._static_vocabulary, self._static_vocabulary
+        else:
+            source = self._catalog()
+            if source is self._built_for:
+                return
+            vocabulary = menu_vocabulary(source)
+        with self._lock:
+            if self._built_for is source:
+                return
+            if self.bias:
+                token_ids = bias_token_ids(self._processor.tokenizer, vocabulary, self.min_token_chars)
+                self.logits_processor = MenuBiasLogitsProcessor(token_ids, self.bias)
+            if self.use_prompt:
+                self.prompt_ids = self._processor.get_prompt_ids(", ".join(vocabulary), return_tensors="pt")
+            self._built_for = source
+
+    def _restricted_generation_config(self, model):
+        # Deteksi bahasa Whisper memilih argmax di antara `lang_to_id`; salinan config membatasinya
+        config = self._generation_configs.get(id(model))
+        if config is None:
+            config = copy.deepcopy(model.generation_config)
+            allowed = {f"<|{code}|>" for code in self.languages}
+            config.lang_to_id = {token: token_id for token, token_id in config.lang_to_id.items() if token in allowed}
+            self._generation_configs[id(model)] = config
+        return config
+
+    def max_new_tokens_for(self, num_samples):
+        seconds = num_samples / SAMPLE_RATE
+        budget = math.ceil(seconds * self.tokens_per_second) + self.token_margin
+        return max(self.token_margin, min(self.max_new_tokens, budget))
+
+    def generate_kwargs(self, num_samples, model=None):
+        """Argumen generate untuk batch dengan audio terpanjang `num_samples` sampel"""
+        self._refresh_vocabulary()
+        kwargs = {
+            "task": "transcribe",
+            "num_beams": 1,
+            "do_sample": False,
+            "max_new_tokens": self.max_new_tokens_for(num_samples),
+        }
+        if len(self.languages) == 1:
+            kwargs["language"] = self.languages[0]
+        elif model is not None:
+            kwargs["generation_config"] = self._restricted_generation_config(model)
+        if self.logits_processor is not None:
+            kwargs["logits_processor"] = LogitsProcessorList([self.logits_processor])
+        if self.prompt_ids is not None:
+            kwargs["prompt_ids"] = self.prompt_ids
+        return kwargs
@@ -0,0 +1,264 @@
+import datetime
+import functools
+import os
+import uuid
+
+import metrics
+from audio_io import SAMPLE_RATE
+from catalog import get_catalog
+from order import Order
+
+STAGES = ("ordering", "payment", "completed")
+PAYMENT_METHODS = ("Cash", "E-Wallet", "Debit Card")
+
+
+class LaneError(Exception):
+    """Aksi tidak valid untuk tahap lane saat ini (mis. bayar saat pesanan kosong)"""
+
+
+# === Memuat stack ASR (torch, transformers, Whisper); dipakai UI dan service ===
+def _transcribe_fn(processor, model, base_fn):
+    """`base_fn` dengan profil decoding drive-thru dan mode ucapan pendek jika aktif"""
+    from asr import ShortUtteranceEncoder
+    from decoding import DriveThruDecodingProfile
+
+    kwargs = {}
+    if os.environ.get("WHISPER_DECODING_PROFILE", "drive-thru") == "drive-thru":
+        # Bahasa dipaksa, decoding greedy, dan token menu/angka diberi bias
+        kwargs["decoding_profile"] = DriveThruDecodingProfile.from_env(processor)
+    short_encoder = ShortUtteranceEncoder.from_env(model)
+    if short_encoder is not None:
+        # Encoder hanya memproses jendela mel sepanjang ucapan, bukan padding 30 detik
+        kwargs["short_encoder"] = short_encoder
+    return functools.partial(base_fn, **kwargs) if kwargs else base_fn
+
+
+def _warm_up(transcribe_fn, processor, model):
+    # Satu generate dummy agar order pertama tidak menanggung biaya alokasi dan inisialisasi kernel
+    import numpy as np
+    transcribe_fn(processor, model, [np.zeros(SAMPLE_RATE, dtype=np.float32)])
+
+
+def build_asr_stack(phase):
+    with phase("import torch"):
+        import torch  # noqa: F401
+    with phase("import transformers"):
+        import transformers  # noqa: F401
+    with phase("import modul ASR"):
+        import asr
+        from batch_scheduler import WhisperBatchScheduler
+    with phase("muat model"):
+        processor, model = asr.load_whisper_model()
+        metrics.set_gauge("pipeline_model_bytes", asr.model_memory_bytes(model))
+    with phase("siapkan profil decoding"):
+        transcribe_fn = _transcribe_fn(processor, model, asr.transcribe_batch)
+    max_batch_size = int(os.environ.get("ASR_MAX_BATCH_SIZE", 8))
+    max_wait_ms = float(os.environ.get("ASR_MAX_WAIT_MS", 25))
+    num_workers = int(os.environ.get("ASR_WORKERS", 1))
+    if num_workers > 1:
+        # Pool proses: worker di-fork dari model yang sudah dimuat dan melakukan warm-up sendiri
+        with phase("fork worker ASR"):
+            from asr_pool import ASRProcessPool
+            threads = os.environ.get("ASR_THREADS_PER_WORKER")
+            max_queue = os.environ.get("ASR_MAX_QUEUE")
+            stack = ASRProcessPool(
+                processor,
+                model,
+                num_workers=num_workers,
+                threads_per_worker=int(threads) if threads else None,
+                max_queue=int(max_queue) if max_queue else None,
+                max_batch_size=max_batch_size,
+                transcribe_fn=transcribe_fn,
+            )
+    else:
+        with phase("warm-up generate"):
+            _warm_up(transcribe_fn, processor, model)
+        # === Penjadwal inferensi bersama untuk semua lane (satu instance per server) ===
+        stack = WhisperBatchScheduler(processor, model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                                      transcribe_fn=transcribe_fn)
+
+    cascade_size = os.environ.get("ASR_CASCADE_MODEL")
+    if not cascade_size:
+        return stack
+    # Tier cepat dimuat setelah fork agar worker pool tidak ikut membawa model kecil
+    with phase("muat model cascade"):
+        from cascade import CascadeRecognizer
+        config = asr.WhisperBackendConfig.from_env()
+        config.model_size = cascade_size
+        fast_processor, fast_model = asr.load_whisper_model(config)
+        fast_fn = _transcribe_fn(fast_processor, fast_model, asr.transcribe_batch_scored)
+    with phase("warm-up model cascade"):
+        _warm_up(fast_fn, fast_processor, fast_model)
+    fast = WhisperBatchScheduler(fast_processor, fast_model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                                 transcribe_fn=fast_fn)
+    return CascadeRecognizer(
+        fast,
+        stack,
+        min_logprob=float(os.environ.get("ASR_CASCADE_MIN_LOGPROB", -0.5)),
+        min_parse_confidence=float(os.environ.get("ASR_CASCADE_MIN_PARSE_CONFIDENCE", 0.75)),
+    )
+
+
+# === Satu lane drive-thru tanpa ketergantungan pada Streamlit ===
+class LaneSession:
+    """Keranjang dan tahap satu lane: ordering -> payment -> completed.
+
+    Semua logika pesanan ada di sini sehingga lane bisa dijalankan oleh UI
+    Streamlit maupun service HTTP. Inferensi suara tidak dilakukan di kelas
+    ini; pemanggil mengirimkan teks hasil transkripsi ke `apply_text()`.
+    """
+
+    def __init__(self, lane_id=None, catalog=get_catalog, ledger=None):
+        self.lane_id = lane_id or uuid.uuid4().hex[:8]
+        self._catalog = catalog
+        self.ledger = ledger
+        self.order = Order()
+        self.stage = "ordering"
+        self.last_transcription = ""
+        self.cash_received = None
+        self.transaction_id = None
+        self.completed_at = None
+
+    @property
+    def catalog(self):
+        """Katalog aktif; dibaca ulang di setiap aksi agar hot-reload ikut terpakai"""
+        return self._catalog()
+
+    def require_stage(self, stage):
+        if self.stage != stage:
+            raise LaneError(f"Aksi hanya bisa dilakukan pada tahap '{stage}', lane sedang di tahap '{self.stage}'")
+
+    def _resolve(self, item):
+        """Nama menu di keranjang dari nama, key, atau alias item"""
+        if self.order.quantity_of(item):
+            return item
+        menu_item = self.catalog.lookup(item)
+        if menu_item is None:
+            raise LaneError(f"Item tidak dikenal: {item}")
+        return menu_item.name
+
+    # === Tahap pemesanan ===
+    def apply_text(self, text):
+        """Tambahkan item dari teks pesanan; kembalikan daftar (nama menu, jumlah) yang ditambahkan"""
+        self.require_stage("ordering")
+        self.last_transcription = text
+        catalog = self.catalog
+        added = []
+        for item_key, qty in catalog.parse(text).items():
+            menu_item = catalog.lookup(item_key)
+            if menu_item is not None:
+                self.order.add_item(menu_item, qty)
+                added.append((menu_item.name, qty))
+        metrics.increment("utterances")
+        if not added:
+            # Hasil "Tidak ada item yang dikenali"
+            metrics.increment("no_items")
+        return added
+
+    def apply_partial(self, applied, items_recognized):
+        """Sesuaikan keranjang dengan hasil parsing terbaru dari transkripsi parsial.
+
+        `applied` berisi jumlah yang sudah ditambahkan dari ucapan yang sama,
+        sehingga hanya selisihnya yang diterapkan ke pesanan.
+        """
+        self.require_stage("ordering")
+        catalog = self.catalog
+        for item_key in set(applied) | set(items_recognized):
+            delta = items_recognized.get(item_key, 0) - applied.get(item_key, 0)
+            menu_item = catalog.lookup(item_key)
+            if delta == 0 or menu_item is None:
+                continue
+            if delta > 0:
+                self.order.add_item(menu_item, delta)
+            else:
+                self.order.change_quantity(menu_item.name, delta)
+        return dict(items_recognized)
+
+    def add_item(self, item, quantity=1):
+        self.require_stage("ordering")
+        menu_item = self.catalog.lookup(item)
+        if menu_item is None:
+            raise LaneError(f"Item tidak dikenal: {item}")
+        self.order.add_item(menu_item, quantity)
+
+    def set_quantity(self, item, quantity):
+        """Ubah jumlah item; jumlah 0 menghapus item"""
+        self.require_stage("ordering")
+        self.order.set_quantity(self._resolve(item), quantity)
+
+    def change_quantity(self, item, delta):
+        self.require_stage("ordering")
+        self.order.change_quantity(self._resolve(item), delta)
+
+    def remove_item(self, item):
+        self.require_stage("ordering")
+        self.order.remove_item(self._resolve(item))
+
+    def reset(self):
+        self.require_stage("ordering")
+        self.order.reset()
+        self.last_transcription = ""
+
+    def checkout(self):
+        """Pindah ke tahap pembayaran"""
+        self.require_stage("ordering")
+        if self.order.is_empty():
+            raise LaneError("Pesanan masih kosong! Silakan pesan terlebih dahulu.")
+        self.stage = "payment"
+
+    # === Tahap pembayaran ===
+    def back_to_ordering(self):
+        self.require_stage("payment")
+        self.stage = "ordering"
+
+    def pay(self, payment_method, cash_received=None, completed_at=None):
+        """Selesaikan pembayaran dan catat transaksi ke ledger; kembalikan id transaksi"""
+        self.require_stage("payment")
+        if payment_method not in PAYMENT_METHODS:
+            raise LaneError(f"Metode pembayaran tidak dikenal: {payment_method}")
+        total = self.order.get_total()
+        if payment_method == "Cash":
+            if cash_received is None or cash_received < total:
+                raise LaneError(f"Uang kurang: Rp{total - (cash_received or 0):,.0f}")
+        else:
+            # Untuk E-Wallet dan Debit Card, uang diterima sama dengan total
+            cash_received = total
+
+        self.order.set_payment_method(payment_method)
+        self.cash_received = cash_received
+        self.completed_at = completed_at or datetime.datetime.now()
+        if self.ledger is not None:
+            # Penulisan dilakukan di latar belakang (group commit)
+            self.transaction_id = self.ledger.record(self.order, cash_received, self.completed_at)
+        self.stage = "completed"
+        return self.transaction_id
+
+    # === Tahap selesai ===
+    def receipt(self):
+        self.require_stage("completed")
+        return self.order.generate_receipt(self.cash_received, self.completed_at)
+
+    def new_order(self):
+        """Mulai transaksi baru dari tahap mana pun"""
+        self.order.reset()
+        self.stage = "ordering"
+        self.last_transcription = ""
+        self.cash_received = None
+        self.transaction_id = None
+        self.completed_at = None
+
+    def snapshot(self):
+        """Status lane sebagai dict yang bisa diserialisasi ke JSON"""
+        return {
+            "lane_id": self.lane_id,
+            "stage": self.stage,
+            "items": [
+                {"menu": line.name, "price": line.price, "quantity": line.quantity, "subtotal": line.subtotal}
+                for line in self.order.lines
+            ],
+            "total": self.order.get_total(),
+            "version": self.order.version,
+            "last_transcription": self.last_transcription,
+            "payment_method": self.order.payment_method,
+            "transaction_id": self.transaction_id,
+        }
@@ -0,0 +1,290 @@
+"""Ledger transaksi berbasis SQLite (mode WAL) dengan group commit.
+
+Contoh:
+    python ledger.py recent
+    python ledger.py receipt <id transaksi>
+"""
+import argparse
+import atexit
+import datetime
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+from order import render_receipt
+
+DEFAULT_LEDGER_PATH = "transactions.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    payment_method TEXT,
+    total INTEGER NOT NULL,
+    cash_received INTEGER,
+    change_due INTEGER
+);
+CREATE TABLE IF NOT EXISTS transaction_items (
+    transaction_id TEXT NOT NULL REFERENCES transactions(id),
+    line_no INTEGER NOT NULL,
+    menu TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    subtotal INTEGER NOT NULL,
+    PRIMARY KEY (transaction_id, line_no)
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_created_at ON transactions(created_at);
+"""
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class LedgerError(RuntimeError):
+    """Transaksi gagal disimpan atau thread penulis ledger berhenti"""
+
+
+def connect(path):
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # Dengan WAL, NORMAL hanya fsync saat checkpoint, bukan di setiap commit
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+# === Ledger transaksi append-only ===
+class TransactionLedger:
+    """Simpan setiap order yang selesai sebagai baris terstruktur.
+
+    `record()` hanya memasukkan transaksi ke antrean dan langsung kembali;
+    thread penulis menggabungkan transaksi yang masuk dalam jendela
+    `max_delay_ms` (maksimal `max_batch`) ke dalam satu commit, sehingga
+    checkout tidak pernah menunggu fsync per penjualan.
+
+    Commit yang gagal diulang maksimal `max_retries` kali. Setelah itu
+    transaksi dalam batch dicatat di `failed_ids` dan dilaporkan oleh
+    `flush()` serta `summary()`. Jika thread penulis mati karena error tak
+    terduga, transaksi yang tersisa ikut ditandai gagal dan `record()`
+    menolak transaksi baru, sehingga tidak ada yang menunggu selamanya.
+    """
+
+    def __init__(self, path=None, max_batch=64, max_delay_ms=200, max_retries=5, retry_delay=1.0):
+        self.path = path or os.environ.get("LEDGER_PATH", DEFAULT_LEDGER_PATH)
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.last_error = None
+        self.commits = 0
+        self.written = 0
+        self.failed_ids = []
+        self.writer_error = None
+        self._queue = queue.Queue()
+        self._submitted = 0
+        self._processed = 0
+        self._reported_failures = 0
+        self._done = threading.Condition()
+        self._write_connection = connect(self.path)
+        self._read_local = threading.local()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def record(self, order, uang_diterima=None, created_at=None):
+        """Antrekan order yang sudah dibayar; kembalikan id transaksi"""
+        created_at = created_at or datetime.datetime.now()
+        transaction_id = uuid.uuid4().hex
+        total = order.get_total()
+        change_due = uang_diterima - total if uang_diterima is not None and uang_diterima >= total else None
+        header = (transaction_id, created_at.strftime(TIMESTAMP_FORMAT), order.payment_method,
+                  total, uang_diterima, change_due)
+        lines = [(transaction_id, line_no, line.name, line.price, line.quantity, line.subtotal)
+                 for line_no, line in enumerate(order.lines)]
+        # Diantrekan di bawah lock agar tidak ada transaksi yang masuk setelah sentinel atau setelah penulis mati
+        with self._done:
+            if self._closed:
+                raise LedgerError("Ledger sudah ditutup")
+            if self.writer_error is not None:
+                raise LedgerError(f"Penulis ledger berhenti: {self.writer_error}")
+            self._submitted += 1
+            self._queue.put((header, lines))
+        return transaction_id
+
+    def flush(self, timeout=None):
+        """Tunggu sampai semua transaksi yang sudah diantrekan diproses.
+
+        Kembalikan False jika `timeout` habis. Raise `LedgerError` jika ada
+        transaksi yang gagal disimpan sejak flush sebelumnya.
+        """
+        with self._done:
+            target = self._submitted
+            if not self._done.wait_for(lambda: self._processed >= target, timeout):
+                return False
+            failed = self.failed_ids[self._reported_failures:]
+            self._reported_failures = len(self.failed_ids)
+        if failed:
+            raise LedgerError(f"{len(failed)} transaksi gagal disimpan: {self.last_error}")
+        return True
+
+    def summary(self):
+        with self._done:
+            return {
+                "commits": self.commits,
+                "written": self.written,
+                "failed": len(self.failed_ids),
+                "pending": self._submitted - self._processed,
+                "writer_running": self.writer_error is None and self._writer.is_alive(),
+                "last_error": None if self.last_error is None else str(self.last_error),
+            }
+
+    def close(self):
+        with self._done:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._writer.join()
+        self._write_connection.close()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _commit(self, batch):
+        with self._write_connection:
+            self._write_connection.executemany(
+                "INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?)", [header for header, _ in batch])
+            self._write_connection.executemany(
+                "INSERT INTO transaction_items VALUES (?, ?, ?, ?, ?, ?)", [row for _, lines in batch for row in lines])
+
+    def _commit_with_retry(self, batch):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._commit(batch)
+                return True
+            except sqlite3.Error as e:
+                self.last_error = e
+                if attempt < self.max_retries:
+                    time.sleep(self.retry_delay)
+        return False
+
+    def _finish(self, batch, committed):
+        with self._done:
+            if committed:
+                self.commits += 1
+                self.written += len(batch)
+            else:
+                self.failed_ids.extend(header[0] for header, _ in batch)
+            self._processed += len(batch)
+            self._done.notify_all()
+
+    def _run(self):
+        batch = []
+        try:
+            while True:
+                first = self._queue.get()
+                if first is None:
+                    break
+                batch = self._collect(first)
+                self._finish(batch, self._commit_with_retry(batch))
+                batch = []
+        except BaseException as e:
+            with self._done:
+                self.last_error = self.writer_error = e
+                # Batch yang sedang ditulis dan sisa antrean tidak akan pernah di-commit
+                pending = list(batch)
+                while True:
+                    try:
+                        entry = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if entry is not None:
+                        pending.append(entry)
+                self._finish(pending, committed=False)
+            print(f"Penulis ledger berhenti: {e!r}; {len(pending)} transaksi gagal disimpan", file=sys.stderr)
+
+    # === Pembacaan ===
+    def _reader(self):
+        connection = getattr(self._read_local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.row_factory = sqlite3.Row
+            self._read_local.connection = connection
+        return connection
+
+    def get_transaction(self, transaction_id):
+        """Transaksi beserta item-itemnya, atau None jika tidak ada"""
+        connection = self._reader()
+        header = connection.execute("SELECT * FROM transactions WHERE id = ?", (transaction_id,)).fetchone()
+        if header is None:
+            return None
+        items = connection.execute(
+            "SELECT menu, price, quantity, subtotal FROM transaction_items WHERE transaction_id = ? ORDER BY line_no",
+            (transaction_id,),
+        ).fetchall()
+        transaction = dict(header)
+        transaction["items"] = [dict(item) for item in items]
+        return transaction
+
+    def recent(self, limit=20):
+        rows = self._reader().execute(
+            "SELECT * FROM transactions ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def render_receipt(self, transaction_id):
+        """Cetak ulang struk dari baris yang tersimpan"""
+        transaction = self.get_transaction(transaction_id)
+        if transaction is None:
+            return None
+        lines = [(item["menu"], item["quantity"], item["subtotal"]) for item in transaction["items"]]
+        timestamp = datetime.datetime.strptime(transaction["created_at"], TIMESTAMP_FORMAT)
+        return render_receipt(lines, transaction["total"], transaction["payment_method"],
+                              transaction["cash_received"], timestamp)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lihat transaksi dan cetak ulang struk dari ledger")
+    parser.add_argument("--db", default=None, help="Lokasi database ledger (default: LEDGER_PATH atau transactions.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    recent = commands.add_parser("recent", help="Tampilkan transaksi terbaru")
+    recent.add_argument("--limit", type=int, default=20)
+    receipt = commands.add_parser("receipt", help="Cetak ulang struk transaksi")
+    receipt.add_argument("transaction_id")
+    args = parser.parse_args(argv)
+
+    ledger = TransactionLedger(args.db)
+    try:
+        if args.command == "recent":
+            for row in ledger.recent(args.limit):
+                print(f"{row['id']}  {row['created_at']}  {row['payment_method']:<10}  Rp{row['total']:,.0f}")
+        else:
+            text = ledger.render_receipt(args.transaction_id)
+            if text is None:
+                print(f"Transaksi {args.transaction_id} tidak ditemukan", file=sys.stderr)
+                return 1
+            print(text)
+    finally:
+        ledger.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""Instrumentasi latensi per tahap pipeline suara dengan ekspor Prometheus dan JSON.
+
+Tahap diukur dengan `with metrics.stage("generate"):`. Jika dimatikan
+(`PIPELINE_METRICS=0`), `stage()` mengembalikan context manager kosong yang
+sama setiap kali sehingga overhead-nya hanya satu pemanggilan fungsi.
+
+Metrik diekspor lewat endpoint `/metrics` (Prometheus) dan `/metrics.json`
+di service.py, atau sebagai file di `PIPELINE_METRICS_DIR`.
+"""
+import bisect
+import collections
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = contextlib.nullcontext()
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))]
+
+
+def resident_memory_bytes():
+    """RSS proses saat ini; None jika tidak tersedia di platform ini"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# === Histogram kumulatif (Prometheus) + jendela bergulir untuk persentil ===
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=1024):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = collections.deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+    def summary(self):
+        """Ringkasan dalam milidetik dari jendela bergulir"""
+        ordered = sorted(self.recent)
+        return {
+            "count": self.count,
+            "avg_ms": self.sum / self.count * 1000 if self.count else 0.0,
+            "p50_ms": _percentile(ordered, 50) * 1000,
+            "p95_ms": _percentile(ordered, 95) * 1000,
+            "p99_ms": _percentile(ordered, 99) * 1000,
+            "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+        }
+
+
+# === Profiler sampling untuk generate (stack Python per interval) ===
+class SamplingProfiler:
+    """Ambil stack thread target setiap `interval` detik selama blok berjalan.
+
+    Hasil berupa stack terlipat ("a;b;c jumlah") yang bisa langsung diubah
+    menjadi flamegraph.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def sample(self):
+        target = threading.get_ident()
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(self.interval):
+                frame = sys._current_frames().get(target)
+                if frame is None:
+                    continue
+                stack = ";".join(f"{entry.name} ({os.path.basename(entry.filename)}:{entry.lineno})"
+                                 for entry in traceback.extract_stack(frame))
+                with self._lock:
+                    self.stacks[stack] += 1
+
+        sampler = threading.Thread(target=run, name="generate-profiler", daemon=True)
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            sampler.join()
+
+    def collapsed(self):
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed() + "\n")
+
+
+class _StageTimer:
+    __slots__ = ("registry", "name", "started")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, time.perf_counter() - self.started)
+
+
+# === Registry metrik per proses ===
+class MetricsRegistry:
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS, window=1024, profile_path=None):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.window = window
+        self.started_at = time.time()
+        self.stages = {}
+        self.counters = collections.Counter()
+        self.gauges = {}
+        self.profiler = SamplingProfiler() if enabled and profile_path else None
+        self.profile_path = profile_path
+        # Jika berupa list, observasi juga disalin ke sini untuk diteruskan ke proses lain (worker pool)
+        self.forward_buffer = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=os.environ.get("PIPELINE_METRICS", "1") != "0",
+            profile_path=os.environ.get("PIPELINE_PROFILE_PATH") or None,
+        )
+
+    def stage(self, name):
+        """Context manager pengukur durasi tahap `name`"""
+        if not self.enabled:
+            return _NOOP
+        return _StageTimer(self, name)
+
+    def profile(self):
+        """Profiling sampling untuk blok ini jika `PIPELINE_PROFILE_PATH` diatur"""
+        if self.profiler is None:
+            return _NOOP
+        return self._profiled()
+
+    @contextlib.contextmanager
+    def _profiled(self):
+        try:
+            with self.profiler.sample():
+                yield
+        finally:
+            self.profiler.write(self.profile_path)
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = Histogram(self.buckets, self.window)
+            histogram.observe(seconds)
+            if self.forward_buffer is not None:
+                self.forward_buffer.append((name, seconds))
+
+    def increment(self, name, amount=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += amount
+
+    def set_gauge(self, name, value):
+        if self.enabled:
+            with self._lock:
+                self.gauges[name] = value
+
+    def _reset_after_fork(self):
+        # Saat fork, lock bisa sedang dipegang thread parent yang tidak ikut ke child
+        self._lock = threading.Lock()
+        if self.profiler is not None:
+            self.profiler._lock = threading.Lock()
+
+    def take_forwarded(self):
+        """Ambil dan kosongkan observasi yang menunggu diteruskan"""
+        with self._lock:
+            samples, self.forward_buffer = self.forward_buffer or [], []
+        return samples
+
+    def snapshot(self):
+        gauges = dict(self.gauges)
+        rss = resident_memory_bytes()
+        if rss is not None:
+            gauges["process_resident_memory_bytes"] = rss
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "uptime_seconds": round(time.time() - self.started_at, 3),
+                "stages": {name: histogram.summary() for name, histogram in sorted(self.stages.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "gauges": gauges,
+            }
+
+    def prometheus_text(self):
+        """Metrik dalam format teks eksposisi Prometheus"""
+        lines = [
+            "# HELP pipeline_stage_seconds Durasi tiap tahap pipeline suara",
+            "# TYPE pipeline_stage_seconds histogram",
+        ]
+        with self._lock:
+            for name, histogram in sorted(self.stages.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), histogram.bucket_counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'pipeline_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'pipeline_stage_seconds_sum{{stage="{name}"}} {histogram.sum}')
+                lines.append(f'pipeline_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+            lines += ["# HELP pipeline_events_total Jumlah kejadian pipeline (gagal, tanpa item, dll.)",
+                      "# TYPE pipeline_events_total counter"]
+            lines += [f'pipeline_events_total{{event="{name}"}} {value}' for name, value in sorted(self.counters.items())]
+            gauges = dict(self.gauges)
+        rss = resident_memory_bytes()
+        if rss is not None:
+            gauges["process_resident_memory_bytes"] = rss
+        for name, value in sorted(gauges.items()):
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write_files(self, directory):
+        """Tulis metrics.prom (untuk textfile collector) dan metrics.json secara atomik"""
+        os.makedirs(directory, exist_ok=True)
+        for filename, content in (("metrics.prom", self.prometheus_text()),
+                                  ("metrics.json", json.dumps(self.snapshot(), indent=2))):
+            path = os.path.join(directory, filename)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+
+    def start_file_export(self, directory, interval=15.0):
+        """Tulis file metrik secara berkala di thread latar belakang"""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_files(directory)
+                except OSError:
+                    pass
+
+        thread = threading.Thread(target=run, name="metrics-file-export", daemon=True)
+        thread.start()
+        return thread
+
+
+REGISTRY = MetricsRegistry.from_env()
+# Worker ASR di-fork dari parent yang multithread; child tidak boleh mewarisi lock yang terkunci
+os.register_at_fork(after_in_child=lambda: REGISTRY._reset_after_fork())
+
+
+def stage(name):
+    return REGISTRY.stage(name)
+
+
+def profile():
+    return REGISTRY.profile()
+
+
+def observe(name, seconds):
+    REGISTRY.observe(name, seconds)
+
+
+def increment(name, amount=1):
+    REGISTRY.increment(name, amount)
+
+
+def set_gauge(name, value):
+    REGISTRY.set_gauge(name, value)
+
@@ -0,0 +1,155 @@
+import datetime
+
+ORDER_COLUMNS = ["Menu", "Harga", "Jumlah", "Subtotal"]
+
+
+# === OOP Menu Item ===
+class MenuItem:
+    __slots__ = ("name", "price")
+
+    def __init__(self, name, price):
+        self.name = name
+        self.price = price
+
+
+class OrderLine:
+    """Satu baris pesanan; hanya diubah melalui method `Order`"""
+
+    __slots__ = ("menu_item", "quantity")
+
+    def __init__(self, menu_item, quantity):
+        self.menu_item = menu_item
+        self.quantity = quantity
+
+    @property
+    def name(self):
+        return self.menu_item.name
+
+    @property
+    def price(self):
+        return self.menu_item.price
+
+    @property
+    def subtotal(self):
+        return self.menu_item.price * self.quantity
+
+
+# === OOP Order Logic ===
+class Order:
+    """Pesanan yang diindeks per nama menu dengan total berjalan.
+
+    Semua perubahan (tambah, ubah jumlah, hapus) lewat method di bawah ini,
+    sehingga total selalu diperbarui secara O(1) dan DataFrame ringkasan
+    hanya dibangun ulang jika pesanan berubah.
+    """
+
+    __slots__ = ("_lines", "_total", "_version", "_df_cache", "payment_method")
+
+    def __init__(self):
+        self._lines = {}
+        self._total = 0
+        self._version = 0
+        self._df_cache = None
+        self.payment_method = None
+
+    @property
+    def lines(self):
+        """Baris pesanan sesuai urutan penambahan"""
+        return tuple(self._lines.values())
+
+    @property
+    def version(self):
+        """Bertambah setiap kali isi pesanan berubah"""
+        return self._version
+
+    def is_empty(self):
+        return not self._lines
+
+    def quantity_of(self, name):
+        line = self._lines.get(name)
+        return line.quantity if line else 0
+
+    def _changed(self, total_delta):
+        self._total += total_delta
+        self._version += 1
+
+    def add_item(self, menu_item, quantity):
+        if quantity > 0:
+            line = self._lines.get(menu_item.name)
+            if line is None:
+                line = self._lines[menu_item.name] = OrderLine(menu_item, quantity)
+            else:
+                line.quantity += quantity
+            # Harga baris tetap harga saat item pertama ditambahkan, walau katalog dimuat ulang
+            self._changed(line.price * quantity)
+
+    def set_quantity(self, name, new_quantity):
+        """Ubah jumlah item; jumlah 0 atau kurang menghapus item"""
+        line = self._lines.get(name)
+        if line is None:
+            return
+        if new_quantity <= 0:
+            self.remove_item(name)
+            return
+        delta = new_quantity - line.quantity
+        if delta:
+            line.quantity = new_quantity
+            self._changed(line.price * delta)
+
+    def change_quantity(self, name, delta):
+        """Tambah/kurangi jumlah item sebanyak `delta`"""
+        self.set_quantity(name, self.quantity_of(name) + delta)
+
+    def remove_item(self, name):
+        """Hapus item berdasarkan nama menu"""
+        line = self._lines.pop(name, None)
+        if line is not None:
+            self._changed(-line.subtotal)
+
+    def get_order_df(self):
+        if self._df_cache is None or self._df_cache[0] != self._version:
+            import pandas as pd
+            rows = [(line.name, line.price, line.quantity, line.subtotal) for line in self._lines.values()]
+            self._df_cache = (self._version, pd.DataFrame(rows, columns=ORDER_COLUMNS))
+        return self._df_cache[1]
+
+    def get_total(self):
+        return self._total
+
+    def reset(self):
+        self._lines = {}
+        self._total = 0
+        self._version += 1
+        self.payment_method = None
+
+    def set_payment_method(self, method):
+        self.payment_method = method
+
+    def generate_receipt(self, uang_diterima=None, timestamp=None):
+        lines = [(line.name, line.quantity, line.subtotal) for line in self._lines.values()]
+        return render_receipt(lines, self._total, self.payment_method, uang_diterima, timestamp)
+
+
+# === Format struk; dipakai oleh Order dan untuk mencetak ulang dari ledger ===
+def render_receipt(lines, total, payment_method, uang_diterima=None, timestamp=None):
+    """`lines` berisi tuple (menu, jumlah, subtotal)"""
+    timestamp = timestamp or datetime.datetime.now()
+    receipt = "=== STRUK PEMBELIAN ===\n"
+    for name, quantity, subtotal in lines:
+        receipt += f"{name} x{quantity} = Rp{subtotal:,.0f}\n"
+    receipt += f"---------------------------\nTotal: Rp{total:,.0f}\n"
+    receipt += f"Metode Bayar: {payment_method}\n"
+
+    if uang_diterima is not None:
+        if uang_diterima >= total:
+            kembali = uang_diterima - total
+            receipt += f"Uang Diterima: Rp{uang_diterima:,.0f}\n"
+            receipt += f"Uang Kembali: Rp{kembali:,.0f}\n"
+        else:
+            kekurangan = total - uang_diterima
+            receipt += f"Uang Diterima: Rp{uang_diterima:,.0f}\n"
+            receipt += f"⚠️ Kekurangan: Rp{kekurangan:,.0f}\n"
+
+    receipt += f"Waktu: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n"
+    receipt += "===========================\nTerima kasih! 🍽️"
+    return receipt
@@ -0,0 +1,159 @@
+import re
+
+# Dictionary untuk konversi angka dalam bahasa Indonesia dan Inggris ke digit
+NUMBER_WORDS = {
+    'satu': 1, 'dua': 2, 'tiga': 3, 'empat': 4, 'lima': 5,
+    'enam': 6, 'tujuh': 7, 'delapan': 8, 'sembilan': 9, 'sepuluh': 10,
+    'sebelas': 11, 'dua belas': 12, 'tiga belas': 13, 'empat belas': 14, 'lima belas': 15,
+    'enam belas': 16, 'tujuh belas': 17, 'delapan belas': 18, 'sembilan belas': 19, 'dua puluh': 20,
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+    'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14, 'fifteen': 15,
+    'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19, 'twenty': 20
+}
+
+# Kata satuan yang boleh berada di antara angka dan item ("dua porsi ayam goreng")
+FILLER_WORDS = {"buah", "porsi", "gelas", "botol", "biji", "potong", "x", "cup", "cups", "piece", "pieces"}
+
+# Kata umum dalam ucapan pesanan yang tidak menambah maupun mengurangi keyakinan parsing
+CONNECTOR_WORDS = {
+    "saya", "aku", "mau", "pesan", "pesen", "minta", "tolong", "beli", "dan", "sama", "terus", "lalu",
+    "juga", "lagi", "ya", "yang", "nya", "aja", "saja", "deh", "dong", "kak", "mas", "mbak", "pak", "bu",
+    "i", "want", "would", "like", "please", "and", "with", "a", "an", "the", "get", "can", "have",
+    # Sapaan, terima kasih, dan jeda ragu-ragu yang sering ditranskripsi Whisper
+    "halo", "hai", "oke", "ok", "okay", "terima", "kasih", "makasih", "trims", "thanks", "thank", "you",
+    "hi", "hello", "me", "um", "umm", "uh", "eh", "em", "ehm", "hmm",
+}
+
+_TOKEN_PATTERN = re.compile(r"\d+|[^\W\d_]+")
+_END = ""
+ITEM = "item"
+NUMBER = "number"
+OTHER = "other"
+
+
+# === Parser pesanan yang dikompilasi sekali dari daftar menu ===
+class OrderParser:
+    """Tokenisasi ucapan dalam satu lintasan menjadi pasangan (item, jumlah).
+
+    Alias menu dan kata bilangan disimpan dalam satu trie per kata, sehingga
+    biaya parsing hanya bergantung pada panjang teks, bukan jumlah menu.
+    Pencocokan selalu memilih alias terpanjang: "air mineral" tidak lagi
+    ikut terbaca sebagai "air", dan "ayam goreng" tidak sebagai "ayam".
+    """
+
+    def __init__(self, items_config, number_words=NUMBER_WORDS, filler_words=FILLER_WORDS,
+                 connector_words=CONNECTOR_WORDS):
+        self.filler_words = frozenset(filler_words)
+        self.connector_words = frozenset(connector_words)
+        self._trie = {}
+        for item_name, keywords in items_config.items():
+            for keyword in keywords:
+                self._insert(keyword, (ITEM, item_name))
+        for word, value in number_words.items():
+            self._insert(word, (NUMBER, value))
+
+    def _insert(self, phrase, token):
+        node = self._trie
+        for word in _TOKEN_PATTERN.findall(phrase.lower()):
+            node = node.setdefault(word, {})
+        node[_END] = token
+
+    @staticmethod
+    def _step(node, word):
+        child = node.get(word)
+        # Bentuk jamak bahasa Inggris ("hot dogs", "burgers")
+        if child is None and len(word) > 3 and word.endswith("s"):
+            child = node.get(word[:-1])
+        return child
+
+    def tokenize(self, text):
+        """Ubah teks menjadi daftar token (jenis, nilai) dengan longest match"""
+        words = _TOKEN_PATTERN.findall(text.lower())
+        tokens = []
+        i = 0
+        while i < len(words):
+            word = words[i]
+            if word.isdigit():
+                tokens.append((NUMBER, int(word)))
+                i += 1
+                continue
+
+            node = self._trie
+            match = None
+            j = i
+            while j < len(words):
+                child = self._step(node, words[j])
+                if child is None:
+                    break
+                node = child
+                j += 1
+                if _END in node:
+                    match = (node[_END], j)
+
+            if match:
+                tokens.append(match[0])
+                i = match[1]
+            else:
+                if word not in self.filler_words:
+                    tokens.append((OTHER, word))
+                i += 1
+        return tokens
+
+    def parse(self, text):
+        """Kembalikan dict {item: jumlah} dari teks pesanan"""
+        return self._assemble(self.tokenize(text))[0]
+
+    def parse_with_confidence(self, text):
+        """Kembalikan (dict {item: jumlah}, keyakinan 0..1).
+
+        Keyakinan adalah porsi token yang terbaca sebagai item atau jumlah
+        yang terpakai, dibandingkan seluruh token yang bermakna. Kata tak
+        dikenal dan angka yang tidak terikat ke item menurunkannya; kata
+        sambung pesanan ("saya mau ... dan ...") diabaikan. Tanpa item
+        keyakinannya 0.
+        """
+        tokens = self.tokenize(text)
+        items, consumed = self._assemble(tokens)
+        if not items:
+            return items, 0.0
+        recognized = total = 0
+        for (kind, value), used in zip(tokens, consumed):
+            if kind == OTHER and value in self.connector_words:
+                continue
+            total += 1
+            if kind == ITEM or used:
+                recognized += 1
+        return items, recognized / total
+
+    def _assemble(self, tokens):
+        """Pasangkan token item dengan jumlahnya; kembalikan (items, token angka yang terpakai)"""
+        consumed = [False] * len(tokens)
+        items = {}
+
+        for idx, (kind, item_name) in enumerate(tokens):
+            if kind != ITEM:
+                continue
+
+            quantity = None
+            # Pola: angka + item (contoh: "3 burger", "tiga burger")
+            if idx > 0 and tokens[idx - 1][0] == NUMBER and not consumed[idx - 1]:
+                quantity = tokens[idx - 1][1]
+                consumed[idx - 1] = True
+            # Pola: item + angka (contoh: "burger 3", "kentang goreng lima"), kecuali
+            # angka itu milik item berikutnya ("burger dua cola")
+            elif idx + 1 < len(tokens) and tokens[idx + 1][0] == NUMBER and self._binds_forward(tokens, idx):
+                quantity = tokens[idx + 1][1]
+                consumed[idx + 1] = True
+
+            items[item_name] = items.get(item_name, 0) + max(1, quantity or 1)  # Minimal 1
+
+        return items, consumed
+
+    @staticmethod
+    def _binds_forward(tokens, idx):
+        after = idx + 2
+        if after >= len(tokens) or tokens[after][0] != ITEM:
+            return True
+        # "burger dua cola tiga": seluruh ucapan memakai pola item + angka
+        return after + 1 < len(tokens) and tokens[after + 1][0] == NUMBER
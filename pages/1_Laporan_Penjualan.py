@@ -0,0 +1,48 @@
+import datetime
+
+import streamlit as st
+
+import reports
+
+st.title("📊 Laporan Penjualan")
+
+today = datetime.date.today()
+date_range = st.date_input("Periode:", (today - datetime.timedelta(days=30), today))
+start, end = (date_range if len(date_range) == 2 else (date_range[0], date_range[0]))
+
+# Rollup diperbarui secara inkremental: hanya transaksi baru yang dipindai
+connection = reports.open_reporting()
+try:
+    new_transactions = reports.refresh_rollups(connection)
+    overview = reports.basket_overview(connection, start, end)
+    per_item = reports.revenue_per_item(connection, start, end)
+    per_hour = reports.units_per_hour(connection, start, end)
+    mix = reports.payment_mix(connection, start, end)
+    daily = reports.daily_summary(connection, start, end)
+finally:
+    connection.close()
+
+st.caption(f"{new_transactions} transaksi baru ditambahkan ke rollup")
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Transaksi", f"{overview['transactions']:,}")
+col2.metric("Pendapatan", f"Rp{overview['revenue']:,.0f}")
+col3.metric("Rata-rata item/keranjang", f"{overview['avg_basket_units']:.2f}")
+col4.metric("Rata-rata nilai keranjang", f"Rp{overview['avg_basket_value']:,.0f}")
+
+st.subheader("Pendapatan per Menu")
+st.bar_chart(per_item, x="menu", y="revenue")
+st.dataframe(per_item, use_container_width=True, hide_index=True)
+
+st.subheader("Unit Terjual per Jam")
+st.bar_chart(per_hour, x="hour", y="units")
+
+st.subheader("Metode Pembayaran")
+st.dataframe(mix, use_container_width=True, hide_index=True)
+
+st.subheader("Ringkasan Harian")
+st.dataframe(daily, use_container_width=True, hide_index=True)
+
+for name, frame in (("penjualan_per_item", per_item), ("unit_per_jam", per_hour),
+                    ("metode_pembayaran", mix), ("ringkasan_harian", daily)):
+    st.download_button(f"⬇️ {name}.csv", frame.to_csv(index=False), file_name=f"{name}.csv", mime="text/csv")
@@ -0,0 +1,246 @@
+"""Laporan penjualan dari ledger transaksi dengan rollup harian inkremental.
+
+Contoh:
+    python reports.py export --out laporan
+    python reports.py export --out laporan --start 2025-06-01 --end 2025-06-30
+"""
+import argparse
+import datetime
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ledger import DEFAULT_LEDGER_PATH, connect
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_state (
+    name TEXT PRIMARY KEY,
+    last_rowid INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_totals (
+    day TEXT PRIMARY KEY,
+    transactions INTEGER NOT NULL,
+    revenue INTEGER NOT NULL,
+    units INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_item_sales (
+    day TEXT NOT NULL,
+    menu TEXT NOT NULL,
+    units INTEGER NOT NULL,
+    revenue INTEGER NOT NULL,
+    PRIMARY KEY (day, menu)
+);
+CREATE TABLE IF NOT EXISTS daily_hourly_sales (
+    day TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    transactions INTEGER NOT NULL,
+    units INTEGER NOT NULL,
+    PRIMARY KEY (day, hour)
+);
+CREATE TABLE IF NOT EXISTS daily_payment_mix (
+    day TEXT NOT NULL,
+    payment_method TEXT NOT NULL,
+    transactions INTEGER NOT NULL,
+    revenue INTEGER NOT NULL,
+    PRIMARY KEY (day, payment_method)
+);
+"""
+
+
+def open_reporting(path=None):
+    """Koneksi ke database ledger beserta tabel rollup"""
+    connection = connect(path or os.environ.get("LEDGER_PATH", DEFAULT_LEDGER_PATH))
+    connection.executescript(ROLLUP_SCHEMA)
+    return connection
+
+
+def _watermark(connection, name):
+    row = connection.execute("SELECT last_rowid FROM rollup_state WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def _set_watermark(connection, name, rowid):
+    connection.execute(
+        "INSERT INTO rollup_state VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET last_rowid = excluded.last_rowid",
+        (name, rowid),
+    )
+
+
+def _upsert(connection, table, keys, values, frame):
+    if frame.empty:
+        return
+    columns = keys + values
+    updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in values)
+    connection.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+        f"ON CONFLICT({', '.join(keys)}) DO UPDATE SET {updates}",
+        frame[columns].itertuples(index=False, name=None),
+    )
+
+
+def _combine(*frames):
+    """Gabungkan agregat berindeks sama; kombinasi yang tidak ada bernilai 0"""
+    combined = pd.concat(frames, axis=1).fillna(0)
+    for column in combined.columns:
+        if column != "day":
+            combined[column] = combined[column].astype(np.int64)
+    return combined.reset_index()
+
+
+# === Rollup harian: hanya memindai baris baru sejak refresh terakhir ===
+def refresh_rollups(connection):
+    """Tambahkan transaksi baru ke tabel rollup; kembalikan jumlah transaksi baru"""
+    # BEGIN IMMEDIATE mengunci penulisan sehingga dua refresh bersamaan tidak menghitung ganda
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        last_txn = _watermark(connection, "transactions")
+        last_item = _watermark(connection, "transaction_items")
+
+        txns = pd.read_sql_query(
+            "SELECT rowid, created_at, payment_method, total FROM transactions WHERE rowid > ? ORDER BY rowid",
+            connection, params=(last_txn,),
+        )
+        items = pd.read_sql_query(
+            "SELECT i.rowid, t.created_at, i.menu, i.quantity, i.subtotal FROM transaction_items i "
+            "JOIN transactions t ON t.id = i.transaction_id WHERE i.rowid > ? ORDER BY i.rowid",
+            connection, params=(last_item,),
+        )
+
+        # Kolom waktu "YYYY-MM-DD HH:MM:SS" dipotong secara vektor menjadi hari dan jam
+        for frame in (txns, items):
+            frame["day"] = frame["created_at"].str.slice(0, 10)
+            frame["hour"] = frame["created_at"].str.slice(11, 13).astype(np.int64)
+
+        totals = _combine(
+            txns.groupby("day").agg(transactions=("rowid", "size"), revenue=("total", "sum")),
+            items.groupby("day").agg(units=("quantity", "sum")),
+        )
+        _upsert(connection, "daily_totals", ["day"], ["transactions", "revenue", "units"], totals)
+
+        if not items.empty:
+            per_item = items.groupby(["day", "menu"], sort=False).agg(units=("quantity", "sum"), revenue=("subtotal", "sum"))
+            _upsert(connection, "daily_item_sales", ["day", "menu"], ["units", "revenue"], per_item.reset_index())
+
+        hourly = _combine(
+            txns.groupby(["day", "hour"]).agg(transactions=("rowid", "size")),
+            items.groupby(["day", "hour"]).agg(units=("quantity", "sum")),
+        )
+        _upsert(connection, "daily_hourly_sales", ["day", "hour"], ["transactions", "units"], hourly)
+
+        if not txns.empty:
+            mix = txns.assign(payment_method=txns["payment_method"].fillna("-")).groupby(["day", "payment_method"]).agg(
+                transactions=("rowid", "size"), revenue=("total", "sum"))
+            _upsert(connection, "daily_payment_mix", ["day", "payment_method"], ["transactions", "revenue"], mix.reset_index())
+            _set_watermark(connection, "transactions", int(txns["rowid"].iloc[-1]))
+        if not items.empty:
+            _set_watermark(connection, "transaction_items", int(items["rowid"].iloc[-1]))
+
+        connection.execute("COMMIT")
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    return len(txns)
+
+
+def _read_range(connection, table, start=None, end=None):
+    query = f"SELECT * FROM {table}"
+    params = []
+    if start or end:
+        query += " WHERE day BETWEEN ? AND ?"
+        params = [str(start or "0000-00-00"), str(end or "9999-99-99")]
+    return pd.read_sql_query(query, connection, params=params)
+
+
+# === Laporan dari rollup (semua agregasi tervektorisasi) ===
+def revenue_per_item(connection, start=None, end=None):
+    frame = _read_range(connection, "daily_item_sales", start, end)
+    report = frame.groupby("menu", as_index=False)[["units", "revenue"]].sum()
+    return report.sort_values("revenue", ascending=False, ignore_index=True)
+
+
+def units_per_hour(connection, start=None, end=None):
+    frame = _read_range(connection, "daily_hourly_sales", start, end)
+    days = max(frame["day"].nunique(), 1)
+    report = frame.groupby("hour")[["transactions", "units"]].sum().reindex(np.arange(24), fill_value=0)
+    report["avg_units_per_day"] = report["units"].to_numpy() / days
+    return report.rename_axis("hour").reset_index()
+
+
+def payment_mix(connection, start=None, end=None):
+    frame = _read_range(connection, "daily_payment_mix", start, end)
+    report = frame.groupby("payment_method", as_index=False)[["transactions", "revenue"]].sum()
+    total = report["transactions"].to_numpy().sum()
+    report["share"] = report["transactions"].to_numpy() / total if total else 0.0
+    return report.sort_values("transactions", ascending=False, ignore_index=True)
+
+
+def daily_summary(connection, start=None, end=None):
+    """Ringkasan per hari termasuk rata-rata ukuran keranjang"""
+    report = _read_range(connection, "daily_totals", start, end).sort_values("day", ignore_index=True)
+    transactions = np.maximum(report["transactions"].to_numpy(), 1)
+    report["avg_basket_units"] = report["units"].to_numpy() / transactions
+    report["avg_basket_value"] = report["revenue"].to_numpy() / transactions
+    return report
+
+
+def basket_overview(connection, start=None, end=None):
+    summary = daily_summary(connection, start, end)
+    transactions = int(summary["transactions"].sum())
+    return {
+        "transactions": transactions,
+        "revenue": int(summary["revenue"].sum()),
+        "units": int(summary["units"].sum()),
+        "avg_basket_units": float(summary["units"].sum() / transactions) if transactions else 0.0,
+        "avg_basket_value": float(summary["revenue"].sum() / transactions) if transactions else 0.0,
+    }
+
+
+REPORTS = {
+    "penjualan_per_item": revenue_per_item,
+    "unit_per_jam": units_per_hour,
+    "metode_pembayaran": payment_mix,
+    "ringkasan_harian": daily_summary,
+}
+
+
+def export_csv(connection, out_dir, start=None, end=None):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for name, report in REPORTS.items():
+        path = out_dir / f"{name}.csv"
+        report(connection, start, end).to_csv(path, index=False)
+        written.append(path)
+    return written
+
+
+def _date(value):
+    return datetime.date.fromisoformat(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Laporan penjualan Mc Ronald Drive-Thru")
+    parser.add_argument("--db", default=None, help="Lokasi database ledger (default: LEDGER_PATH atau transactions.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Ekspor laporan ke CSV")
+    export.add_argument("--out", required=True, type=Path)
+    export.add_argument("--start", type=_date)
+    export.add_argument("--end", type=_date)
+    args = parser.parse_args(argv)
+
+    connection = open_reporting(args.db)
+    try:
+        new_transactions = refresh_rollups(connection)
+        print(f"Rollup diperbarui: {new_transactions} transaksi baru")
+        for path in export_csv(connection, args.out, args.start, args.end):
+            print(f"Ditulis: {path}")
+    finally:
+        connection.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
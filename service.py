@@ -0,0 +1,583 @@
+"""Service pesanan headless berbasis asyncio untuk banyak lane drive-thru.
+
+API HTTP lokal (JSON):
+    POST   /lanes                      buat lane baru
+    GET    /lanes/<id>                 status lane dan keranjang
+    DELETE /lanes/<id>                 tutup lane
+    POST   /lanes/<id>/text            {"text": "..."} -> item ditambahkan
+    POST   /lanes/<id>/audio           WAV atau PCM16 mono 16kHz -> transkripsi + item
+    POST   /lanes/<id>/items           {"item": "burger", "quantity": 2} atau {"item": ..., "delta": -1}
+    POST   /lanes/<id>/checkout        ordering -> payment
+    POST   /lanes/<id>/back            payment -> ordering
+    POST   /lanes/<id>/pay             {"method": "Cash", "cash_received": 50000}
+    GET    /lanes/<id>/receipt         struk transaksi yang selesai
+    POST   /lanes/<id>/new             mulai pesanan baru
+    GET    /health
+    GET    /metrics                    metrik pipeline (format teks Prometheus)
+    GET    /metrics.json               metrik pipeline (JSON)
+
+Contoh:
+    python service.py serve --port 8765
+    python service.py loadgen --lanes 16 --orders 20
+    python service.py loadgen --lanes 4 --audio --url http://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import functools
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import urllib.parse
+from pathlib import Path
+
+import metrics
+from audio_io import SAMPLE_RATE, load_wav, pcm16_to_float, resample
+from lane import LaneError, LaneSession, build_asr_stack
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+HTTP_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                409: "Conflict", 413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error",
+                503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def decode_audio(body, content_type, sample_rate=SAMPLE_RATE):
+    """Body request audio menjadi array float32 16kHz (WAV, atau PCM16 mentah)"""
+    if content_type in ("audio/wav", "audio/x-wav", "audio/wave") or body[:4] == b"RIFF":
+        return load_wav(io.BytesIO(body))
+    return resample(pcm16_to_float(body), sample_rate)
+
+
+# === Inti service: kumpulan lane dan antarmuka ke penjadwal ASR ===
+class OrderService:
+    """Kelola banyak `LaneSession` di satu event loop.
+
+    Aksi lane berjalan langsung di event loop (murah dan tanpa I/O). Inferensi
+    diserahkan ke `WhisperBatchScheduler` di thread-nya sendiri dan ditunggu
+    lewat `asyncio.wrap_future`, sedangkan decoding audio dijalankan di
+    executor, sehingga event loop tidak pernah terblokir oleh ASR.
+    """
+
+    def __init__(self, ledger=None, asr_loader=None, max_lanes=256, submit_timeout=5.0):
+        self.ledger = ledger
+        self.asr_loader = asr_loader
+        self.max_lanes = max_lanes
+        self.lanes = {}
+        # Batas tunggu slot antrean ASR; lewat batas ini request ditolak dengan 503
+        self.submit_timeout = submit_timeout
+
+    def create_lane(self, lane_id=None):
+        if len(self.lanes) >= self.max_lanes:
+            raise HttpError(429, f"Jumlah lane maksimum ({self.max_lanes}) tercapai")
+        if lane_id in self.lanes:
+            raise HttpError(409, f"Lane {lane_id} sudah ada")
+        lane = LaneSession(lane_id, ledger=self.ledger)
+        self.lanes[lane.lane_id] = lane
+        return lane
+
+    def get_lane(self, lane_id):
+        lane = self.lanes.get(lane_id)
+        if lane is None:
+            raise HttpError(404, f"Lane {lane_id} tidak ditemukan")
+        return lane
+
+    def close_lane(self, lane_id):
+        self.get_lane(lane_id)
+        del self.lanes[lane_id]
+
+    def _scheduler(self):
+        if self.asr_loader is None:
+            raise HttpError(503, "Service dijalankan tanpa ASR (--no-asr)")
+        if self.asr_loader.failed:
+            raise HttpError(503, f"Model suara gagal dimuat: {self.asr_loader.error}")
+        if not self.asr_loader.ready:
+            raise HttpError(503, f"Model suara sedang dimuat ({self.asr_loader.current_phase})")
+        return self.asr_loader.result
+
+    async def transcribe(self, body, content_type, sample_rate=SAMPLE_RATE):
+        scheduler = self._scheduler()
+        loop = asyncio.get_running_loop()
+        audio = await loop.run_in_executor(None, decode_audio, body, content_type, sample_rate)
+        # submit() bisa menunggu slot antrean (backpressure pool proses), jadi dipanggil di executor
+        started = time.perf_counter()
+        try:
+            future = await loop.run_in_executor(None, functools.partial(scheduler.submit, audio, timeout=self.submit_timeout))
+            transcription = await asyncio.wrap_future(future)
+        except RuntimeError as e:
+            metrics.increment("recognition_failures")
+            raise HttpError(503, str(e))
+        metrics.observe("transcribe", time.perf_counter() - started)
+        return transcription
+
+    def health(self):
+        health = {"lanes": len(self.lanes), "asr": None, "scheduler": None}
+        if self.ledger is not None:
+            health["ledger"] = self.ledger.summary()
+        if self.asr_loader is not None:
+            health["asr"] = self.asr_loader.report()
+            if self.asr_loader.ready:
+                backend = self.asr_loader.result
+                health["scheduler"] = backend.stats.summary()
+                if hasattr(backend, "summary"):
+                    health["pool"] = backend.summary()
+        return health
+
+
+# === Handler per endpoint ===
+def _json_body(request):
+    try:
+        data = json.loads(request["body"] or b"{}")
+    except ValueError:
+        raise HttpError(400, "Body harus berupa JSON")
+    if not isinstance(data, dict):
+        raise HttpError(400, "Body harus berupa objek JSON")
+    return data
+
+
+def _added(added):
+    return [{"menu": name, "quantity": qty} for name, qty in added]
+
+
+async def _create_lane(service, request):
+    lane = service.create_lane(_json_body(request).get("lane_id"))
+    return 201, lane.snapshot()
+
+
+async def _get_lane(service, request, lane_id):
+    return 200, service.get_lane(lane_id).snapshot()
+
+
+async def _close_lane(service, request, lane_id):
+    service.close_lane(lane_id)
+    return 200, {"closed": lane_id}
+
+
+async def _text(service, request, lane_id):
+    lane = service.get_lane(lane_id)
+    text = _json_body(request).get("text", "")
+    if not isinstance(text, str):
+        raise HttpError(400, "Field 'text' harus berupa string")
+    added = lane.apply_text(text)
+    return 200, {"transcription": text, "added": _added(added), "lane": lane.snapshot()}
+
+
+async def _audio(service, request, lane_id):
+    lane = service.get_lane(lane_id)
+    lane.require_stage("ordering")
+    sample_rate = int(request["query"].get("sample_rate", SAMPLE_RATE))
+    started = time.perf_counter()
+    transcription = await service.transcribe(request["body"], request["headers"].get("content-type"), sample_rate)
+    added = lane.apply_text(transcription)
+    return 200, {
+        "transcription": transcription,
+        "added": _added(added),
+        "asr_ms": round((time.perf_counter() - started) * 1000, 1),
+        "lane": lane.snapshot(),
+    }
+
+
+def _number_field(data, name, cast=int, default=None, required=False):
+    """Ambil field angka dari body JSON; 400 jika bukan angka"""
+    value = data.get(name, default)
+    if value is None and not required:
+        return None
+    if isinstance(value, bool):
+        raise HttpError(400, f"Field '{name}' harus berupa angka")
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise HttpError(400, f"Field '{name}' harus berupa angka")
+
+
+async def _items(service, request, lane_id):
+    lane = service.get_lane(lane_id)
+    lane.require_stage("ordering")
+    data = _json_body(request)
+    item = data.get("item")
+    if not item or not isinstance(item, str):
+        raise HttpError(400, "Field 'item' wajib diisi")
+    # Alias ("burger") diterjemahkan ke nama menu di keranjang ("🍔 Burger"); item yang sudah
+    # tidak ada di katalog (hot-reload) tetap bisa diubah lewat nama menunya
+    menu_item = lane.catalog.lookup(item)
+    name = menu_item.name if menu_item is not None else item
+    in_order = lane.order.quantity_of(name) > 0
+    if menu_item is None and not in_order:
+        raise HttpError(404, f"Item tidak dikenal: {item}")
+
+    if "quantity" in data:
+        quantity = _number_field(data, "quantity", required=True)
+        if in_order:
+            lane.set_quantity(name, quantity)
+        elif quantity > 0:
+            lane.add_item(name, quantity)
+    else:
+        delta = _number_field(data, "delta", default=1, required=True)
+        if delta > 0 and not in_order:
+            lane.add_item(name, delta)
+        else:
+            lane.change_quantity(name, delta)
+    return 200, lane.snapshot()
+
+
+async def _checkout(service, request, lane_id):
+    lane = service.get_lane(lane_id)
+    lane.checkout()
+    return 200, lane.snapshot()
+
+
+async def _back(service, request, lane_id):
+    lane = service.get_lane(lane_id)
+    lane.back_to_ordering()
+    return 200, lane.snapshot()
+
+
+async def _pay(service, request, lane_id):
+    lane = service.get_lane(lane_id)
+    data = _json_body(request)
+    lane.pay(data.get("method", "Cash"), _number_field(data, "cash_received", cast=float))
+    return 200, {"transaction_id": lane.transaction_id, "receipt": lane.receipt(), "lane": lane.snapshot()}
+
+
+async def _receipt(service, request, lane_id):
+    lane = service.get_lane(lane_id)
+    return 200, {"transaction_id": lane.transaction_id, "receipt": lane.receipt()}
+
+
+async def _new_order(service, request, lane_id):
+    lane = service.get_lane(lane_id)
+    lane.new_order()
+    return 200, lane.snapshot()
+
+
+async def _health(service, request):
+    return 200, service.health()
+
+
+async def _metrics(service, request):
+    return 200, metrics.REGISTRY.prometheus_text()
+
+
+async def _metrics_json(service, request):
+    return 200, metrics.REGISTRY.snapshot()
+
+
+ROUTES = [
+    ("POST", re.compile(r"^/lanes$"), _create_lane),
+    ("GET", re.compile(r"^/lanes/(\w+)$"), _get_lane),
+    ("DELETE", re.compile(r"^/lanes/(\w+)$"), _close_lane),
+    ("POST", re.compile(r"^/lanes/(\w+)/text$"), _text),
+    ("POST", re.compile(r"^/lanes/(\w+)/audio$"), _audio),
+    ("POST", re.compile(r"^/lanes/(\w+)/items$"), _items),
+    ("POST", re.compile(r"^/lanes/(\w+)/checkout$"), _checkout),
+    ("POST", re.compile(r"^/lanes/(\w+)/back$"), _back),
+    ("POST", re.compile(r"^/lanes/(\w+)/pay$"), _pay),
+    ("GET", re.compile(r"^/lanes/(\w+)/receipt$"), _receipt),
+    ("POST", re.compile(r"^/lanes/(\w+)/new$"), _new_order),
+    ("GET", re.compile(r"^/health$"), _health),
+    ("GET", re.compile(r"^/metrics$"), _metrics),
+    ("GET", re.compile(r"^/metrics\.json$"), _metrics_json),
+]
+
+
+async def dispatch(service, request):
+    path_matched = False
+    for method, pattern, handler in ROUTES:
+        match = pattern.match(request["path"])
+        if match is None:
+            continue
+        path_matched = True
+        if method == request["method"]:
+            return await handler(service, request, *match.groups())
+    if path_matched:
+        raise HttpError(405, f"Metode {request['method']} tidak didukung untuk {request['path']}")
+    raise HttpError(404, f"Endpoint {request['path']} tidak ditemukan")
+
+
+# === Server HTTP/1.1 minimal (keep-alive) di atas asyncio streams ===
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Request line tidak valid")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, f"Body lebih dari {MAX_BODY_BYTES} byte")
+    body = await reader.readexactly(length) if length else b""
+
+    url = urllib.parse.urlsplit(target)
+    return {
+        "method": method.upper(),
+        "path": url.path.rstrip("/") or "/",
+        "query": dict(urllib.parse.parse_qsl(url.query)),
+        "headers": headers,
+        "body": body,
+    }
+
+
+def _write_response(writer, status, payload, keep_alive):
+    # Payload string dikirim apa adanya sebagai teks (mis. format eksposisi Prometheus)
+    if isinstance(payload, str):
+        body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+    head = (
+        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+
+
+async def handle_connection(service, reader, writer):
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                keep_alive = request["headers"].get("connection", "keep-alive").lower() != "close"
+                status, payload = await dispatch(service, request)
+            except HttpError as e:
+                status, payload = e.status, {"error": str(e)}
+            except LaneError as e:
+                status, payload = 409, {"error": str(e)}
+            except (ValueError, TypeError) as e:
+                status, payload = 400, {"error": str(e)}
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            _write_response(writer, status, payload, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(service, host="127.0.0.1", port=8765):
+    return await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port)
+
+
+# === Klien HTTP minimal untuk load generator ===
+class ServiceClient:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method, path, payload=None, body=None, content_type="application/json"):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if payload is not None:
+            body = json.dumps(payload).encode("utf-8")
+        body = body or b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        self._writer.write(head.encode("latin-1") + body)
+        await self._writer.drain()
+
+        status = int((await self._reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        raw = await self._reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("content-type", "").startswith("application/json"):
+            data = json.loads(raw or b"null")
+        else:
+            # Endpoint teks seperti /metrics
+            data = raw.decode("utf-8")
+        if headers.get("connection") == "close":
+            await self.close()
+        return status, data
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+# === Load generator: N lane konkuren memutar ulang fixture lokal ===
+def load_utterances(audio=False):
+    """Daftar (jenis, payload) dari corpus teks atau rekaman WAV di fixtures"""
+    from benchmarks.run_benchmarks import CORPUS_PATH, FIXTURES_DIR, load_json
+
+    if not audio:
+        return [("text", entry["text"]) for entry in load_json(CORPUS_PATH)]
+    manifest = load_json(FIXTURES_DIR / "manifest.json")
+    files = [FIXTURES_DIR / entry["file"] for entry in manifest if (FIXTURES_DIR / entry["file"]).exists()]
+    return [("audio", path.read_bytes()) for path in files]
+
+
+async def _run_lane(client, index, utterances, orders, stats):
+    status, lane = await client.request("POST", "/lanes", {})
+    if status != 201:
+        raise RuntimeError(f"Gagal membuat lane: {lane}")
+    lane_id = lane["lane_id"]
+
+    async def timed(kind, *args, **kwargs):
+        started = time.perf_counter()
+        status, data = await client.request(*args, **kwargs)
+        stats["requests"].setdefault(kind, []).append(time.perf_counter() - started)
+        # 409 pada checkout berarti ucapan tanpa item (dihitung terpisah), bukan error service
+        if status >= 400 and not (kind == "checkout" and status == 409):
+            stats["errors"] += 1
+        return status, data
+
+    for number in range(orders):
+        kind, payload = utterances[(index + number) % len(utterances)]
+        started = time.perf_counter()
+        if kind == "audio":
+            await timed("audio", "POST", f"/lanes/{lane_id}/audio", body=payload, content_type="audio/wav")
+        else:
+            await timed("text", "POST", f"/lanes/{lane_id}/text", {"text": payload})
+        status, _ = await timed("checkout", "POST", f"/lanes/{lane_id}/checkout", {})
+        if status == 200:
+            await timed("pay", "POST", f"/lanes/{lane_id}/pay", {"method": "E-Wallet"})
+            stats["orders"].append(time.perf_counter() - started)
+        else:
+            # Tidak ada item yang dikenali: order tidak bisa dibayar
+            stats["empty_orders"] += 1
+        await timed("new", "POST", f"/lanes/{lane_id}/new", {})
+
+    await client.request("DELETE", f"/lanes/{lane_id}")
+    await client.close()
+
+
+async def run_load(host, port, lanes, orders, utterances):
+    from benchmarks.run_benchmarks import percentiles
+
+    stats = {"orders": [], "requests": {}, "errors": 0, "empty_orders": 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _run_lane(ServiceClient(host, port), index, utterances, orders, stats) for index in range(lanes)
+    ))
+    elapsed = time.perf_counter() - started
+    return {
+        "lanes": lanes,
+        "orders": len(stats["orders"]),
+        "empty_orders": stats["empty_orders"],
+        "errors": stats["errors"],
+        "elapsed_seconds": round(elapsed, 3),
+        "orders_per_sec": len(stats["orders"]) / elapsed if elapsed else 0.0,
+        "order_latency_ms": percentiles(stats["orders"]),
+        "request_latency_ms": {kind: percentiles(samples) for kind, samples in stats["requests"].items()},
+    }
+
+
+def _make_asr_loader():
+    from background_loader import BackgroundLoader
+    return BackgroundLoader(build_asr_stack, name="asr-loader")
+
+
+async def _serve(args):
+    from ledger import TransactionLedger
+
+    service = OrderService(TransactionLedger(args.db), None if args.no_asr else _make_asr_loader(), args.max_lanes)
+    if os.environ.get("PIPELINE_METRICS_DIR") and metrics.REGISTRY.enabled:
+        metrics.REGISTRY.start_file_export(os.environ["PIPELINE_METRICS_DIR"])
+    server = await start_server(service, args.host, args.port)
+    print(f"Service pesanan berjalan di http://{args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+async def _loadgen(args):
+    utterances = load_utterances(args.audio)
+    if not utterances:
+        print("Tidak ada rekaman WAV di benchmarks/fixtures; jalankan tanpa --audio untuk memakai corpus teks",
+              file=sys.stderr)
+        return 1
+
+    if args.url:
+        url = urllib.parse.urlsplit(args.url)
+        results = await run_load(url.hostname, url.port or 80, args.lanes, args.orders, utterances)
+    else:
+        # Service dijalankan di proses yang sama dengan ledger sementara agar laporan penjualan tidak tercemar
+        from ledger import TransactionLedger
+
+        asr_loader = _make_asr_loader() if args.audio else None
+        if asr_loader is not None:
+            await asyncio.get_running_loop().run_in_executor(None, asr_loader.wait)
+        with tempfile.TemporaryDirectory() as tmp:
+            ledger = TransactionLedger(str(Path(tmp) / "loadgen.db"))
+            service = OrderService(ledger, asr_loader, max_lanes=max(args.lanes, 1))
+            server = await start_server(service, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                results = await run_load("127.0.0.1", port, args.lanes, args.orders, utterances)
+            finally:
+                server.close()
+                await server.wait_closed()
+                ledger.close()
+            if asr_loader is not None:
+                results["scheduler"] = asr_loader.result.stats.summary()
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service pesanan headless Mc Ronald Drive-Thru")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Jalankan API HTTP lokal")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--db", default=None, help="Lokasi database ledger (default: LEDGER_PATH atau transactions.db)")
+    serve.add_argument("--max-lanes", type=int, default=256)
+    serve.add_argument("--no-asr", action="store_true", help="Hanya terima teks; model Whisper tidak dimuat")
+
+    loadgen = commands.add_parser("loadgen", help="Ukur orders/detik dan latensi p99 pada N lane")
+    loadgen.add_argument("--lanes", type=int, default=8)
+    loadgen.add_argument("--orders", type=int, default=20, help="Jumlah order per lane")
+    loadgen.add_argument("--audio", action="store_true", help="Putar ulang WAV di benchmarks/fixtures, bukan corpus teks")
+    loadgen.add_argument("--url", help="Service yang sudah berjalan; default menjalankan service di proses ini")
+    loadgen.add_argument("--output", type=Path, help="Simpan hasil sebagai JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "serve":
+            asyncio.run(_serve(args))
+            return 0
+        return asyncio.run(_loadgen(args))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import re
+import time
+
+import numpy as np
+
+from audio_io import SAMPLE_RATE
+
+
+def _normalize_word(word):
+    return re.sub(r"[^\w]", "", word.lower())
+
+
+def merge_overlapping_words(words, new_words, max_overlap=4):
+    """Gabungkan kata baru, buang awalan yang sama dengan akhir teks sebelumnya.
+
+    Kata pertama potongan baru sering terpotong di awal jendela overlap dan
+    salah dikenali, sehingga untuk overlap dua kata atau lebih kata itu boleh
+    berbeda selama sisa overlap cocok.
+    """
+    existing = [_normalize_word(w) for w in words[-max_overlap:]]
+    incoming = [_normalize_word(w) for w in new_words[:max_overlap]]
+    for size in range(min(len(existing), len(incoming)), 0, -1):
+        tail, head = existing[-size:], incoming[:size]
+        if tail == head or (size > 1 and tail[1:] == head[1:]):
+            return words + new_words[size:]
+    return words + new_words
+
+
+# === Transkripsi streaming dengan potongan yang saling tumpang tindih ===
+class StreamingTranscriber:
+    """Transkripsi audio per potongan sambil audio masih masuk.
+
+    Setiap potongan `chunk_seconds` dikirim ke `submit_fn` (mengembalikan
+    Future) bersama `overlap_seconds` audio sebelumnya agar kata di batas
+    potongan tidak terpotong. Potongan yang sudah selesai bersifat final,
+    sehingga `finish()` hanya perlu men-decode sisa audio di ekor.
+    """
+
+    def __init__(self, submit_fn, sample_rate=SAMPLE_RATE, chunk_seconds=1.5, overlap_seconds=0.5, min_tail_seconds=0.2):
+        self.submit_fn = submit_fn
+        self.sample_rate = sample_rate
+        self.chunk_samples = int(chunk_seconds * sample_rate)
+        self.overlap_samples = int(overlap_seconds * sample_rate)
+        self.min_tail_samples = int(min_tail_seconds * sample_rate)
+        self._chunks = []
+        self._num_samples = 0
+        self._submitted_until = 0
+        self._pending = []
+        self._words = []
+        self.started_at = time.perf_counter()
+
+    @property
+    def text(self):
+        return " ".join(self._words)
+
+    def _audio(self):
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0] if self._chunks else np.zeros(0, dtype=np.float32)
+
+    def _submit_window(self, end):
+        start = max(0, self._submitted_until - self.overlap_samples)
+        window = self._audio()[start:end]
+        self._pending.append(self.submit_fn(window))
+        self._submitted_until = end
+
+    def feed(self, samples):
+        """Tambahkan audio baru; kirim potongan ke model setiap kali cukup panjang"""
+        self._chunks.append(samples)
+        self._num_samples += len(samples)
+        while self._num_samples - self._submitted_until >= self.chunk_samples:
+            self._submit_window(self._submitted_until + self.chunk_samples)
+
+    def poll(self):
+        """Gabungkan hasil potongan yang sudah selesai secara berurutan. True jika teks berubah"""
+        changed = False
+        while self._pending and self._pending[0].done():
+            self._merge(self._pending.pop(0).result())
+            changed = True
+        return changed
+
+    def finish(self):
+        """Decode hanya ekor audio yang belum dikirim, lalu kembalikan teks final"""
+        if self._num_samples - self._submitted_until >= self.min_tail_samples:
+            self._submit_window(self._num_samples)
+        while self._pending:
+            self._merge(self._pending.pop(0).result())
+        return self.text
+
+    def _merge(self, transcription):
+        self._words = merge_overlapping_words(self._words, transcription.split())
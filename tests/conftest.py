@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modul aplikasi berada di root repo (bukan paket), jadi root ditambahkan ke sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
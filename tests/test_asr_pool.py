@@ -0,0 +1,83 @@
+import os
+import time
+
+import pytest
+
+from asr_pool import ASRProcessPool
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="pool ASR memakai fork")
+
+
+def echo(processor, model, batch):
+    return [f"teks {audio}" if isinstance(audio, str) else "" for audio in batch]
+
+
+def drops_last(processor, model, batch):
+    return echo(processor, model, batch)[:-1] if batch and isinstance(batch[0], str) else echo(processor, model, batch)
+
+
+def slow_or_crash(processor, model, batch):
+    for audio in batch:
+        if isinstance(audio, str) and audio == "crash":
+            os._exit(3)
+        if isinstance(audio, str) and audio == "slow":
+            time.sleep(0.5)
+    return echo(processor, model, batch)
+
+
+def make_pool(transcribe_fn, **kwargs):
+    kwargs.setdefault("num_workers", 1)
+    return ASRProcessPool(None, None, transcribe_fn=transcribe_fn, start_timeout=30, stop_timeout=2, **kwargs)
+
+
+def test_results_come_back_in_order():
+    pool = make_pool(echo, num_workers=2)
+    try:
+        futures = [pool.submit(str(i)) for i in range(6)]
+        assert [future.result(timeout=10) for future in futures] == [f"teks {i}" for i in range(6)]
+        assert pool.transcribe("x", timeout=10) == "teks x"
+    finally:
+        pool.close()
+
+
+def test_short_result_list_fails_the_batch():
+    pool = make_pool(drops_last)
+    try:
+        with pytest.raises(RuntimeError, match="0 hasil untuk 1 audio"):
+            pool.transcribe("a", timeout=10)
+        assert pool.queue_depth == 0
+    finally:
+        pool.close()
+
+
+def test_cancelled_request_does_not_stop_the_supervisor():
+    pool = make_pool(slow_or_crash, max_queue=2)
+    try:
+        future = pool.submit("slow")
+        assert future.cancel()
+        # Slot milik request yang dibatalkan tetap dilepas sehingga antrean tidak bocor
+        assert [pool.transcribe(str(i), timeout=10) for i in range(3)] == ["teks 0", "teks 1", "teks 2"]
+    finally:
+        pool.close()
+
+
+def test_crashed_worker_is_replaced():
+    pool = make_pool(slow_or_crash)
+    try:
+        with pytest.raises(RuntimeError, match="berhenti"):
+            pool.transcribe("crash", timeout=10)
+        assert pool.transcribe("lagi", timeout=30) == "teks lagi"
+        assert pool.summary()["restarts"] == 1 and pool.crashed_requests == 1
+    finally:
+        pool.close()
+
+
+def test_recycled_workers_are_stopped_on_close():
+    pool = make_pool(echo, max_tasks_per_worker=1)
+    results = [pool.transcribe(str(i), timeout=30) for i in range(3)]
+    pool.close()
+
+    assert results == ["teks 0", "teks 1", "teks 2"]
+    assert pool.restarts >= 2
+    assert not pool._supervisor.is_alive()
+    assert not any(worker.process.is_alive() for worker in pool._workers.values())
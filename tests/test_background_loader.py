@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+from background_loader import BackgroundLoader
+
+
+def test_wait_returns_result_and_records_phases():
+    def build(phase):
+        with phase("model"):
+            pass
+        return "siap"
+
+    loader = BackgroundLoader(build)
+    assert loader.wait(5) == "siap"
+    assert loader.ready and not loader.failed
+    report = loader.report()
+    assert report["status"] == "siap" and "model" in report["phases"]
+
+
+def test_wait_propagates_build_error():
+    def build(phase):
+        with phase("model"):
+            raise RuntimeError("model rusak")
+
+    loader = BackgroundLoader(build)
+    with pytest.raises(RuntimeError, match="model rusak"):
+        loader.wait(5)
+    assert loader.failed and not loader.ready
+    assert loader.report()["status"] == "gagal"
+
+
+def test_wait_raises_timeout_while_still_loading():
+    release = threading.Event()
+
+    def build(phase):
+        with phase("model"):
+            release.wait(5)
+        return "siap"
+
+    loader = BackgroundLoader(build)
+    try:
+        with pytest.raises(TimeoutError, match="model"):
+            loader.wait(0.05)
+        assert not loader.ready and loader.report()["status"] == "model"
+    finally:
+        release.set()
+    assert loader.wait(5) == "siap"
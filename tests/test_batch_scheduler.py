@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from batch_scheduler import WhisperBatchScheduler
+
+
+def echo(processor, model, batch):
+    return [f"teks {audio}" for audio in batch]
+
+
+def test_requests_are_batched_and_resolved_in_order():
+    scheduler = WhisperBatchScheduler(None, None, max_batch_size=4, max_wait_ms=50, transcribe_fn=echo)
+    futures = [scheduler.submit(i) for i in range(6)]
+
+    assert [future.result(timeout=5) for future in futures] == [f"teks {i}" for i in range(6)]
+    assert scheduler.stats.summary()["total_requests"] == 6
+    scheduler.close()
+
+
+def test_short_result_list_fails_the_whole_batch():
+    def drops_last(processor, model, batch):
+        return echo(processor, model, batch)[:-1]
+
+    scheduler = WhisperBatchScheduler(None, None, max_batch_size=2, max_wait_ms=200, transcribe_fn=drops_last)
+    futures = [scheduler.submit(i) for i in range(2)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="1 hasil untuk 2 audio"):
+            future.result(timeout=5)
+    assert scheduler.stats.summary()["failed_batches"] == 1
+    scheduler.close()
+
+
+def test_submit_after_close_is_rejected_and_pending_requests_finish():
+    release = threading.Event()
+
+    def slow(processor, model, batch):
+        release.wait(5)
+        return echo(processor, model, batch)
+
+    scheduler = WhisperBatchScheduler(None, None, max_batch_size=1, max_wait_ms=0, transcribe_fn=slow)
+    futures = [scheduler.submit(i) for i in range(3)]
+    closer = threading.Thread(target=scheduler.close)
+    closer.start()
+    release.set()
+    closer.join(5)
+
+    assert [future.result(timeout=0) for future in futures] == ["teks 0", "teks 1", "teks 2"]
+    with pytest.raises(RuntimeError, match="ditutup"):
+        scheduler.submit(3)
+
+
+def test_cancelled_future_does_not_kill_the_worker():
+    release = threading.Event()
+
+    def slow(processor, model, batch):
+        release.wait(5)
+        return echo(processor, model, batch)
+
+    scheduler = WhisperBatchScheduler(None, None, max_batch_size=1, max_wait_ms=0, transcribe_fn=slow)
+    first = scheduler.submit(0)
+    cancelled = scheduler.submit(1)
+    assert cancelled.cancel()
+    release.set()
+
+    assert first.result(timeout=5) == "teks 0"
+    assert scheduler.submit(2).result(timeout=5) == "teks 2"
+    scheduler.close()
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+import batch_transcribe
+from batch_transcribe import Progress, ResultWriter, iter_clips, iter_json_array, reparse_archive
+
+
+def write_lines(path, lines):
+    path.write_text("".join(lines), encoding="utf-8")
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_resume_drops_error_records_and_partial_line(tmp_path):
+    output = tmp_path / "hasil.jsonl"
+    write_lines(output, [
+        json.dumps({"file": "a.wav", "transcription": "dua burger"}) + "\n",
+        json.dumps({"file": "b.wav", "error": "timeout"}) + "\n",
+        '{"file": "c.wav", "transcr',
+    ])
+
+    writer = ResultWriter(output)
+    assert writer.is_done("a.wav") and not writer.is_done("b.wav") and not writer.is_done("c.wav")
+    writer.write({"file": "b.wav", "transcription": "satu cola"})
+    writer.close()
+
+    assert [record["file"] for record in read_records(output)] == ["a.wav", "b.wav"]
+    assert all("error" not in record for record in read_records(output))
+
+
+def test_resume_without_errors_keeps_file_untouched(tmp_path):
+    output = tmp_path / "hasil.jsonl"
+    content = json.dumps({"file": "a.wav", "transcription": "dua burger"}) + "\n"
+    write_lines(output, [content])
+
+    ResultWriter(output).close()
+    assert output.read_text(encoding="utf-8") == content
+
+
+def test_reparse_keeps_one_record_per_file(tmp_path):
+    source = tmp_path / "lama.jsonl"
+    output = tmp_path / "baru.jsonl"
+    write_lines(source, [
+        json.dumps({"file": "a.wav", "error": "timeout"}) + "\n",
+        json.dumps({"file": "b.wav", "error": "rusak"}) + "\n",
+        json.dumps({"file": "a.wav", "transcription": "dua burger"}) + "\n",
+    ])
+
+    writer = ResultWriter(output)
+    reparse_archive(source, writer, Progress(interval=3600))
+    writer.close()
+
+    records = {record["file"]: record for record in read_records(output)}
+    assert len(read_records(output)) == 2
+    assert records["a.wav"]["items"] == {"burger": 2}
+    assert records["b.wav"]["error"] == "rusak"
+
+
+def test_reparse_rejects_output_equal_to_input(tmp_path):
+    records = tmp_path / "hasil.jsonl"
+    content = json.dumps({"file": "a.wav", "transcription": "dua burger"}) + "\n"
+    write_lines(records, [content])
+
+    with pytest.raises(SystemExit):
+        batch_transcribe.main(["--reparse", str(records), "--output", str(tmp_path / "." / "hasil.jsonl"),
+                               "--no-resume"])
+    assert records.read_text(encoding="utf-8") == content
+
+
+def test_json_manifest_is_streamed_across_chunks(tmp_path):
+    entries = [{"file": f"klip_{i}.wav", "expected": {"burger": i}} for i in range(50)] + ["polos.wav"]
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps(entries, indent=2), encoding="utf-8")
+
+    with open(manifest, encoding="utf-8") as f:
+        assert list(iter_json_array(f, chunk_size=7)) == entries
+    clips = list(iter_clips(manifest))
+    assert clips[0] == {"file": str(tmp_path / "klip_0.wav"), "expected": {"burger": 0}}
+    assert clips[-1] == {"file": str(tmp_path / "polos.wav")}
+
+
+@pytest.mark.parametrize("content", ['{"file": "a.wav"}', '[{"file": "a.wav"}', '[{"file": "a.wav"} {"file": "b.wav"}]'])
+def test_invalid_json_manifest_is_rejected(tmp_path, content):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(content, encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_clips(manifest))
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from capture import CaptureService, FileSource, NoiseFloorVAD, RingBuffer
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+
+def test_ring_buffer_reads_across_wraparound():
+    buffer = RingBuffer(8)
+    buffer.write(np.arange(6, dtype=np.float32))
+    buffer.write(np.arange(6, 11, dtype=np.float32))
+
+    assert buffer.total_written == 11
+    np.testing.assert_array_equal(buffer.read(5, 11), [5, 6, 7, 8, 9, 10])
+    # Sampel yang sudah tertimpa dibuang, bukan dibaca sebagai data lama
+    np.testing.assert_array_equal(buffer.read(0, 4), [3])
+    assert len(buffer.read(11, 20)) == 0
+
+
+def test_ring_buffer_write_larger_than_capacity_keeps_tail():
+    buffer = RingBuffer(4)
+    buffer.write(np.arange(10, dtype=np.float32))
+
+    np.testing.assert_array_equal(buffer.read(0, 10), [6, 7, 8, 9])
+
+
+def run_vad(vad, energies):
+    return [event for event in map(vad.update, energies) if event]
+
+
+def test_vad_emits_start_and_end_for_speech():
+    vad = NoiseFloorVAD(FRAME_MS, hangover_ms=300, min_speech_ms=200)
+    energies = [-60.0] * 20 + [-30.0] * 20 + [-60.0] * 20
+
+    assert run_vad(vad, energies) == ["start", "end"]
+    assert vad.noise_floor_db == pytest.approx(-60.0)
+
+
+def test_vad_discards_short_bursts():
+    vad = NoiseFloorVAD(FRAME_MS, hangover_ms=300, min_speech_ms=200)
+    energies = [-60.0] * 20 + [-30.0] * 4 + [-60.0] * 20
+
+    assert run_vad(vad, energies) == ["discard"]
+
+
+def test_vad_adapts_to_permanent_noise_step():
+    vad = NoiseFloorVAD(FRAME_MS, hangover_ms=300, max_utterance_ms=600)
+    energies = [-60.0] * 20 + [-40.0] * 200
+
+    # Sekali terpotong panjang maksimum, noise floor naik dan bising baru tidak memicu ucapan lagi
+    assert run_vad(vad, energies) == ["start", "end"]
+    assert vad.noise_floor_db == pytest.approx(-40.0)
+    assert not vad.in_speech
+
+
+def test_capture_service_segment_includes_pre_roll():
+    rng = np.random.default_rng(0)
+    silence = rng.normal(0, 0.001, SAMPLE_RATE).astype(np.float32)
+    speech = (0.3 * np.sin(2 * np.pi * 220 * np.arange(SAMPLE_RATE) / SAMPLE_RATE)).astype(np.float32)
+    segments = []
+    capture = CaptureService(FileSource(np.concatenate([silence, speech]), SAMPLE_RATE, FRAME_MS),
+                             pre_roll_ms=300, vad=NoiseFloorVAD(FRAME_MS), on_segment=segments.append)
+
+    capture.start()
+    capture._thread.join(5)
+
+    assert capture.last_error is None
+    assert len(segments) == 1
+    # Ucapan 1 detik + pre-roll 300 ms + hangover, tanpa seluruh hening di awal
+    assert SAMPLE_RATE * 1.3 <= len(segments[0]) < SAMPLE_RATE * 2.2
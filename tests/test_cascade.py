@@ -0,0 +1,92 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from cascade import CascadeRecognizer
+
+
+class QueueFull(RuntimeError):
+    """Pengganti `asr_pool.ASRQueueFull` (modul itu butuh torch)"""
+
+
+class FakeScheduler:
+    """Selesaikan Future di thread terpisah seperti thread penjadwal batch"""
+
+    def __init__(self, output=None, error=None, reject=None):
+        self.output = output
+        self.error = error
+        self.reject = reject
+        self.timeouts = []
+        self.submit_threads = []
+        self.closed = False
+
+    def submit(self, audio_input, timeout=None):
+        self.timeouts.append(timeout)
+        self.submit_threads.append(threading.current_thread().name)
+        if self.reject is not None:
+            raise self.reject
+        future = Future()
+
+        def finish():
+            if self.error is not None:
+                future.set_exception(self.error("gagal"))
+            else:
+                future.set_result(self.output)
+
+        thread = threading.Thread(target=finish, name="fake-scheduler")
+        thread.start()
+        thread.join()
+        return future
+
+    def close(self):
+        self.closed = True
+
+
+def make_cascade(fast, accurate, **kwargs):
+    return CascadeRecognizer(fast, accurate, min_logprob=-0.5, min_parse_confidence=0.75, **kwargs)
+
+
+def test_confident_fast_result_is_accepted():
+    fast = FakeScheduler(("dua burger", -0.1))
+    accurate = FakeScheduler("tidak dipakai")
+    cascade = make_cascade(fast, accurate)
+
+    assert cascade.transcribe(b"audio", timeout=5) == "dua burger"
+    assert accurate.timeouts == []
+    assert cascade.stats.summary()["resolved_by"] == {"fast": 1}
+    cascade.close()
+
+
+def test_low_logprob_escalates_off_the_scheduler_thread():
+    fast = FakeScheduler(("dua burger", -2.0))
+    accurate = FakeScheduler("tiga burger")
+    cascade = make_cascade(fast, accurate)
+
+    assert cascade.transcribe(b"audio", timeout=5) == "tiga burger"
+    assert fast.timeouts == [5] and accurate.timeouts == [5]
+    assert accurate.submit_threads[0].startswith("cascade")
+    assert cascade.stats.summary()["escalation_reasons"] == {"low_logprob": 1}
+    cascade.close()
+    assert fast.closed and accurate.closed
+
+
+def test_accurate_queue_full_fails_the_result():
+    fast = FakeScheduler(("blender", -0.1))
+    accurate = FakeScheduler(reject=QueueFull("antrean penuh"))
+    cascade = make_cascade(fast, accurate)
+
+    with pytest.raises(QueueFull):
+        cascade.transcribe(b"audio", timeout=5)
+    cascade.close()
+
+
+def test_parser_error_fails_the_result():
+    def broken_catalog():
+        raise ValueError("katalog rusak")
+
+    cascade = make_cascade(FakeScheduler(("dua burger", -0.1)), FakeScheduler("x"), catalog=broken_catalog)
+
+    with pytest.raises(ValueError, match="katalog rusak"):
+        cascade.transcribe(b"audio", timeout=5)
+    cascade.close()
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+import catalog
+from catalog import CatalogStore, MenuCatalog
+
+
+def entry(key, aliases, price=10000):
+    return {"key": key, "name": key.title(), "price": price, "aliases": aliases}
+
+
+def test_alias_shared_by_two_items_is_rejected():
+    with pytest.raises(ValueError, match="ayam"):
+        MenuCatalog([entry("ayam goreng", ["ayam goreng", "ayam"]), entry("ayam bakar", ["ayam bakar", "Ayam"])])
+
+
+def test_duplicate_item_key_is_rejected():
+    with pytest.raises(ValueError, match="burger"):
+        MenuCatalog([entry("burger", ["burger"]), entry("burger", ["hamburger"])])
+
+
+def test_aliases_of_the_same_item_may_normalize_alike():
+    menu = MenuCatalog([entry("hot dog", ["hot dog", "hotdog"])])
+    assert menu.lookup("HOT-DOG").name == "Hot Dog"
+
+
+@pytest.mark.parametrize("content", [
+    "{bukan json",
+    json.dumps({"items": [1, 2]}),
+    json.dumps({"items": [entry("cola", ["cola"]), entry("pepsi", ["Cola"])]}),
+])
+def test_failed_reload_keeps_previous_catalog(tmp_path, content):
+    path = tmp_path / "menu.json"
+    path.write_text(json.dumps({"items": [entry("cola", ["cola"])]}), encoding="utf-8")
+    store = CatalogStore(path, check_interval=0)
+    before = store.get()
+
+    path.write_text(content, encoding="utf-8")
+    store._mtime = -1  # paksa pengecekan ulang walau mtime sama di filesystem beresolusi kasar
+
+    assert store.get() is before
+    assert store.last_error is not None
+
+
+def test_get_catalog_uses_the_shared_store():
+    assert catalog.get_catalog() is catalog.get_store().get()
+    assert catalog.get_store() is catalog.get_store()
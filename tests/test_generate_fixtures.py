@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+
+from audio_io import SAMPLE_RATE, load_wav
+from benchmarks.generate_fixtures import generate, to_sample_rate, voice_for
+
+MANIFEST = [
+    {"file": "id_dua_burger.wav", "text": "dua burger", "expected": {"burger": 2}},
+    {"file": "en_one_cola.wav", "text": "one cola", "expected": {"cola": 1}},
+]
+
+
+def fake_tts(text, voice):
+    # Nada 440 Hz selama 0,1 detik per kata pada 22050 Hz seperti keluaran espeak-ng
+    rate = 22050
+    t = np.arange(int(rate * 0.1 * len(text.split()))) / rate
+    return (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32), rate
+
+
+def test_generate_writes_16k_wav_per_manifest_entry(tmp_path):
+    (tmp_path / "manifest.json").write_text(json.dumps(MANIFEST), encoding="utf-8")
+
+    written, skipped = generate(MANIFEST, tmp_path, fake_tts, snr_db=20)
+
+    assert written == ["id_dua_burger.wav", "en_one_cola.wav"] and skipped == []
+    audio = load_wav(tmp_path / "id_dua_burger.wav")
+    # 0,2 detik ucapan + 0,3 detik pre-roll + 0,5 detik hening di akhir
+    assert len(audio) == SAMPLE_RATE
+    assert np.max(np.abs(audio)) <= 0.96
+
+
+def test_generate_keeps_existing_recordings(tmp_path):
+    existing = tmp_path / "id_dua_burger.wav"
+    existing.write_bytes(b"rekaman asli")
+
+    written, skipped = generate(MANIFEST, tmp_path, fake_tts)
+
+    assert skipped == ["id_dua_burger.wav"] and written == ["en_one_cola.wav"]
+    assert existing.read_bytes() == b"rekaman asli"
+
+
+def test_voice_and_resample_helpers():
+    assert voice_for("id_tiga_ayam.wav") == "id"
+    assert voice_for("en_three_fried_chicken.wav") == "en-us"
+    assert len(to_sample_rate(np.zeros(22050, dtype=np.float32), 22050)) == SAMPLE_RATE
@@ -0,0 +1,74 @@
+import datetime
+import sqlite3
+
+import pytest
+
+from ledger import LedgerError, TransactionLedger
+from order import MenuItem, Order
+
+
+def paid_order():
+    order = Order()
+    order.add_item(MenuItem("Burger", 25000), 2)
+    order.add_item(MenuItem("Cola", 10000), 1)
+    order.set_payment_method("Cash")
+    return order
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = TransactionLedger(str(tmp_path / "ledger.db"), max_delay_ms=10, retry_delay=0)
+    yield ledger
+    ledger.close()
+
+
+def test_record_round_trip(ledger):
+    created_at = datetime.datetime(2025, 6, 3, 17, 58, 8)
+    transaction_id = ledger.record(paid_order(), 100000, created_at)
+    assert ledger.flush(timeout=5)
+
+    transaction = ledger.get_transaction(transaction_id)
+    assert transaction["total"] == 60000
+    assert transaction["cash_received"] == 100000
+    assert transaction["change_due"] == 40000
+    assert transaction["created_at"] == "2025-06-03 17:58:08"
+    assert [(item["menu"], item["quantity"], item["subtotal"]) for item in transaction["items"]] == [
+        ("Burger", 2, 50000), ("Cola", 1, 10000)]
+    assert "Burger" in ledger.render_receipt(transaction_id)
+    assert ledger.summary()["written"] == 1
+
+
+def test_commit_failure_is_capped_and_reported(ledger, monkeypatch):
+    attempts = []
+
+    def broken_commit(batch):
+        attempts.append(batch)
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(ledger, "_commit", broken_commit)
+    transaction_id = ledger.record(paid_order(), 100000)
+
+    with pytest.raises(LedgerError, match="1 transaksi gagal"):
+        ledger.flush(timeout=5)
+    assert len(attempts) == ledger.max_retries + 1
+    assert ledger.failed_ids == [transaction_id]
+    assert ledger.summary()["failed"] == 1
+    # Kegagalan hanya dilaporkan sekali; ledger tetap menerima transaksi baru
+    assert ledger.flush(timeout=5)
+    monkeypatch.undo()
+    ledger.record(paid_order(), 100000)
+    assert ledger.flush(timeout=5)
+
+
+def test_writer_crash_fails_pending_and_rejects_new_records(ledger, monkeypatch):
+    def crash(batch):
+        raise ValueError("bug")
+
+    monkeypatch.setattr(ledger, "_commit", crash)
+    ledger.record(paid_order(), 100000)
+
+    with pytest.raises(LedgerError):
+        ledger.flush(timeout=5)
+    assert not ledger.summary()["writer_running"]
+    with pytest.raises(LedgerError, match="berhenti"):
+        ledger.record(paid_order(), 100000)
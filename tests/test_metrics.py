@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+import metrics
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="butuh os.fork")
+def test_registry_lock_is_usable_in_forked_child():
+    registry = metrics.REGISTRY
+    # Seolah-olah thread lain sedang memegang lock registry tepat saat fork
+    with registry._lock:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                registry.observe("fork_test", 0.01)
+                registry.increment("fork_test")
+            finally:
+                os._exit(0 if registry.counters["fork_test"] == 1 else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
@@ -0,0 +1,62 @@
+from order import MenuItem, Order
+
+BURGER = MenuItem("Burger", 25000)
+COLA = MenuItem("Cola", 10000)
+
+
+def line_sum(order):
+    return sum(line.subtotal for line in order.lines)
+
+
+def test_running_total_follows_every_change():
+    order = Order()
+    order.add_item(BURGER, 2)
+    order.add_item(COLA, 1)
+    assert order.get_total() == 60000
+
+    order.set_quantity("Burger", 3)
+    order.change_quantity("Cola", -1)
+    assert order.get_total() == line_sum(order) == 75000
+    assert order.quantity_of("Cola") == 0
+
+    order.remove_item("Burger")
+    assert order.is_empty() and order.get_total() == 0
+
+
+def test_price_change_after_reload_keeps_total_consistent():
+    order = Order()
+    order.add_item(BURGER, 1)
+    # Katalog dimuat ulang dengan harga baru untuk item yang sudah ada di pesanan
+    order.add_item(MenuItem("Burger", 30000), 1)
+
+    assert order.get_total() == line_sum(order) == 50000
+    order.remove_item("Burger")
+    assert order.get_total() == 0
+
+
+def test_version_bumps_only_on_changes():
+    order = Order()
+    version = order.version
+    order.add_item(BURGER, 0)
+    order.set_quantity("Cola", 2)
+    order.set_quantity("Burger", 1)
+    assert order.version == version
+
+    order.add_item(BURGER, 1)
+    order.set_quantity("Burger", 1)
+    assert order.version == version + 1
+    order.reset()
+    assert order.version == version + 2 and order.get_total() == 0
+
+
+def test_dataframe_is_cached_per_version():
+    order = Order()
+    order.add_item(BURGER, 2)
+    first = order.get_order_df()
+
+    assert order.get_order_df() is first
+    assert first.to_dict("records") == [{"Menu": "Burger", "Harga": 25000, "Jumlah": 2, "Subtotal": 50000}]
+
+    order.add_item(COLA, 1)
+    assert order.get_order_df() is not first
+    assert list(order.get_order_df()["Menu"]) == ["Burger", "Cola"]
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from benchmarks.run_benchmarks import CORPUS_PATH
+from catalog import get_catalog
+from order_parser import OrderParser
+
+with open(CORPUS_PATH, encoding="utf-8") as f:
+    CORPUS = json.load(f)
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return get_catalog()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Saya mau burger ya kak, terima kasih", {"burger": 1}),
+    ("Pesan tiga ayam goreng, makasih", {"ayam goreng": 3}),
+    ("um two burgers and one cola, thank you", {"burger": 2, "cola": 1}),
+    ("halo, eh, dua es krim dong", {"es krim": 2}),
+])
+def test_polite_and_hesitation_words_keep_full_confidence(catalog, text, expected):
+    assert catalog.parse_with_confidence(text) == (expected, 1.0)
+
+
+@pytest.mark.parametrize("text, expected, confidence", [
+    ("dua burger blender", {"burger": 2}, 2 / 3),
+    ("burger dua lima", {"burger": 2}, 2 / 3),
+    ("tidak ada apa apa", {}, 0.0),
+])
+def test_unknown_words_and_unbound_numbers_lower_confidence(catalog, text, expected, confidence):
+    items, score = catalog.parse_with_confidence(text)
+    assert items == expected
+    assert score == pytest.approx(confidence)
+
+
+@pytest.mark.parametrize("entry", CORPUS, ids=[entry["id"] for entry in CORPUS])
+def test_benchmark_corpus(catalog, entry):
+    assert catalog.parse(entry["text"]) == entry["expected"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Bentuk jamak bahasa Inggris
+    ("two burgers", {"burger": 2}),
+    ("Three fried chickens please", {"ayam goreng": 3}),
+    # Kata satuan diabaikan di antara angka dan item
+    ("satu porsi kentang goreng", {"kentang goreng": 1}),
+    ("2 gelas cola", {"cola": 2}),
+    # Alias terpanjang menang dan alias yang sama dijumlahkan
+    ("ayam dan ayam goreng", {"ayam goreng": 2}),
+    ("dua burger dua burger", {"burger": 4}),
+    # Angka sebelum atau sesudah item
+    ("tiga burger", {"burger": 3}),
+    ("burger tiga", {"burger": 3}),
+    ("burger 3 cola 2", {"burger": 3, "cola": 2}),
+    # Angka di antara dua item milik item berikutnya
+    ("burger dua cola", {"burger": 1, "cola": 2}),
+    ("kentang goreng lima, cola satu", {"kentang goreng": 5, "cola": 1}),
+])
+def test_parse_patterns(catalog, text, expected):
+    assert catalog.parse(text) == expected
+
+
+def test_parser_without_catalog():
+    parser = OrderParser({"teh": ["teh", "es teh"]})
+    assert parser.parse("es teh dua dan teh") == {"teh": 3}
+    assert parser.parse("kopi") == {}
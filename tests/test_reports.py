@@ -0,0 +1,87 @@
+import datetime
+
+import pytest
+
+import reports
+from ledger import TransactionLedger
+from order import MenuItem, Order
+
+BURGER = MenuItem("Burger", 25000)
+COLA = MenuItem("Cola", 10000)
+
+
+def make_order(lines, payment_method="Cash"):
+    order = Order()
+    for menu_item, quantity in lines:
+        order.add_item(menu_item, quantity)
+    order.set_payment_method(payment_method)
+    return order
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "ledger.db")
+    ledger = TransactionLedger(path, max_delay_ms=10)
+    connection = reports.open_reporting(path)
+    yield ledger, connection
+    connection.close()
+    ledger.close()
+
+
+def record(ledger, lines, when, payment_method="Cash"):
+    ledger.record(make_order(lines, payment_method), None, when)
+    assert ledger.flush(timeout=5)
+
+
+def totals(connection):
+    frame = reports.daily_summary(connection)
+    return {row.day: (row.transactions, row.revenue, row.units) for row in frame.itertuples()}
+
+
+def test_refresh_only_counts_new_rows(db):
+    ledger, connection = db
+    day = datetime.datetime(2025, 6, 3, 12, 0)
+    record(ledger, [(BURGER, 2), (COLA, 1)], day)
+
+    assert reports.refresh_rollups(connection) == 1
+    # Refresh tanpa transaksi baru tidak boleh menghitung ulang
+    assert reports.refresh_rollups(connection) == 0
+    assert totals(connection) == {"2025-06-03": (1, 60000, 3)}
+
+    record(ledger, [(COLA, 2)], day.replace(hour=13), payment_method="E-Wallet")
+    record(ledger, [(BURGER, 1)], day + datetime.timedelta(days=1))
+    assert reports.refresh_rollups(connection) == 2
+    assert totals(connection) == {"2025-06-03": (2, 80000, 5), "2025-06-04": (1, 25000, 1)}
+
+    items = reports.revenue_per_item(connection).set_index("menu")
+    assert items.loc["Burger", "units"] == 3 and items.loc["Cola", "revenue"] == 30000
+    mix = reports.payment_mix(connection).set_index("payment_method")
+    assert mix.loc["Cash", "transactions"] == 2 and mix.loc["E-Wallet", "transactions"] == 1
+    hourly = reports.units_per_hour(connection).set_index("hour")
+    assert hourly.loc[12, "units"] == 4 and hourly.loc[13, "units"] == 2
+
+
+def test_watermarks_follow_last_rowid(db):
+    ledger, connection = db
+    record(ledger, [(BURGER, 1), (COLA, 1)], datetime.datetime(2025, 6, 3, 9, 0))
+    reports.refresh_rollups(connection)
+
+    assert reports._watermark(connection, "transactions") == 1
+    assert reports._watermark(connection, "transaction_items") == 2
+
+
+def test_failed_refresh_leaves_watermark_untouched(db, monkeypatch):
+    ledger, connection = db
+    record(ledger, [(BURGER, 1)], datetime.datetime(2025, 6, 3, 9, 0))
+
+    def broken_upsert(*args):
+        raise RuntimeError("disk penuh")
+
+    monkeypatch.setattr(reports, "_upsert", broken_upsert)
+    with pytest.raises(RuntimeError):
+        reports.refresh_rollups(connection)
+    monkeypatch.undo()
+
+    assert reports._watermark(connection, "transactions") == 0
+    assert reports.refresh_rollups(connection) == 1
+    assert totals(connection) == {"2025-06-03": (1, 25000, 1)}
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import pytest
+
+from service import HttpError, OrderService, ServiceClient, dispatch, start_server
+
+
+def call(service, method, path, payload=None):
+    request = {"method": method, "path": path, "query": {}, "headers": {},
+               "body": json.dumps(payload).encode() if payload is not None else b""}
+    return asyncio.run(dispatch(service, request))
+
+
+@pytest.fixture
+def service():
+    service = OrderService()
+    service.create_lane("l1")
+    return service
+
+
+def quantities(service):
+    return {line["menu"]: line["quantity"] for line in service.get_lane("l1").snapshot()["items"]}
+
+
+def test_items_quantity_with_alias_sets_instead_of_adding(service):
+    call(service, "POST", "/lanes/l1/items", {"item": "burger", "quantity": 3})
+    call(service, "POST", "/lanes/l1/items", {"item": "burger", "quantity": 2})
+    assert quantities(service) == {"🍔 Burger": 2}
+
+    call(service, "POST", "/lanes/l1/items", {"item": "hamburger", "quantity": 0})
+    assert quantities(service) == {}
+
+
+def test_items_delta_adds_and_removes(service):
+    call(service, "POST", "/lanes/l1/items", {"item": "cola"})
+    call(service, "POST", "/lanes/l1/items", {"item": "kola", "delta": 2})
+    assert quantities(service) == {"🥤 Cola": 3}
+    call(service, "POST", "/lanes/l1/items", {"item": "🥤 Cola", "delta": -3})
+    assert quantities(service) == {}
+
+
+def test_items_unknown_item_is_404(service):
+    with pytest.raises(HttpError) as error:
+        call(service, "POST", "/lanes/l1/items", {"item": "pizza", "quantity": 1})
+    assert error.value.status == 404
+
+
+@pytest.mark.parametrize("payload", [{"item": "burger", "quantity": "dua"}, {"item": "burger", "delta": None},
+                                     {"item": "burger", "quantity": True}])
+def test_items_non_numeric_is_400(service, payload):
+    with pytest.raises(HttpError) as error:
+        call(service, "POST", "/lanes/l1/items", payload)
+    assert error.value.status == 400
+
+
+@pytest.mark.parametrize("path, payload", [("/lanes/l1/items", []), ("/lanes/l1/items", "burger"),
+                                           ("/lanes", [1]), ("/lanes/l1/text", {"text": ["dua", "burger"]}),
+                                           ("/lanes/l1/text", {"text": 2})])
+def test_non_object_body_or_non_string_text_is_400(service, path, payload):
+    with pytest.raises(HttpError) as error:
+        call(service, "POST", path, payload)
+    assert error.value.status == 400
+
+
+def test_pay_rejects_non_numeric_cash(service):
+    call(service, "POST", "/lanes/l1/items", {"item": "burger", "quantity": 1})
+    call(service, "POST", "/lanes/l1/checkout", {})
+    with pytest.raises(HttpError) as error:
+        call(service, "POST", "/lanes/l1/pay", {"method": "Cash", "cash_received": [1]})
+    assert error.value.status == 400
+    status, data = call(service, "POST", "/lanes/l1/pay", {"method": "Cash", "cash_received": "100000"})
+    assert status == 200 and data["lane"]["stage"] == "completed"
+
+
+def test_client_reads_text_metrics_endpoint():
+    async def scenario():
+        server = await start_server(OrderService(), "127.0.0.1", 0)
+        client = ServiceClient("127.0.0.1", server.sockets[0].getsockname()[1])
+        try:
+            metrics_status, text = await client.request("GET", "/metrics")
+            health_status, health = await client.request("GET", "/health")
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
+        return metrics_status, text, health_status, health
+
+    metrics_status, text, health_status, health = asyncio.run(scenario())
+    assert metrics_status == 200 and "pipeline_stage_seconds" in text
+    assert health_status == 200 and health["lanes"] == 0
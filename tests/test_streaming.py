@@ -0,0 +1,62 @@
+from concurrent.futures import Future
+
+import numpy as np
+
+from streaming import StreamingTranscriber, merge_overlapping_words
+
+
+def test_merge_drops_exact_overlap():
+    assert merge_overlapping_words(["saya", "mau", "dua"], ["Mau", "dua,", "burger"]) == \
+        ["saya", "mau", "dua", "burger"]
+
+
+def test_merge_without_overlap_appends_everything():
+    assert merge_overlapping_words(["dua", "burger"], ["satu", "cola"]) == ["dua", "burger", "satu", "cola"]
+    assert merge_overlapping_words([], ["satu", "cola"]) == ["satu", "cola"]
+
+
+def test_merge_tolerates_misrecognized_first_overlap_word():
+    assert merge_overlapping_words(["mau", "dua", "burger"], ["ua", "burger", "dan", "cola"]) == \
+        ["mau", "dua", "burger", "dan", "cola"]
+    # Overlap satu kata harus sama persis
+    assert merge_overlapping_words(["dua", "burger"], ["burgers", "dan"]) == ["dua", "burger", "burgers", "dan"]
+
+
+def done(text):
+    future = Future()
+    future.set_result(text)
+    return future
+
+
+def test_streaming_submits_overlapping_windows_and_flushes_tail():
+    windows = []
+    replies = iter(["saya mau dua", "dua burger dan", "dan satu cola"])
+
+    def submit(window):
+        windows.append(len(window))
+        return done(next(replies))
+
+    transcriber = StreamingTranscriber(submit, sample_rate=10, chunk_seconds=1.0, overlap_seconds=0.5,
+                                       min_tail_seconds=0.2)
+    transcriber.feed(np.zeros(25, dtype=np.float32))
+    assert windows == [10, 15]
+    assert transcriber.poll() and transcriber.text == "saya mau dua burger dan"
+    assert not transcriber.poll()
+
+    transcriber.feed(np.zeros(3, dtype=np.float32))
+    assert transcriber.finish() == "saya mau dua burger dan satu cola"
+    assert windows == [10, 15, 13]
+
+
+def test_finish_skips_tail_shorter_than_minimum():
+    windows = []
+
+    def submit(window):
+        windows.append(len(window))
+        return done("dua burger")
+
+    transcriber = StreamingTranscriber(submit, sample_rate=10, chunk_seconds=1.0, overlap_seconds=0.5,
+                                       min_tail_seconds=0.2)
+    transcriber.feed(np.zeros(11, dtype=np.float32))
+    assert transcriber.finish() == "dua burger"
+    assert windows == [10]
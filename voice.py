@@ -1,266 +1,141 @@
+import time
+
+_SCRIPT_STARTED = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
-import datetime
-import torch
-import librosa
-import speech_recognition as sr
-from transformers import AutoProcessor, AutoModelForSpeechSeq2Seq
+import collections
+import contextlib
 import os
+from pathlib import Path
+
+from audio_io import SAMPLE_RATE
+import metrics
+from background_loader import BackgroundLoader
+from capture import CaptureService, MicrophoneSource, NoSpeechTimeout
+from catalog import get_store
+from lane import PAYMENT_METHODS, LaneError, LaneSession, build_asr_stack
+from ledger import TransactionLedger
+from streaming import StreamingTranscriber
+
+_UI_IMPORTED = time.perf_counter()
 
-# === Memuat model dan processor Whisper dari Hugging Face ===
+# === Memuat stack ASR (torch, transformers, Whisper) di latar belakang ===
 @st.cache_resource
-def load_whisper_model():
-    processor = AutoProcessor.from_pretrained("openai/whisper-small")
-    model = AutoModelForSpeechSeq2Seq.from_pretrained("openai/whisper-small")
-    return processor, model
+def get_asr_loader():
+    return BackgroundLoader(build_asr_stack, name="asr-loader")
 
-processor, model = load_whisper_model()
+asr_loader = get_asr_loader()
 
 # === Fungsi Pengenalan Suara Menggunakan API Whisper ===
-def recognize_speech_from_whisper(audio_file_path):
+def recognize_speech_from_array(audio_input, sampling_rate=SAMPLE_RATE):
+    """Transkripsi audio float32 16kHz yang sudah ada di memori"""
     try:
-        # Membaca file audio dan mengonversi sampling rate ke 16kHz
-        audio_input, sample_rate = librosa.load(audio_file_path, sr=16000)
-        
-        # Menggunakan processor untuk memproses audio input
-        inputs = processor(audio_input, sampling_rate=16000, return_tensors="pt")
-        
-        # Melakukan inferensi dengan model Whisper
-        with torch.no_grad():
-            # Use the correct key - typically 'input_features' for Whisper
-            if "input_features" in inputs:
-                generated_ids = model.generate(inputs["input_features"])
-            elif "input_values" in inputs:
-                generated_ids = model.generate(inputs["input_values"])
-            else:
-                # Fallback: use the first available tensor
-                first_key = list(inputs.keys())[0]
-                generated_ids = model.generate(inputs[first_key])
-        
-        # Mendekodekan hasil inferensi menjadi teks
-        transcription = processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
+        if sampling_rate != SAMPLE_RATE:
+            raise ValueError(f"Audio harus {SAMPLE_RATE} Hz, bukan {sampling_rate} Hz")
+
+        # Inferensi dijalankan oleh penjadwal batch bersama ucapan dari lane lain
+        with metrics.stage("transcribe"):
+            transcription = asr_loader.wait().transcribe(audio_input)
         
         return transcription
         
     except Exception as e:
+        metrics.increment("recognition_failures")
         st.error(f"Error in speech recognition: {str(e)}")
         return "Maaf, tidak dapat mengenali suara. Silakan coba lagi."
 
-# === Fungsi untuk memproses teks pesanan dan menambahkannya ke pesanan ===
-def process_order_text(text):
-    import re
-    
-    # Dictionary untuk konversi angka dalam bahasa Indonesia ke digit
-    number_words = {
-        'satu': 1, 'dua': 2, 'tiga': 3, 'empat': 4, 'lima': 5,
-        'enam': 6, 'tujuh': 7, 'delapan': 8, 'sembilan': 9, 'sepuluh': 10,
-        'sebelas': 11, 'dua belas': 12, 'tiga belas': 13, 'empat belas': 14, 'lima belas': 15,
-        'enam belas': 16, 'tujuh belas': 17, 'delapan belas': 18, 'sembilan belas': 19, 'dua puluh': 20,
-        'satu': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
-        'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
-        'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14, 'fifteen': 15,
-        'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19, 'twenty': 20
-    }
-    
-    def extract_quantity_and_item(text, item_keywords):
-        """Ekstrak jumlah dan item dari teks"""
-        text = text.lower()
-        quantity = 1  # default
-        
-        # Cari pola angka + item atau item + angka
-        for keyword in item_keywords:
-            if keyword in text:
-                # Cari angka di sekitar keyword
-                # Pola: angka + item (contoh: "3 burger", "tiga burger")
-                pattern1 = r'(\d+|\w+)\s+' + re.escape(keyword)
-                match1 = re.search(pattern1, text)
-                
-                # Pola: item + angka (contoh: "burger 3", "burger tiga")
-                pattern2 = re.escape(keyword) + r'\s+(\d+|\w+)'
-                match2 = re.search(pattern2, text)
-                
-                # Pola: "saya mau 3 burger" atau "pesan 3 burger"
-                pattern3 = r'(?:mau|pesan|ingin|order)\s+(\d+|\w+)\s+' + re.escape(keyword)
-                match3 = re.search(pattern3, text)
-                
-                if match1:
-                    qty_str = match1.group(1)
-                elif match2:
-                    qty_str = match2.group(1)
-                elif match3:
-                    qty_str = match3.group(1)
-                else:
-                    # Jika tidak ada pola yang cocok, cari angka terdekat
-                    numbers_in_text = re.findall(r'\d+', text)
-                    if numbers_in_text:
-                        qty_str = numbers_in_text[0]  # Ambil angka pertama
-                    else:
-                        qty_str = None
-                
-                if qty_str:
-                    # Konversi ke angka
-                    if qty_str.isdigit():
-                        quantity = int(qty_str)
-                    elif qty_str in number_words:
-                        quantity = number_words[qty_str]
-                    else:
-                        quantity = 1
-                
-                return max(1, quantity)  # Minimal 1
-        
-        return 0  # Item tidak ditemukan
-    
-    # Dictionary item dengan keywords yang mungkin diucapkan
-    items_config = {
-        "burger": ["burger", "hamburger"],
-        "ayam goreng": ["ayam goreng", "ayam", "fried chicken"],
-        "kentang goreng": ["kentang goreng", "kentang", "french fries", "fries"],
-        "hot dog": ["hot dog", "hotdog", "sosis"],
-        "cola": ["cola", "kola", "pepsi", "soda"],
-        "mineral water": ["mineral water", "air mineral", "air", "water"],
-        "es krim": ["es krim", "ice cream", "eskrim"]
-    }
-    
-    # Proses setiap item
-    items = {}
-    for item_name, keywords in items_config.items():
-        quantity = extract_quantity_and_item(text, keywords)
-        if quantity > 0:
-            items[item_name] = quantity
-    
-    return items
-
-# === OOP Menu Item ===
-class MenuItem:
-    def __init__(self, name, price):
-        self.name = name
-        self.price = price
-
-# === OOP Order Logic ===
-class Order:
-    def __init__(self):
-        self.items = []
-        self.payment_method = None
-
-    def add_item(self, menu_item, quantity):
-        if quantity > 0:
-            # Check if item already exists, if yes, update quantity
-            for item in self.items:
-                if item["Menu"] == menu_item.name:
-                    item["Jumlah"] += quantity
-                    item["Subtotal"] = item["Harga"] * item["Jumlah"]
-                    return
-            # If not exists, add new item
-            self.items.append({
-                "Menu": menu_item.name,
-                "Harga": menu_item.price,
-                "Jumlah": quantity,
-                "Subtotal": menu_item.price * quantity
-            })
-    
-    def remove_item(self, index):
-        """Hapus item berdasarkan index"""
-        if 0 <= index < len(self.items):
-            self.items.pop(index)
-    
-    def update_item_quantity(self, index, new_quantity):
-        """Update jumlah item berdasarkan index"""
-        if 0 <= index < len(self.items):
-            if new_quantity <= 0:
-                self.remove_item(index)
-            else:
-                self.items[index]["Jumlah"] = new_quantity
-                self.items[index]["Subtotal"] = self.items[index]["Harga"] * new_quantity
-    
-    def clear_empty_items(self):
-        """Hapus item dengan jumlah 0"""
-        self.items = [item for item in self.items if item["Jumlah"] > 0]
-
-    def get_order_df(self):
-        return pd.DataFrame(self.items) if self.items else pd.DataFrame(columns=["Menu", "Harga", "Jumlah", "Subtotal"])
-
-    def get_total(self):
-        return sum(item["Subtotal"] for item in self.items)
-
-    def reset(self):
-        self.items = []
-        self.payment_method = None
-
-    def set_payment_method(self, method):
-        self.payment_method = method
-
-    def generate_receipt(self, uang_diterima=None):
-        receipt = "=== STRUK PEMBELIAN ===\n"
-        for item in self.items:
-            receipt += f"{item['Menu']} x{item['Jumlah']} = Rp{item['Subtotal']:,.0f}\n"
-        receipt += f"---------------------------\nTotal: Rp{self.get_total():,.0f}\n"
-        receipt += f"Metode Bayar: {self.payment_method}\n"
-
-        if uang_diterima is not None:
-            if uang_diterima >= self.get_total():
-                kembali = uang_diterima - self.get_total()
-                receipt += f"Uang Diterima: Rp{uang_diterima:,.0f}\n"
-                receipt += f"Uang Kembali: Rp{kembali:,.0f}\n"
-            else:
-                kekurangan = self.get_total() - uang_diterima
-                receipt += f"Uang Diterima: Rp{uang_diterima:,.0f}\n"
-                receipt += f"⚠️ Kekurangan: Rp{kekurangan:,.0f}\n"
-
-        receipt += f"Waktu: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-        receipt += "===========================\nTerima kasih! 🍽️"
-        return receipt
-
-# === Daftar Menu ===
-menu_items = [
-    MenuItem("🍔 Burger", 25000),
-    MenuItem("🍗 Ayam Goreng", 30000),
-    MenuItem("🍟 Kentang Goreng", 15000),
-    MenuItem("🌭 Hot Dog", 20000),
-    MenuItem("🥤 Cola", 10000),
-    MenuItem("🥤 Mineral Water", 7000),
-    MenuItem("🍦 Es Krim", 12000),
-]
+def recognize_speech_from_whisper(audio_file_path):
+    try:
+        # Membaca file audio dan mengonversi sampling rate ke 16kHz
+        import librosa
+        with metrics.stage("load_audio"):
+            audio_input, sample_rate = librosa.load(audio_file_path, sr=SAMPLE_RATE)
+    except Exception as e:
+        metrics.increment("recognition_failures")
+        st.error(f"Error in speech recognition: {str(e)}")
+        return "Maaf, tidak dapat mengenali suara. Silakan coba lagi."
 
-# === Streamlit UI ===
-st.title("🍔 Mc Ronald Drive-Thru 🍔")
+    return recognize_speech_from_array(audio_input, sampling_rate=sample_rate)
 
-# Initialize session state
-if "order" not in st.session_state:
-    st.session_state.order = Order()
-if "stage" not in st.session_state:
-    st.session_state.stage = "ordering"  # ordering, payment, completed
-if "last_transcription" not in st.session_state:
-    st.session_state.last_transcription = ""
+# === Daftar Menu (dari katalog menu.json, dimuat ulang otomatis saat file berubah) ===
+# Store yang sama dengan `catalog.get_catalog()` sehingga parser, bias decoding, dan UI selalu memakai katalog yang sama
+catalog_store = get_store()
+catalog = catalog_store.get()
 
+# === Ledger transaksi bersama untuk semua lane ===
+@st.cache_resource
+def get_ledger():
+    return TransactionLedger()
 
-# Menampilkan menu dan harga
-st.subheader("Menu Mc Ronald")
-menu_df = pd.DataFrame([(item.name, f"Rp{item.price:,.0f}") for item in menu_items], columns=["Menu", "Harga"])
-st.dataframe(menu_df, use_container_width=True, hide_index=True)
+ledger = get_ledger()
 
-# Sidebar untuk kategori menu
-with st.sidebar:
-    st.image("https://media0.giphy.com/media/v1.Y2lkPTc5MGI3NjExdmF6aGw2YWN6am1zZGo4M2RvOHl2bWZlbXRkbTNjcjAzbzgzOHhkYSZlcD12MV9pbnRlcm5hbF9naWZfYnlfaWQmY3Q9Zw/12OoIZRC435JrcFV6z/giphy.gif", caption="Fast Food Logo", width=300)
-    st.title("Menu Ingredient")
-    category = st.radio("Pilih kategori:", ["Burger", "Ayam Goreng", "Kentang Goreng", "Hotdog", "Cola", "Mineral Water", "Es Krim"])
-
-    # Tambahkan tombol deskripsi di bawah menu ingredient
-    category_descriptions = {
-        "Burger": "Burger lezat dengan daging sapi pilihan dan sayuran segar.",
-        "Ayam Goreng": "Ayam goreng renyah dengan bumbu khas.",
-        "Kentang Goreng": "Kentang goreng gurih dan renyah, cocok untuk camilan.",
-        "Hotdog": "Hotdog dengan sosis premium dan saus spesial.",
-        "Cola": "Minuman cola dingin yang menyegarkan.",
-        "Mineral Water": "Air mineral murni untuk melepas dahaga.",
-        "Es Krim": "Es krim manis dan dingin membuat fun."
-    }
+# === Ekspor metrik pipeline ke file secara berkala (opsional) ===
+@st.cache_resource
+def start_metrics_export():
+    directory = os.environ.get("PIPELINE_METRICS_DIR")
+    if directory and metrics.REGISTRY.enabled:
+        return metrics.REGISTRY.start_file_export(directory)
+    return None
 
-    if st.button("Tampilkan Deskripsi"):
-        st.write(f"**Deskripsi:** {category_descriptions[category]}")
+start_metrics_export()
 
-# Tambahkan CSS untuk mempercantik aplikasi
-st.markdown(
+# === Capture mikrofon selalu aktif: noise floor terus dikalibrasi dan pre-roll tersimpan ===
+@st.cache_resource
+def get_capture_service():
+    device_index = os.environ.get("CAPTURE_DEVICE_INDEX")
+    source = MicrophoneSource(SAMPLE_RATE, device_index=int(device_index) if device_index else None)
+    return CaptureService(source).start()
+
+def open_capture_service():
+    """Capture aktif beserta error pembukaan mikrofon (mis. PyAudio tidak terpasang atau tidak ada device).
+
+    Exception tidak di-cache oleh `st.cache_resource`, sehingga mikrofon dicoba
+    lagi di rerun berikutnya; sampai itu UI tetap berjalan tanpa input suara.
     """
+    try:
+        return get_capture_service(), None
+    except Exception as e:
+        return None, e
+
+# Dimulai saat aplikasi dibuka agar noise floor sudah terkalibrasi sebelum pelanggan pertama bicara
+capture_service, capture_error = open_capture_service()
+
+# === Waktu rerun per interaksi (aplikasi penuh dan tiap fragment) ===
+RERUN_WINDOW = 50
+
+@contextlib.contextmanager
+def rerun_timer(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_rerun(name, time.perf_counter() - started)
+
+def record_rerun(name, seconds):
+    timings = st.session_state.setdefault("rerun_timings", {})
+    timings.setdefault(name, collections.deque(maxlen=RERUN_WINDOW)).append(seconds)
+
+def rerun_summary():
+    """Ringkasan waktu rerun dalam milidetik per bagian UI"""
+    summary = {}
+    for name, samples in st.session_state.get("rerun_timings", {}).items():
+        ordered = sorted(samples)
+        summary[name] = {
+            "last_ms": round(samples[-1] * 1000, 1),
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 1),
+            "count": len(samples),
+        }
+    return summary
+
+def last_rerun_ms(name):
+    samples = st.session_state.get("rerun_timings", {}).get(name)
+    return samples[-1] * 1000 if samples else None
+
+# === Konten statis: CSS dan logo lokal (tidak butuh koneksi internet) ===
+ASSETS_DIR = Path(__file__).resolve().parent / "assets"
+
+APP_CSS = """
     <style>
     .stApp {
         background: linear-gradient(135deg, #fffbe7 0%, #ffe5b4 40%, #f6d365 70%, #fda085 100%);
@@ -286,216 +161,374 @@ st.markdown(
         background: #fffbe7;
     }
     </style>
-    """,
-    unsafe_allow_html=True
-)
+    """
+
+PAYMENT_HEADER = '<h1 style="text-align:center; font-size:2rem; font-family:Comic Sans MS, Comic Sans, cursive; color:#8B4513; font-weight:bold; letter-spacing:2px; margin-bottom:0.5em; text-shadow:2px 2px 8px #ffd70099,0 2px 8px #fda08566;">🍔PAYMENT🍔</h1>'
+
+@st.cache_data
+def load_logo_html():
+    svg = (ASSETS_DIR / "logo.svg").read_text(encoding="utf-8")
+    return f'<div style="text-align:center">{svg}<p style="margin:0">Fast Food Logo</p></div>'
+
+# === Streamlit UI ===
+st.title("🍔 Mc Ronald Drive-Thru 🍔")
+
+# Initialize session state
+# Semua logika pesanan dan tahap (ordering, payment, completed) ada di LaneSession; UI hanya klien tipis
+if "lane" not in st.session_state:
+    st.session_state.lane = LaneSession(catalog=catalog_store.get, ledger=ledger)
+lane = st.session_state.lane
+if "voice_messages" not in st.session_state:
+    st.session_state.voice_messages = []
+
+
+# Menampilkan menu dan harga (baris tabel sudah disiapkan katalog saat dimuat)
+st.subheader("Menu Mc Ronald")
+st.dataframe(catalog.menu_rows, use_container_width=True, hide_index=True)
+
+# Indikator kesiapan model; UI dan edit manual tetap bisa dipakai selama model dimuat
+@st.fragment(run_every=1.0)
+def model_loading_status():
+    if asr_loader.ready or asr_loader.failed:
+        # Rerun penuh agar tombol suara ikut aktif
+        st.rerun()
+    st.info(f"⏳ Model suara sedang dimuat ({asr_loader.current_phase})... Pesanan tetap bisa diedit manual.")
+
+if asr_loader.failed:
+    st.error(f"Model suara gagal dimuat: {asr_loader.error}")
+elif asr_loader.ready:
+    st.caption("🟢 Model suara siap")
+else:
+    model_loading_status()
+
+# Sidebar untuk kategori menu; pilihan kategori hanya me-rerun fragment ini
+@st.fragment
+def sidebar_panel():
+    with rerun_timer("sidebar"):
+        st.markdown(load_logo_html(), unsafe_allow_html=True)
+        st.title("Menu Ingredient")
+        category = st.radio("Pilih kategori:", catalog.categories)
+
+        # Tambahkan tombol deskripsi di bawah menu ingredient
+        if st.button("Tampilkan Deskripsi"):
+            st.write(f"**Deskripsi:** {catalog.descriptions[category]}")
+
+        if catalog_store.last_error:
+            st.warning(f"Katalog menu gagal dimuat ulang, memakai versi sebelumnya: {catalog_store.last_error}")
+        ledger_summary = ledger.summary()
+        if ledger_summary["failed"] or not ledger_summary["writer_running"]:
+            st.error(f"Ledger gagal menyimpan {ledger_summary['failed']} transaksi: {ledger_summary['last_error']}")
+
+        # Statistik penjadwal batch untuk tuning throughput vs latensi
+        if asr_loader.ready:
+            with st.expander("📊 Statistik Inferensi"):
+                import asr
+                inference = {"backend": asr.WhisperBackendConfig.from_env().to_dict(), "scheduler": asr_loader.result.stats.summary()}
+                if hasattr(asr_loader.result, "summary"):
+                    # Pool proses (ASR_WORKERS > 1): worker hidup, restart, dan kedalaman antrean
+                    inference["pool"] = asr_loader.result.summary()
+                st.json(inference)
+
+        # Status capture mikrofon: noise floor terkini dan jumlah segmen ucapan
+        with st.expander("🎙️ Capture Audio", expanded=capture_service is None or not capture_service.running):
+            if capture_service is None:
+                st.error(f"Mikrofon tidak dapat dibuka: {capture_error}")
+            else:
+                if not capture_service.running:
+                    st.error(f"Capture berhenti: {capture_service.last_error}")
+                st.json(capture_service.summary())
+            if (capture_service is None or not capture_service.running) and st.button("🔄 Buka ulang mikrofon"):
+                if capture_service is not None:
+                    capture_service.stop()
+                get_capture_service.clear()
+                st.rerun()
+
+        # Waktu startup per fase: import ringan + render pertama, lalu fase muat model di latar belakang
+        with st.expander("🚀 Waktu Startup"):
+            st.json({"ui_import_seconds": round(_UI_IMPORTED - _SCRIPT_STARTED, 3),
+                     "first_render_seconds": st.session_state.first_render_seconds,
+                     "asr": asr_loader.report()})
+
+        # Waktu rerun per interaksi: "aplikasi" = rerun penuh, lainnya = rerun fragment
+        with st.expander("⏱️ Waktu Rerun"):
+            st.json(rerun_summary())
+
+        # Latensi per tahap pipeline suara, kegagalan, dan memori model
+        if metrics.REGISTRY.enabled:
+            with st.expander("📈 Metrik Pipeline"):
+                st.json(metrics.REGISTRY.snapshot())
+                st.download_button("Unduh (Prometheus)", metrics.REGISTRY.prometheus_text(),
+                                   file_name="metrics.prom", mime="text/plain")
+
+if "first_render_seconds" not in st.session_state:
+    st.session_state.first_render_seconds = None
+with st.sidebar:
+    sidebar_panel()
+
+# Tambahkan CSS untuk mempercantik aplikasi
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # Tambahkan header dengan gaya khusus
-st.markdown('<h1 style="text-align:center; font-size:2rem; font-family:Comic Sans MS, Comic Sans, cursive; color:#8B4513; font-weight:bold; letter-spacing:2px; margin-bottom:0.5em; text-shadow:2px 2px 8px #ffd70099,0 2px 8px #fda08566;">🍔PAYMENT🍔</h1>', unsafe_allow_html=True)
+st.markdown(PAYMENT_HEADER, unsafe_allow_html=True)
 
-# === TAHAP PEMESANAN ===
-if st.session_state.stage == "ordering":
-    st.subheader("🎤 Pemesanan Suara")
-    
-    # Tampilkan pesanan saat ini jika ada
-    if st.session_state.order.items:
+# === Callback aksi; perubahan state terjadi sebelum rerun sehingga tidak perlu st.rerun() ===
+def go_to_payment():
+    try:
+        st.session_state.lane.checkout()
+    except LaneError as e:
+        st.session_state.lane_error = str(e)
+
+def reset_order():
+    st.session_state.lane.reset()
+    st.session_state.voice_messages = []
+
+def start_new_order():
+    st.session_state.lane.new_order()
+    st.session_state.voice_messages = []
+    # Clear the uang_diterima from session state
+    if "uang_diterima" in st.session_state:
+        del st.session_state["uang_diterima"]
+
+# === Panel keranjang: tombol ➕/➖/🗑️ dan input jumlah hanya me-rerun fragment ini ===
+@st.fragment
+def cart_panel():
+    with rerun_timer("keranjang"):
+        order = lane.order
+        if order.is_empty():
+            return
         st.subheader("Pesanan Saat Ini:")
-        
-        # Tampilkan setiap item dengan tombol hapus dan edit
-        for idx, item in enumerate(st.session_state.order.items):
-            col1, col2, col3, col4, col5, col6 = st.columns([3, 1, 1, 1, 1, 1])
+
+        # Tampilkan setiap item dengan tombol hapus dan edit; semua perubahan lewat LaneSession
+        for line in order.lines:
+            col1, col2, col3, col4, col5 = st.columns([3, 1, 1, 1, 1])
 
             with col1:
-                st.write(f"**{item['Menu']}** - Rp{item['Harga']:,.0f} x {item['Jumlah']} = Rp{item['Subtotal']:,.0f}")
-            
+                st.write(f"**{line.name}** - Rp{line.price:,.0f} x {line.quantity} = Rp{line.subtotal:,.0f}")
+
             with col2:
-                # Tombol kurangi jumlah
-                if st.button("➖", key=f"decrease_{idx}", help="Kurangi 1"):
-                    if item['Jumlah'] > 1:
-                        item['Jumlah'] -= 1
-                        item['Subtotal'] = item['Harga'] * item['Jumlah']
-                    else:
-                        # Jika jumlah = 1, hapus item
-                        st.session_state.order.items.pop(idx)
-                    st.rerun()
-            
+                # Tombol kurangi jumlah (jumlah 1 -> item dihapus)
+                st.button("➖", key=f"decrease_{line.name}", help="Kurangi 1",
+                          on_click=lane.change_quantity, args=(line.name, -1))
+
             with col3:
-                # Input jumlah langsung tanpa label 'Qty'
-                new_qty = st.number_input(
+                # Input jumlah langsung tanpa label 'Qty'; nilai disinkronkan dengan pesanan
+                qty_key = f"qty_{line.name}"
+                st.session_state[qty_key] = line.quantity
+                st.number_input(
                     label="",  # Menghapus label
-                    min_value=0, 
-                    value=item['Jumlah'], 
-                    key=f"qty_{idx}",
+                    min_value=0,
+                    key=qty_key,
+                    on_change=lambda name=line.name, key=qty_key: lane.set_quantity(name, st.session_state[key]),
                     label_visibility="collapsed"  # Menyembunyikan label agar lebih sejajar
-                )  # Menghapus properti help
-                if new_qty != item['Jumlah']:
-                    if new_qty == 0:
-                        st.session_state.order.items.pop(idx)
-                    else:
-                        item['Jumlah'] = new_qty
-                        item['Subtotal'] = item['Harga'] * item['Jumlah']
-                    st.rerun()
-            
+                )
+
             with col4:
                 # Tombol tambah jumlah
-                if st.button("➕", key=f"increase_{idx}", help="Tambah 1"):
-                    item['Jumlah'] += 1
-                    item['Subtotal'] = item['Harga'] * item['Jumlah']
-                    st.rerun()
-            
+                st.button("➕", key=f"increase_{line.name}", help="Tambah 1",
+                          on_click=lane.change_quantity, args=(line.name, 1))
+
             with col5:
                 # Tombol hapus item
-                if st.button("🗑️", key=f"delete_{idx}", help="Hapus item"):
-                    st.session_state.order.items.pop(idx)
-                    st.rerun()
+                st.button("🗑️", key=f"delete_{line.name}", help="Hapus item",
+                          on_click=lane.remove_item, args=(line.name,))
 
-            with col6:
-                # Tombol edit item
-                pass  # Menghapus tombol edit
-        
         st.divider()
-        st.write(f"### **Total: Rp{st.session_state.order.get_total():,.0f}**")
-    
-    # Tombol untuk mulai mendengarkan pesanan suara
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("🎤 Mulai Bicara", key="voice_button"):
+        st.write(f"### **Total: Rp{order.get_total():,.0f}**")
+        previous_ms = last_rerun_ms("keranjang")
+        if previous_ms is not None:
+            st.caption(f"⏱️ Render keranjang terakhir: {previous_ms:.0f} ms ({len(order.lines)} item)")
+
+# === Panel transkripsi: rekam, transkripsi, dan masukkan item ke keranjang ===
+def listen_streaming(capture, scheduler, messages):
+    transcript_box = st.empty()
+    cart_box = st.empty()
+
+    streamer = StreamingTranscriber(scheduler.submit, sample_rate=SAMPLE_RATE)
+    applied = {}
+    first_item_at = None
+
+    # Mikrofon sudah terbuka dan terkalibrasi; potongan pertama berisi pre-roll sebelum awal ucapan
+    streamer.started_at = time.perf_counter()
+    with metrics.stage("listen"):
+        for chunk in capture.utterance_chunks(timeout=10):
+            streamer.feed(chunk)
+            if streamer.poll():
+                # Transkripsi parsial langsung diproses agar keranjang ter-update
+                transcript_box.info(f"🎧 {streamer.text}")
+                applied = lane.apply_partial(applied, catalog.parse(streamer.text))
+                if applied and first_item_at is None:
+                    first_item_at = time.perf_counter()
+                cart_box.dataframe(lane.order.get_order_df(), use_container_width=True, hide_index=True)
+
+    # Pass terakhir hanya men-decode ekor audio yang belum diproses
+    with metrics.stage("transcribe_tail"):
+        transcription = streamer.finish()
+    final_at = time.perf_counter()
+    lane.last_transcription = transcription
+    messages.append(("success", f"Pesanan yang dikenali: {transcription}"))
+
+    items_recognized = catalog.parse(transcription)
+    lane.apply_partial(applied, items_recognized)
+    metrics.increment("utterances")
+    if items_recognized:
+        if first_item_at is None:
+            first_item_at = final_at
+        for item_key, qty in items_recognized.items():
+            menu_item = catalog.lookup(item_key)
+            if menu_item is not None:
+                messages.append(("success", f"✅ Menambahkan {qty} x {menu_item.name}"))
+        messages.append(("caption", f"⏱️ Item pertama: {first_item_at - streamer.started_at:.2f} dtk · "
+                                    f"Pesanan final: {final_at - streamer.started_at:.2f} dtk"))
+    else:
+        metrics.increment("no_items")
+        messages.append(("warning", "Tidak ada item yang dikenali. Silakan coba lagi dengan lebih jelas."))
+
+def listen_once(capture, messages):
+    # Segmen ucapan utuh dari capture yang selalu aktif; audio tetap di memori tanpa file WAV sementara
+    with metrics.stage("listen"):
+        audio = capture.next_segment(timeout=10)
+
+    # Mengenali suara dengan model Whisper
+    transcription = recognize_speech_from_array(audio)
+    messages.append(("success", f"Pesanan yang dikenali: {transcription}"))
+
+    # Proses transkripsi untuk menambah item ke pesanan
+    added = lane.apply_text(transcription)
+    if added:
+        for name, qty in added:
+            messages.append(("success", f"✅ Menambahkan {qty} x {name}"))
+    else:
+        messages.append(("warning", "Tidak ada item yang dikenali. Silakan coba lagi dengan lebih jelas."))
+
+@st.fragment
+def voice_panel():
+    with rerun_timer("transkripsi"):
+        streaming_mode = st.checkbox("⚡ Mode streaming", value=True, help="Keranjang diperbarui selama pelanggan berbicara")
+        capture_ready = capture_service is not None and capture_service.running
+        if not capture_ready:
+            st.warning("Mikrofon tidak tersedia; lihat 🎙️ Capture Audio di sidebar.")
+        if st.button("🎤 Mulai Bicara", key="voice_button", disabled=not asr_loader.ready or not capture_ready):
+            messages = []
+            version_before = lane.order.version
             with st.spinner("🎤 Mendengarkan pesanan..."):
-                # Merekam suara menggunakan mikrofon dan menyimpannya ke file WAV sementara
-                recognizer = sr.Recognizer()
-                microphone = sr.Microphone()
-
                 try:
-                    with microphone as source:
-                        recognizer.adjust_for_ambient_noise(source, duration=1)
-                        audio = recognizer.listen(source, timeout=10, phrase_time_limit=5)
-
-                    with open("temp_audio.wav", "wb") as f:
-                        f.write(audio.get_wav_data())
-
-                    # Mengenali suara dengan model Whisper
-                    transcription = recognize_speech_from_whisper("temp_audio.wav")
-                    st.session_state.last_transcription = transcription
-
-                    # Cleanup temp file
-                    if os.path.exists("temp_audio.wav"):
-                        os.remove("temp_audio.wav")
-
-                    # Menampilkan hasil transkripsi
-                    st.success(f"Pesanan yang dikenali: {transcription}")
-
-                    # Proses transkripsi untuk menambah item ke pesanan
-                    items_recognized = process_order_text(transcription)
-                    if items_recognized:
-                        for item_key, qty in items_recognized.items():
-                            # Find matching menu item
-                            for menu_item in menu_items:
-                                if item_key.replace(" ", "").lower() in menu_item.name.replace(" ", "").lower():
-                                    st.session_state.order.add_item(menu_item, qty)
-                                    st.success(f"✅ Menambahkan {qty} x {menu_item.name}")
-                                    break
+                    if streaming_mode:
+                        listen_streaming(capture_service, asr_loader.result, messages)
                     else:
-                        st.warning("Tidak ada item yang dikenali. Silakan coba lagi dengan lebih jelas.")
-                        
-                except sr.WaitTimeoutError:
-                    st.error("Waktu habis. Silakan coba lagi.")
+                        listen_once(capture_service, messages)
+                except NoSpeechTimeout:
+                    messages.append(("error", "Waktu habis. Silakan coba lagi."))
                 except Exception as e:
-                    st.error(f"Error dalam perekaman: {str(e)}")
-    
-    with col2:
-        if st.button("🛒 Lanjut ke Pembayaran", key="payment_button"):
-            if st.session_state.order.items:
-                st.session_state.stage = "payment"
+                    metrics.increment("recognition_failures")
+                    messages.append(("error", f"Error dalam perekaman: {str(e)}"))
+            st.session_state.voice_messages = messages
+            if lane.order.version != version_before:
+                # Keranjang berubah: rerun penuh sekali agar panel keranjang ikut diperbarui
                 st.rerun()
-            else:
-                st.warning("Pesanan masih kosong! Silakan pesan terlebih dahulu.")
-    
+
+        for kind, text in st.session_state.voice_messages:
+            getattr(st, kind)(text)
+
+# === TAHAP PEMESANAN ===
+if lane.stage == "ordering":
+    st.subheader("🎤 Pemesanan Suara")
+
+    # Tampilkan pesanan saat ini jika ada
+    cart_panel()
+
+    # Tombol untuk mulai mendengarkan pesanan suara
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        voice_panel()
+
+    with col2:
+        # Callback memindahkan tahap; jika pesanan kosong, pesan error lane ditampilkan di sini
+        if st.button("🛒 Lanjut ke Pembayaran", key="payment_button", on_click=go_to_payment) and "lane_error" in st.session_state:
+            st.warning(st.session_state.pop("lane_error"))
+
     with col3:
-        if st.button("🗑️ Reset Pesanan", key="reset_button"):
-            st.session_state.order.reset()
-            st.session_state.last_transcription = ""
+        if st.button("🗑️ Reset Pesanan", key="reset_button", on_click=reset_order):
             st.success("Pesanan direset!")
-            st.rerun()
+
+    # Tampilkan transkripsi terakhir jika ada
+    if lane.last_transcription:
+        st.info(f"Transkripsi terakhir: {lane.last_transcription}")
 
 # === TAHAP PEMBAYARAN ===
-elif st.session_state.stage == "payment":
-    st.subheader("💳 Pembayaran")
-    
-    # Tampilkan ringkasan pesanan
-    st.subheader("Ringkasan Pesanan:")
-    order_df = st.session_state.order.get_order_df()
-    st.dataframe(order_df, use_container_width=True, hide_index=True)
-    
-    total = st.session_state.order.get_total()
-    st.write(f"### **Total: Rp{total:,.0f}**")
-    
-    # Input metode pembayaran
-    payment_method = st.selectbox("Pilih Metode Pembayaran:", ["Cash", "E-Wallet", "Debit Card"], key="payment_method")
-    st.session_state.order.set_payment_method(payment_method)
-    
-    # Input jumlah uang yang diterima (hanya untuk Cash)
-    if payment_method == "Cash":
-        uang_diterima = st.number_input(
-            "💵 Masukkan uang diterima (Rp):", 
-            min_value=0, 
-            step=1000, 
-            key="uang_diterima"
-        )
-        
-        if uang_diterima > 0:
-            if uang_diterima >= total:
-                kembalian = uang_diterima - total
-                st.success(f"✅ Uang kembali: Rp{kembalian:,.0f}")
-                payment_complete = True
+# Pilihan metode dan input uang hanya me-rerun fragment ini; pindah tahap memicu rerun penuh
+@st.fragment
+def payment_panel():
+    with rerun_timer("pembayaran"):
+        order = lane.order
+        st.subheader("💳 Pembayaran")
+
+        # Tampilkan ringkasan pesanan
+        st.subheader("Ringkasan Pesanan:")
+        st.dataframe(order.get_order_df(), use_container_width=True, hide_index=True)
+
+        total = order.get_total()
+        st.write(f"### **Total: Rp{total:,.0f}**")
+
+        # Input metode pembayaran
+        payment_method = st.selectbox("Pilih Metode Pembayaran:", PAYMENT_METHODS, key="payment_method")
+
+        # Input jumlah uang yang diterima (hanya untuk Cash)
+        if payment_method == "Cash":
+            uang_diterima = st.number_input(
+                "💵 Masukkan uang diterima (Rp):",
+                min_value=0,
+                step=1000,
+                key="uang_diterima"
+            )
+
+            if uang_diterima > 0:
+                if uang_diterima >= total:
+                    kembalian = uang_diterima - total
+                    st.success(f"✅ Uang kembali: Rp{kembalian:,.0f}")
+                    payment_complete = True
+                else:
+                    kekurangan = total - uang_diterima
+                    st.error(f"⚠️ Uang kurang: Rp{kekurangan:,.0f}")
+                    payment_complete = False
             else:
-                kekurangan = total - uang_diterima
-                st.error(f"⚠️ Uang kurang: Rp{kekurangan:,.0f}")
                 payment_complete = False
         else:
-            payment_complete = False
-    else:
-        # Untuk E-Wallet dan Debit Card, tidak perlu input uang
-        st.info(f"Silakan lakukan pembayaran melalui {payment_method}")
-        uang_diterima = total  # Set equal to total for non-cash payments
-        payment_complete = True
-    
-    # Tombol aksi
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        if st.button("⬅️ Kembali ke Pemesanan", key="back_to_order"):
-            st.session_state.stage = "ordering"
-            st.rerun()
-    
-    with col2:
-        if payment_complete and st.button("🖨️ Cetak Struk", key="print_receipt"):
-            st.session_state.stage = "completed"
-            st.rerun()
+            # Untuk E-Wallet dan Debit Card, tidak perlu input uang
+            st.info(f"Silakan lakukan pembayaran melalui {payment_method}")
+            uang_diterima = total  # Set equal to total for non-cash payments
+            payment_complete = True
+
+        # Tombol aksi
+        col1, col2 = st.columns(2)
+
+        with col1:
+            if st.button("⬅️ Kembali ke Pemesanan", key="back_to_order"):
+                lane.back_to_ordering()
+                st.rerun()
+
+        with col2:
+            if payment_complete and st.button("🖨️ Cetak Struk", key="print_receipt"):
+                # LaneSession menyimpan transaksi ke ledger (group commit di latar belakang)
+                lane.pay(payment_method, uang_diterima)
+                st.rerun()
+
+if lane.stage == "payment":
+    payment_panel()
 
 # === TAHAP SELESAI ===
-elif st.session_state.stage == "completed":
+elif lane.stage == "completed":
     st.subheader("🎉 Pembayaran Berhasil!")
-    
-    # Generate dan tampilkan struk
-    if st.session_state.order.payment_method == "Cash":
-        uang_diterima = st.session_state.get("uang_diterima", st.session_state.order.get_total())
-    else:
-        uang_diterima = st.session_state.order.get_total()
-    
-    receipt = st.session_state.order.generate_receipt(uang_diterima)
-    st.code(receipt, language="text")
-    
+
+    # Tampilkan struk dari transaksi yang sudah selesai
+    st.code(lane.receipt(), language="text")
+    if lane.transaction_id:
+        st.caption(f"ID transaksi: {lane.transaction_id}")
+
     # Tombol untuk pesanan baru
-    if st.button("🔄 Pesanan Baru", key="new_order"):
-        st.session_state.order.reset()
-        st.session_state.stage = "ordering"
-        st.session_state.last_transcription = ""
-        # Clear the uang_diterima from session state
-        if "uang_diterima" in st.session_state:
-            del st.session_state["uang_diterima"]
-        st.rerun()
+    st.button("🔄 Pesanan Baru", key="new_order", on_click=start_new_order)
 
-# Tampilkan transkripsi terakhir jika ada
-if st.session_state.last_transcription and st.session_state.stage == "ordering":
-    st.info(f"Transkripsi terakhir: {st.session_state.last_transcription}")
+# Catat durasi render pertama untuk laporan startup dan durasi rerun penuh ini
+if st.session_state.first_render_seconds is None:
+    st.session_state.first_render_seconds = round(time.perf_counter() - _SCRIPT_STARTED, 3)
+record_rerun("aplikasi", time.perf_counter() - _SCRIPT_STARTED)